@@ -0,0 +1,233 @@
+# Benchmark of the .snd serializer against the previous StringIO exporter.
+#
+# Runs with plain Python (no Blender needed):
+#     python benchmarks/bench_export.py --attachments 10000 --events 4
+#
+# The scene is made of stand-in objects exposing the same attributes as the
+# Blender objects and property groups used by the exporter. Both exporters
+# write to a temporary file and their output is checked to be identical.
+
+import argparse
+import io
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from xpsound.xpsound_serializer import (format_header, format_footer, format_transform, format_sound_attachment,
+                                        format_snapshot_attachment, format_sound_space, write_sections)
+
+
+class Vec(tuple):
+    "Tuple with mathutils-like x, y, z accessors."
+    x = property(lambda self: self[0])
+    y = property(lambda self: self[1])
+    z = property(lambda self: self[2])
+
+
+def make_event(rng):
+    return SimpleNamespace(
+        event_type=rng.choice(("START", "END", "ALWAYS", "START")),
+        dataref_name=f"sim/cockpit2/engine/indicators/N1_percent[{rng.randrange(8)}]",
+        comparison_operator=rng.choice(("<", "<=", "==", "!=", ">=", ">")),
+        comparison_value=rng.uniform(-100, 100),
+    )
+
+
+def make_scene(attachments, events, sounds_per_object, seed=1):
+    rng = random.Random(seed)
+    objects = []
+    index = 0
+    while index < attachments:
+        sounds = []
+        for _ in range(min(sounds_per_object, attachments - index)):
+            sounds.append(SimpleNamespace(
+                name=f"sound_{index}",
+                guid=f"/engines/engine_{index % 8}/sound_{index}",
+                event_param_idx=rng.randrange(4),
+                event_polyphonic=rng.random() < 0.2,
+                event_allowed_for_ai=rng.random() < 0.5,
+                event_auto_end_from_start_cond=rng.random() < 0.5,
+                event_list=[make_event(rng) for _ in range(events)],
+            ))
+            index += 1
+        objects.append(SimpleNamespace(
+            name=f"Sound - /engines/engine_{len(objects)}",
+            location=Vec((rng.uniform(-20, 20), rng.uniform(-20, 20), rng.uniform(-5, 5))),
+            rotation_euler=Vec((0.0, rng.choice((0.0, 0.3)), rng.uniform(-math.pi, math.pi))),
+            xp_sound_list=sounds,
+        ))
+
+    snapshots = [SimpleNamespace(
+        name=f"snapshot_{i}", guid=f"/snapshots/snapshot_{i}", event_param_idx=0,
+        event_auto_end_from_start_cond=False, event_list=[make_event(rng) for _ in range(events)],
+    ) for i in range(attachments // 100)]
+
+    spaces = [SimpleNamespace(
+        name=f"Space - {i}", space_index=i, space_blend_depth=0.5, empty_display_size=1.0,
+        empty_display_type=("CUBE", "SPHERE")[i % 2],
+        location=Vec((rng.uniform(-20, 20), rng.uniform(-20, 20), rng.uniform(-5, 5))),
+        scale=Vec((2.0, 3.0, 1.5)),
+    ) for i in range(attachments // 200)]
+    return objects, snapshots, spaces
+
+
+# Previous exporter: one write per line into StringIO, getvalue() called twice per section
+def legacy_sound_attachment(f, obj, sound):
+    f.write(f"# XPSounds -> {obj.name} -> {sound.name}\n")
+    f.write("BEGIN_SOUND_ATTACHMENT\n")
+    f.write(f"\tEVENT_NAME {sound.guid}\n")
+    f.write(f"\tVEH_XYZ {round(obj.location.x, 4)} {round(obj.location.z, 4)} {-round(obj.location.y, 4)}\n")
+    phi = math.degrees(obj.rotation_euler.x)
+    if phi != 0:
+        f.write(f"\tVEH_PHI {round(phi, 2)}\n")
+    theta = math.degrees(obj.rotation_euler.y)
+    if theta != 0:
+        f.write(f"\tVEH_THETA {round(theta, 2)}\n")
+    psi = math.degrees(obj.rotation_euler.z)
+    if psi != 0:
+        f.write(f"\tVEH_PSI {round(psi, 2)}\n")
+    f.write(f"\tPARAM_DREF_IDX {sound.event_param_idx}\n")
+    if sound.event_polyphonic:
+        f.write(f"\tEVENT_POLYPHONIC\n")
+    if sound.event_allowed_for_ai:
+        f.write(f"\tEVENT_ALLOWED_FOR_AI\n")
+    legacy_events(f, sound.event_list)
+    if sound.event_auto_end_from_start_cond == True:
+        f.write("\tEVENT_AUTO_END_FROM_START_COND\n")
+    f.write("END_SOUND_ATTACHMENT\n\n")
+
+
+def legacy_snapshot_attachment(f, obj, snapshot):
+    f.write(f"# XPSounds -> {obj.name} -> {snapshot.name}\n")
+    f.write("BEGIN_SOUND_ATTACHMENT\n")
+    f.write(f"\tSNAPSHOT_NAME {snapshot.guid}\n")
+    f.write(f"\tPARAM_DREF_IDX {snapshot.event_param_idx}\n")
+    legacy_events(f, snapshot.event_list)
+    if snapshot.event_auto_end_from_start_cond == True:
+        f.write("\tEVENT_AUTO_END_FROM_START_COND\n")
+    f.write("END_SOUND_ATTACHMENT\n\n")
+
+
+def legacy_events(f, event_list):
+    for event in event_list:
+        comparison_value = round(event.comparison_value, 4)
+        if event.event_type == "START":
+            f.write(f"\tEVENT_START_COND {event.dataref_name} {event.comparison_operator} {comparison_value}\n")
+        elif event.event_type == "END":
+            f.write(f"\tEVENT_END_COND {event.dataref_name} {event.comparison_operator} {comparison_value}\n")
+        elif event.event_type == "ALWAYS":
+            f.write(f"\tEVENT_ALWAYS {event.dataref_name}\n")
+        elif event.event_type.startswith("CMND"):
+            f.write(f"\tEVENT_COMMAND {event.event_type}\n")
+
+
+def legacy_sound_space(f, obj):
+    f.write(f"# XPSounds -> {obj.name}\n")
+    f.write("BEGIN_SOUND_SPACE\n")
+    f.write(f"\tSOUND_INDEX {obj.space_index}\n")
+    f.write(f"\tBLEND_DEPTH {obj.space_blend_depth}\n")
+    if obj.empty_display_type == "CUBE":
+        minx = obj.location.x - obj.empty_display_size * obj.scale.x
+        miny = obj.location.z - obj.empty_display_size * obj.scale.z
+        minz = -obj.location.y - obj.empty_display_size * obj.scale.y
+        maxx = obj.location.x + obj.empty_display_size * obj.scale.x
+        maxy = obj.location.z + obj.empty_display_size * obj.scale.z
+        maxz = -obj.location.y + obj.empty_display_size * obj.scale.y
+        f.write(f"\tAABB {round(minx, 4)} {round(miny, 4)} {round(minz, 4)} {round(maxx, 4)} {round(maxy, 4)} {round(maxz, 4)}\n")
+    if obj.empty_display_type == "SPHERE":
+        f.write(f"\tSPHERE {round(obj.location.x, 4)} {round(obj.location.z, 4)} {round(obj.location.y, 4)} {obj.empty_display_size}\n")
+    f.write("END_SOUND_SPACE\n\n")
+
+
+def legacy_export(path, scene):
+    objects, snapshots, spaces = scene
+    with open(path, "w") as f:
+        f.write("A\n1000\nACF_SOUNDS\n\n")
+        f.write(f"REF_POINT_ACF 0.0 0.0 \n\n")
+        soundsIO = io.StringIO()
+        snapshotsIO = io.StringIO()
+        spacesIO = io.StringIO()
+        for space in spaces:
+            legacy_sound_space(spacesIO, space)
+        for snapshot in snapshots:
+            legacy_snapshot_attachment(snapshotsIO, SimpleNamespace(name="All Snapshots"), snapshot)
+        for obj in objects:
+            for sound in obj.xp_sound_list:
+                legacy_sound_attachment(soundsIO, obj, sound)
+        if spacesIO.getvalue() != "":
+            f.write("############## \n### SPACES ### \n############## \n\n")
+            f.write(spacesIO.getvalue())
+        if snapshotsIO.getvalue() != "":
+            f.write("################# \n### SNAPSHOTS ### \n################# \n\n")
+            f.write(snapshotsIO.getvalue())
+        if soundsIO.getvalue() != "":
+            f.write("############## \n### SOUNDS ### \n############## \n\n")
+            f.write(soundsIO.getvalue())
+        f.write(f"### Generated by bench -> Version:(0, 0, 0)\n\n")
+
+
+def serializer_export(path, scene):
+    objects, snapshots, spaces = scene
+    sections = {'SPACE': [], 'SNAPSHOT': [], 'SOUND': []}
+    for space in spaces:
+        sections['SPACE'].append(format_sound_space(f"XPSounds -> {space.name}", space.space_index, space.space_blend_depth,
+                                                    space.empty_display_type, space.location, space.scale, space.empty_display_size))
+    for snapshot in snapshots:
+        sections['SNAPSHOT'].append(format_snapshot_attachment("XPSounds -> All Snapshots", snapshot))
+    for obj in objects:
+        comment = f"XPSounds -> {obj.name}"
+        transform = format_transform(obj.location, obj.rotation_euler)
+        for sound in obj.xp_sound_list:
+            sections['SOUND'].append(format_sound_attachment(comment, transform, sound))
+    with open(path, "w") as f:
+        write_sections(f, format_header(0.0, 0.0, False), sections, format_footer("bench", (0, 0, 0)))
+
+
+def measure(function, path, scene, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(path, scene)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    function(path, scene)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the .snd serializer against the StringIO exporter")
+    parser.add_argument("--attachments", type=int, default=10000)
+    parser.add_argument("--events", type=int, default=4)
+    parser.add_argument("--sounds-per-object", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    scene = make_scene(args.attachments, args.events, args.sounds_per_object)
+    with tempfile.TemporaryDirectory() as directory:
+        legacy_path = os.path.join(directory, "legacy.snd")
+        serializer_path = os.path.join(directory, "serializer.snd")
+        legacy_time, legacy_peak = measure(legacy_export, legacy_path, scene, args.repeat)
+        serializer_time, serializer_peak = measure(serializer_export, serializer_path, scene, args.repeat)
+        with open(legacy_path) as a, open(serializer_path) as b:
+            identical = a.read() == b.read()
+        size = os.path.getsize(serializer_path)
+
+    print(f"{args.attachments} attachments, {args.events} events each, {size / 1024:.0f} KiB output")
+    print(f"legacy StringIO : {legacy_time * 1000:8.1f} ms  peak {legacy_peak / 1024:8.0f} KiB")
+    print(f"serializer      : {serializer_time * 1000:8.1f} ms  peak {serializer_peak / 1024:8.0f} KiB")
+    print(f"speedup {legacy_time / serializer_time:.2f}x, identical output: {identical}")
+    return 0 if identical else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# Synthetic workload generator for the benchmarks.
+#
+# Writes .snd files with N attachments of M events each plus K spaces, and
+# GUIDS.txt files with G events. Runs with plain Python:
+#     python benchmarks/generate.py --attachments 5000 --events 4 --spaces 20 --guids 5000 out/
+
+import argparse
+import os
+import random
+import uuid
+
+COMPARISON_OPERATORS = ("<", "<=", "==", "!=", ">=", ">")
+
+
+def write_events(f, rng, events):
+    for i in range(events):
+        kind = rng.random()
+        dataref = f"sim/cockpit2/engine/indicators/N1_percent[{rng.randrange(8)}]"
+        if kind < 0.1:
+            f.write(f"\tEVENT_ALWAYS {dataref}\n")
+        else:
+            keyword = "EVENT_START_COND" if i % 2 == 0 else "EVENT_END_COND"
+            f.write(f"\t{keyword} {dataref} {rng.choice(COMPARISON_OPERATORS)} {round(rng.uniform(-100, 100), 4)}\n")
+
+
+def generate_snd(path, attachments, events, spaces, seed=1, shared_positions=3):
+    "Writes a .snd file, about one in shared_positions sounds share position and GUID path with another."
+    rng = random.Random(seed)
+    positions = [(round(rng.uniform(-20, 20), 4), round(rng.uniform(-5, 5), 4), round(rng.uniform(-20, 20), 4))
+                 for _ in range(max(1, attachments // shared_positions))]
+    with open(path, "w") as f:
+        f.write("A\n1000\nACF_SOUNDS\n\nREF_POINT_ACF 0.0 0.0 \n\n")
+        for i in range(spaces):
+            f.write(f"BEGIN_SOUND_SPACE\n\tSOUND_INDEX {i % 64}\n\tBLEND_DEPTH {round(rng.uniform(0, 1), 2)}\n")
+            x, y, z = rng.uniform(-20, 20), rng.uniform(-5, 5), rng.uniform(-20, 20)
+            if i % 2:
+                f.write(f"\tSPHERE {x:.4f} {y:.4f} {z:.4f} {rng.uniform(1, 5):.4f}\n")
+            else:
+                sx, sy, sz = rng.uniform(1, 5), rng.uniform(1, 3), rng.uniform(1, 5)
+                f.write(f"\tAABB {x - sx:.4f} {y - sy:.4f} {z - sz:.4f} {x + sx:.4f} {y + sy:.4f} {z + sz:.4f}\n")
+            f.write("END_SOUND_SPACE\n\n")
+
+        for i in range(attachments):
+            slot = rng.randrange(len(positions))
+            f.write("BEGIN_SOUND_ATTACHMENT\n")
+            if i % 100 == 99:
+                f.write(f"\tSNAPSHOT_NAME /snapshots/snapshot_{i}\n")
+            else:
+                x, y, z = positions[slot]
+                f.write(f"\tEVENT_NAME /systems/group_{slot}/sound_{i}\n\tVEH_XYZ {x} {y} {z}\n")
+                if slot % 4 == 0:
+                    f.write(f"\tVEH_PSI {(slot * 7) % 360}\n")
+            f.write(f"\tPARAM_DREF_IDX {i % 4}\n")
+            write_events(f, rng, events)
+            f.write("END_SOUND_ATTACHMENT\n\n")
+
+
+def generate_guids(path, guids, seed=1):
+    "Writes a GUIDS.txt with guids events and one snapshot per 50 events."
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        for i in range(guids):
+            f.write(f"{{{uuid.UUID(int=rng.getrandbits(128))}}} event:/folder_{i % 50}/sub_{i % 7}/event_{i}\n")
+        for i in range(guids // 50):
+            f.write(f"{{{uuid.UUID(int=rng.getrandbits(128))}}} snapshot:/snapshots/snapshot_{i}\n")
+        f.write(f"{{{uuid.UUID(int=rng.getrandbits(128))}}} bank:/Master\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic .snd and GUIDS.txt files")
+    parser.add_argument("directory")
+    parser.add_argument("--attachments", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=4)
+    parser.add_argument("--spaces", type=int, default=20)
+    parser.add_argument("--guids", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    os.makedirs(args.directory, exist_ok=True)
+    generate_snd(os.path.join(args.directory, "synthetic.snd"), args.attachments, args.events, args.spaces, args.seed)
+    generate_guids(os.path.join(args.directory, "GUIDS.txt"), args.guids, args.seed)
+
+
+if __name__ == "__main__":
+    main()
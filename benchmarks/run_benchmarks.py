@@ -0,0 +1,153 @@
+# Benchmark suite for XPSound.
+#
+# Inside Blender it times import (grouped and ungrouped), export (full and
+# incremental), GUID refresh (cold and warm) and overlay batch building:
+#     blender --background --factory-startup --addons xpsound --python benchmarks/run_benchmarks.py -- \
+#         --attachments 1000,5000 --events 4 --spaces 20 --guids 5000 --output results.json
+#
+# With plain Python only the bpy-free stages (parsing, serializing, GUID
+# catalog) are timed. Results are written as JSON for comparing versions.
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+import xpsound
+from xpsound.xpsound_parser import parse_snd_file
+from xpsound.xpsound_guids import load_guid_catalog, clear_guid_catalogs
+from generate import generate_snd, generate_guids
+import bench_export
+
+
+def timed(function, repeat=1, setup=None):
+    "Returns the best wall time of function over repeat runs, setup runs untimed before each."
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_parse(snd_path):
+    def parse():
+        for _ in parse_snd_file(snd_path):
+            pass
+    return parse
+
+
+def bench_guid_catalog(guids_path):
+    return lambda: load_guid_catalog(guids_path)
+
+
+def bench_serializer(attachments, events):
+    scene = bench_export.make_scene(attachments, events, 3)
+    path = os.path.join(tempfile.gettempdir(), "xpsound_bench_serializer.snd")
+    return lambda: bench_export.serializer_export(path, scene)
+
+
+def reset_scene():
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj)
+    for collection in list(bpy.data.collections):
+        bpy.data.collections.remove(collection)
+
+
+def blender_benchmarks(workdir, snd_path, guids_path, repeat, record):
+    "Times the stages that need Blender, record(name, seconds) stores each result."
+    from xpsound import xpsound_export, xpsound_helper
+
+    for group in (False, True):
+        name = "import_grouped" if group else "import_ungrouped"
+        record(name, timed(lambda: bpy.ops.xpsound.import_snd(filepath=snd_path, group_by_position=group),
+                           repeat, reset_scene))
+
+    # The scene now holds the last (grouped) import
+    export_path = os.path.join(workdir, "export.snd")
+    record("export_full", timed(lambda: bpy.ops.xpsound.export_snd(filepath=export_path),
+                                repeat, xpsound_export.clear_export_cache))
+    bpy.ops.xpsound.export_snd(filepath=export_path)
+    record("export_incremental", timed(lambda: bpy.ops.xpsound.export_snd(filepath=export_path), repeat))
+
+    xp_global = bpy.context.scene.xp_sound_global
+    xp_global.fmod_path = workdir
+
+    def cold_guids():
+        clear_guid_catalogs()
+        bpy.context.window_manager.xp_sound_catalog.catalog_key = ""
+    record("guid_refresh_cold", timed(bpy.ops.object.xp_sound_refresh_parsed_events, repeat, cold_guids))
+    record("guid_refresh_warm", timed(bpy.ops.object.xp_sound_refresh_parsed_events, repeat))
+
+    scene = bpy.context.scene
+    record("overlay_emitters_coords", timed(lambda: xpsound_helper.emitters_coords(scene), repeat))
+    record("overlay_spaces_coords", timed(lambda: xpsound_helper.spaces_coords(scene), repeat))
+    if not bpy.app.background:
+        xpsound_helper.ensure_shaders()
+        record("overlay_emitters_batch", timed(lambda: xpsound_helper.build_emitters_batch(scene), repeat))
+        record("overlay_spaces_batch", timed(lambda: xpsound_helper.build_spaces_batch(scene), repeat))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="run_benchmarks", description="Time XPSound on synthetic workloads")
+    parser.add_argument("--attachments", default="1000,5000", help="Comma separated attachment counts (N)")
+    parser.add_argument("--events", type=int, default=4, help="Events per attachment (M)")
+    parser.add_argument("--spaces", type=int, default=20, help="Number of spaces (K)")
+    parser.add_argument("--guids", type=int, default=5000, help="Number of GUIDS.txt events (G)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, the best one is kept")
+    parser.add_argument("--output", default="bench_results.json", help="JSON results file")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        guids_path = os.path.join(workdir, "GUIDS.txt")
+        generate_guids(guids_path, args.guids)
+
+        for attachments in (int(count) for count in args.attachments.split(",")):
+            snd_path = os.path.join(workdir, f"synthetic_{attachments}.snd")
+            generate_snd(snd_path, attachments, args.events, args.spaces)
+
+            def record(name, seconds):
+                results.append({"name": name, "attachments": attachments, "events": args.events,
+                                "spaces": args.spaces, "guids": args.guids, "seconds": seconds})
+                print(f"{name:<28} N={attachments:<7} {seconds * 1000:10.2f} ms", flush=True)
+
+            record("parse", timed(bench_parse(snd_path), args.repeat))
+            record("serialize", timed(bench_serializer(attachments, args.events), args.repeat))
+            record("guid_catalog_parse", timed(bench_guid_catalog(guids_path), args.repeat, clear_guid_catalogs))
+            if bpy is not None:
+                blender_benchmarks(workdir, snd_path, guids_path, args.repeat, record)
+
+    report = {
+        "xpsound_version": list(xpsound.bl_info["version"]),
+        "blender": bpy.app.version_string if bpy is not None else None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    if bpy is not None:
+        main(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else [])
+    else:
+        main(sys.argv[1:])
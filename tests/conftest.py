@@ -0,0 +1,7 @@
+# The bpy-free modules of the addon are tested with plain Python, make the
+# package importable when pytest runs from any directory.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,60 @@
+# Clustering of duplicate sounds against a brute-force greedy scan.
+
+import math
+import random
+
+from xpsound.xpsound_cluster import cluster_points, find_clusters
+from xpsound.xpsound_model import EmitterModel, EventModel, SoundModel
+
+
+def brute_clusters(points, tolerance):
+    assigned = [False] * len(points)
+    clusters = []
+    for k, point in enumerate(points):
+        if assigned[k]:
+            continue
+        cluster = [j for j, other in enumerate(points) if not assigned[j] and math.dist(point, other) <= tolerance]
+        for j in cluster:
+            assigned[j] = True
+        clusters.append(cluster)
+    return clusters
+
+
+def normalized(clusters):
+    # The first point of a cluster is the kept one, the order of the others doesn't matter
+    return [(cluster[0], sorted(cluster)) for cluster in clusters]
+
+
+def test_cluster_points_matches_brute_force():
+    rng = random.Random(2)
+    for tolerance in (0.01, 0.05, 0.3):
+        # Points packed around a few centers so clusters straddle cell boundaries
+        centers = [tuple(rng.uniform(-1, 1) for _ in range(3)) for _ in range(40)]
+        points = [tuple(c + rng.uniform(-tolerance, tolerance) for c in rng.choice(centers)) for _ in range(1500)]
+        assert normalized(cluster_points(points, tolerance)) == normalized(brute_clusters(points, tolerance))
+
+
+def test_cluster_points_zero_tolerance():
+    points = [(0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (0.0, 0.0, 0.0), (1.0, 0.0, 0.0000001)]
+    assert cluster_points(points, 0.0) == [[0, 2], [1], [3]]
+
+
+def emitter(name, location, guid, rotation=(0.0, 0.0, 0.0), dataref="sim/test"):
+    model = EmitterModel(name, event_type='SOUND')
+    model.location = location
+    model.rotation = rotation
+    model.sounds.append(SoundModel(name, guid, event_list=[EventModel('START', dataref, '>', 0.0)]))
+    return model
+
+
+def test_find_clusters_groups_by_everything_but_the_position():
+    emitters = [
+        emitter("A", (0.0, 0.0, 0.0), "/a"),
+        emitter("B", (0.0005, 0.0, 0.0), "/a"),
+        emitter("C", (0.0005, 0.0, 0.0), "/b"),
+        emitter("D", (0.0, 0.0, 0.0), "/a", rotation=(0.0, 0.0, 1.0)),
+        emitter("E", (0.0, 0.0, 0.0), "/a", dataref="sim/other"),
+        emitter("F", (0.5, 0.0, 0.0), "/a"),
+    ]
+    clusters = find_clusters(emitters, 0.001)
+    assert [(cluster.kept, cluster.merged) for cluster in clusters] == [((0, 0), [(1, 0)])]
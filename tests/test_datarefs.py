@@ -0,0 +1,64 @@
+# DataRefs.txt parsing, validation and DatarefIndex search against brute-force scans.
+
+import random
+
+from xpsound.xpsound_datarefs import DatarefIndex, DatarefInfo, load_dataref_index, clear_dataref_catalogs, parse_datarefs
+
+DATAREFS_TXT = (
+    "2\t1200\tbuilt on ...\n"
+    "sim/cockpit2/engine/actuators/throttle_ratio\tfloat[8]\ty\tratio\tThrottle\n"
+    "sim/flightmodel/position/true_airspeed\tfloat\tn\tm/s\n"
+    "sim/graphics/view/view_is_external\tint\tn\tboolean\n"
+)
+
+
+def test_parse_and_validate():
+    index = DatarefIndex((), parse_datarefs(DATAREFS_TXT.splitlines(True)) + parse_datarefs(["my/plugin/value\n"]))
+    assert len(index) == 4
+    assert index.get("sim/cockpit2/engine/actuators/throttle_ratio").writable
+    assert index.is_valid("sim/cockpit2/engine/actuators/throttle_ratio[7]")
+    assert not index.is_valid("sim/cockpit2/engine/actuators/throttle_ratio[8]")
+    assert not index.is_valid("sim/flightmodel/position/true_airspeed[0]")
+    # Custom lists don't declare array sizes
+    assert index.is_valid("my/plugin/value[12]")
+    assert not index.is_valid("sim/unknown")
+
+
+def test_load_with_cache_dir(tmp_path):
+    path = str(tmp_path / "DataRefs.txt")
+    with open(path, "w") as f:
+        f.write(DATAREFS_TXT)
+    clear_dataref_catalogs()
+    index = load_dataref_index([path, str(tmp_path / "missing.txt")], str(tmp_path / "cache"))
+    assert len(index) == 3
+    # A new session reads the cached entries
+    clear_dataref_catalogs()
+    cached = load_dataref_index([path], str(tmp_path / "cache"))
+    assert cached is not index and sorted(cached.entries) == sorted(index.entries)
+    assert load_dataref_index([str(tmp_path / "missing.txt")]) is None
+    clear_dataref_catalogs()
+
+
+def brute_search(names, text, limit):
+    "Prefix matches in name order, then substring matches of 3 or more characters."
+    text = text.strip().lower()
+    if text.endswith("]") and "[" in text:
+        text = text[:text.rindex("[")]
+    ordered = sorted(names, key=str.lower)
+    if not text:
+        return ordered[:limit]
+    prefix = [name for name in ordered if name.lower().startswith(text)]
+    if len(prefix) >= limit or len(text) < 3:
+        return prefix[:limit]
+    substring = [name for name in ordered if text in name.lower() and not name.lower().startswith(text)]
+    return (prefix + substring)[:limit]
+
+
+def test_search_matches_brute_force():
+    rng = random.Random(31)
+    parts = ("sim", "cockpit2", "engine", "Indicators", "n1_percent", "fuel", "gear", "deploy_ratio", "view")
+    names = {"/".join(rng.choice(parts) for _ in range(rng.randrange(2, 5))) + str(rng.randrange(5)) for _ in range(3000)}
+    index = DatarefIndex((), [DatarefInfo(name) for name in names])
+    for text in ("", "s", "sim/", "SIM/COCKPIT2", "n1_percent", "gear/deploy", "dicat", "  fuel[3] ", "xyz"):
+        for limit in (1, 10, 100, 10000):
+            assert index.search(text, limit) == brute_search(names, text, limit)
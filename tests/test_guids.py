@@ -0,0 +1,91 @@
+# GUIDS.txt parsing and GuidIndex search and browsing against brute-force scans.
+
+import random
+
+from xpsound.xpsound_guids import FUZZY_SEARCH_RESULTS, GuidIndex, load_guid_catalog, clear_guid_catalogs, parse_guids, word_rank
+
+GUIDS = (
+    "{6d0b1f1e-0000-0000-0000-000000000001} bank:/Master\n"
+    "{6d0b1f1e-0000-0000-0000-000000000002} event:/engines/starter\n"
+    "{6d0b1f1e-0000-0000-0000-000000000003} event:/engines/idle   loop\n"
+    "{6d0b1f1e-0000-0000-0000-000000000004} snapshot:/cockpit\n"
+    "\n"
+)
+
+
+def test_parse_guids():
+    events, snapshots = parse_guids(GUIDS.splitlines(True))
+    assert events == ["/engines/starter", "/engines/idle loop"]
+    assert snapshots == ["/cockpit"]
+
+
+def test_catalog_is_cached_until_the_file_changes(tmp_path):
+    path = str(tmp_path / "GUIDS.txt")
+    with open(path, "w") as f:
+        f.write(GUIDS)
+    clear_guid_catalogs()
+    catalog = load_guid_catalog(path)
+    assert load_guid_catalog(path) is catalog
+    with open(path, "a") as f:
+        f.write("{6d0b1f1e-0000-0000-0000-000000000005} event:/gear/horn\n")
+    assert load_guid_catalog(path).events[-1] == "/gear/horn"
+    clear_guid_catalogs()
+
+
+def random_paths(rng, count):
+    folders = ("engines", "gear", "environment", "cockpit", "warnings")
+    words = ("starter", "idle", "spool", "horn", "wind", "rain", "click", "alarm", "fuel_pump")
+    return [f"/{rng.choice(folders)}/{rng.choice(folders)}/{rng.choice(words)}_{i}" for i in range(count)]
+
+
+def brute_search(paths, text, limit):
+    "Ranks every path with word_rank, substring matches first and fuzzy ones only for few, without the trigram candidates."
+    words = text.lower().replace("/", " ").split()
+    ordered = sorted(set(paths), key=str.lower)
+    if not words:
+        return ordered[:limit]
+    tiers = ([], [])
+    for path in ordered:
+        lower = path.lower()
+        segments = lower.strip("/").split("/")
+        for tier, fuzzy in enumerate((False, True)):
+            ranks = [word_rank(word, lower, segments, fuzzy) for word in words]
+            if None not in ranks:
+                tiers[tier].append((sum(ranks), len(lower), lower, path))
+                break
+    found = sorted(tiers[0])
+    if len(found) < min(limit, FUZZY_SEARCH_RESULTS):
+        found += sorted(tiers[1])
+    return [path for *_, path in found[:limit]]
+
+
+def test_search_matches_brute_force():
+    rng = random.Random(23)
+    paths = random_paths(rng, 1500)
+    index = GuidIndex(paths)
+    for text in ("", "st", "idle", "gear horn", "ENG/idle", "spool_1", "fpmp", "wrn alm", "zzz", "cockpit/cockpit"):
+        for limit in (5, 100, 5000):
+            assert index.search(text, limit) == brute_search(paths, text, limit)
+
+
+def test_search_while_typing_matches_brute_force():
+    rng = random.Random(37)
+    paths = random_paths(rng, 1500)
+    index = GuidIndex(paths)
+    # Each search narrows the fuzzy scan of the one before, a deleted character starts over
+    for text in ("f", "fp", "fpm", "fpmp", "fpmp w", "fpmp wr", "fpm", "ck", "ckl", "cklk", "zq", "zqx"):
+        assert index.search(text) == brute_search(paths, text, 100)
+
+
+def test_browse_lists_every_path_once():
+    rng = random.Random(29)
+    paths = random_paths(rng, 500)
+    index = GuidIndex(paths)
+    found = []
+    pending = ["/"]
+    while pending:
+        subfolders, items = index.browse(pending.pop())
+        pending.extend(subfolders)
+        found.extend(items)
+    assert sorted(found) == sorted(set(paths))
+    assert index.browse("/missing/") == ((), [])
@@ -0,0 +1,88 @@
+# ItemIndex and ListIndex against brute-force scans of the items.
+
+import random
+
+from xpsound.xpsound_model import EmitterModel, EventModel, SnapshotModel, SoundModel
+from xpsound.xpsound_query import ItemIndex, ListIndex, fuzzy_match
+
+DATAREFS = [f"sim/test/dataref_{i}" for i in range(8)]
+TEMPLATES = {f"Template {i}": [EventModel('START', dataref, '>', 0.0)] for i, dataref in enumerate(DATAREFS[:3])}
+
+
+def random_item(rng, cls, i):
+    guid = f"/{rng.choice(('engines', 'gear', 'env'))}/{rng.choice(('a', 'b', 'ab'))}/item_{i}" if rng.random() < 0.9 else ""
+    events = [EventModel('START', rng.choice(DATAREFS), '>', 0.0) for _ in range(rng.randrange(3))]
+    return cls(f"Item {i}", guid, event_list=events, template=rng.choice(["", ""] + list(TEMPLATES)))
+
+
+def random_emitters(rng, count):
+    emitters = []
+    for i in range(count):
+        emitter = EmitterModel(f"Empty {i}", event_type=rng.choice(('SOUND', 'SNAPSHOT')))
+        emitter.sounds = [random_item(rng, SoundModel, j) for j in range(rng.randrange(4))]
+        emitter.snapshots = [random_item(rng, SnapshotModel, j) for j in range(rng.randrange(2))]
+        emitters.append(emitter)
+    return emitters
+
+
+def brute_query(emitters, guid_prefix, dataref, kinds, objects):
+    results = []
+    for emitter in emitters:
+        for kind, items in (('SOUND', emitter.sounds), ('SNAPSHOT', emitter.snapshots)):
+            for i, item in enumerate(items):
+                datarefs = {event.dataref_name for event in item.event_list + TEMPLATES.get(item.template, [])}
+                if kind in kinds and (objects is None or emitter.name in objects) and item.guid.startswith(guid_prefix) \
+                        and (not dataref or dataref in datarefs):
+                    results.append((emitter.name, kind, i))
+    return sorted(results)
+
+
+def test_item_index_matches_brute_force():
+    rng = random.Random(13)
+    emitters = random_emitters(rng, 300)
+    index = ItemIndex(emitters, TEMPLATES)
+    objects = {f"Empty {i}" for i in rng.sample(range(300), 50)}
+    for guid_prefix in ("", "/", "/engines/", "/gear/a", "/env/ab/", "/missing"):
+        for dataref in ("", DATAREFS[0], DATAREFS[5], "sim/unknown"):
+            for kinds in (('SOUND',), ('SNAPSHOT',), ('SOUND', 'SNAPSHOT')):
+                for scope in (None, objects):
+                    assert index.query(guid_prefix, dataref, kinds, scope) == \
+                        brute_query(emitters, guid_prefix, dataref, kinds, scope)
+
+
+def test_list_index_orders_match_sorted():
+    rng = random.Random(17)
+    names = [rng.choice(("Engine", "gear", "Wind", "alarm")) + str(rng.randrange(20)) for _ in range(200)]
+    guids = [rng.choice(("", "/a/x", "/B/y", "/c/Z")) for _ in range(200)]
+    counts = [rng.randrange(5) for _ in range(200)]
+    index = ListIndex(names, guids, counts)
+    keys = {
+        'NAME': lambda i: (names[i].lower(), i),
+        'GUID': lambda i: (guids[i].lower(), i),
+        'EVENTS': lambda i: (counts[i], names[i].lower(), i),
+    }
+    for sort_by, key in keys.items():
+        for reverse in (False, True):
+            order = index.order(sort_by, reverse)
+            by_position = sorted(range(200), key=lambda i: order[i])
+            assert by_position == sorted(range(200), key=key, reverse=reverse)
+    assert index.order('NONE') == []
+
+
+def test_list_index_matches_brute_force():
+    rng = random.Random(19)
+    names = ["".join(rng.choice("abcde") for _ in range(6)) for _ in range(300)]
+    guids = ["/" + "".join(rng.choice("abcxyz/") for _ in range(8)) if rng.random() < 0.8 else "" for _ in range(300)]
+    index = ListIndex(names, guids, [0] * 300)
+    for text in ("", "a", "AB", "ace", "x/y", "zzz"):
+        for missing_only in (False, True):
+            expected = []
+            for name, guid in zip(names, guids):
+                if missing_only and guid:
+                    expected.append(False)
+                else:
+                    lower = text.lower()
+                    expected.append(not lower or fuzzy_match(lower, name) or fuzzy_match(lower, guid.lower()))
+            assert index.matches(text, missing_only) == expected
+            # Cached result of the same filter
+            assert index.matches(text, missing_only) == expected
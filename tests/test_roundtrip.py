@@ -0,0 +1,186 @@
+# Parsing a .snd file and serializing its records again gives the same bytes.
+
+import math
+import random
+
+from xpsound.xpsound_parser import SndAttachment, SndEvent, SndSpace, iter_snd_records, parse_snd_file
+from xpsound.xpsound_serializer import (format_header, format_footer, format_transform, format_sound_attachment,
+                                        format_snapshot_attachment, format_sound_space, write_sections)
+
+PLUGIN = ("XPSound", (0, 9, 0))
+
+SAMPLE = (
+    "A\n1000\nACF_SOUNDS\n\n"
+    "DISABLE_LEGACY_ALERT_SOUNDS \n"
+    "REF_POINT_ACF 0.5 -1.25 \n\n"
+    "############## \n### SPACES ### \n############## \n\n"
+    "# Space\n"
+    "BEGIN_SOUND_SPACE\n"
+    "\tSOUND_INDEX 0\n"
+    "\tBLEND_DEPTH 0.5\n"
+    "\tAABB -2.0 -1.0 -3.5 2.0 1.5 3.5\n"
+    "END_SOUND_SPACE\n\n"
+    "# Space\n"
+    "BEGIN_SOUND_SPACE\n"
+    "\tSOUND_INDEX 1\n"
+    "\tBLEND_DEPTH 0.0\n"
+    "\tSPHERE 0.0 1.2 -4.0 2.5\n"
+    "END_SOUND_SPACE\n\n"
+    "################# \n### SNAPSHOTS ### \n################# \n\n"
+    "# Snapshot -> cockpit\n"
+    "BEGIN_SOUND_ATTACHMENT\n"
+    "\tSNAPSHOT_NAME /snapshots/cockpit\n"
+    "\tPARAM_DREF_IDX 0\n"
+    "\tEVENT_START_COND sim/graphics/view/view_is_external == 0.0\n"
+    "\tEVENT_AUTO_END_FROM_START_COND\n"
+    "END_SOUND_ATTACHMENT\n\n"
+    "############## \n### SOUNDS ### \n############## \n\n"
+    "# Sound -> starter\n"
+    "BEGIN_SOUND_ATTACHMENT\n"
+    "\tEVENT_NAME /engines/starter\n"
+    "\tVEH_XYZ 1.5 0.25 -3.125\n"
+    "\tVEH_PSI 90.0\n"
+    "\tPARAM_DREF_IDX 2\n"
+    "\tEVENT_POLYPHONIC\n"
+    "\tEVENT_START_COND sim/cockpit2/engine/actuators/starter_hit[0] == 1.0\n"
+    "\tEVENT_END_COND sim/cockpit2/engine/actuators/starter_hit[0] == 0.0\n"
+    "END_SOUND_ATTACHMENT\n\n"
+    "# Sound -> wind\n"
+    "BEGIN_SOUND_ATTACHMENT\n"
+    "\tEVENT_NAME /environment/wind\n"
+    "\tVEH_XYZ 0.0 0.0 0.0\n"
+    "\tVEH_PHI -12.5\n"
+    "\tVEH_THETA 4.25\n"
+    "\tPARAM_DREF_IDX 0\n"
+    "\tEVENT_ALLOWED_FOR_AI\n"
+    "\tEVENT_ALWAYS sim/flightmodel/position/true_airspeed\n"
+    "END_SOUND_ATTACHMENT\n\n"
+    "### Generated by XPSound -> Version:(0, 9, 0)\n\n"
+)
+
+
+class Item:
+    "Sound or snapshot with the attributes of the property groups the serializer reads."
+
+    def __init__(self, record):
+        self.name = record.guid.split('/')[-1]
+        self.guid = record.guid
+        self.event_param_idx = record.param_idx
+        self.event_polyphonic = record.polyphonic
+        self.event_allowed_for_ai = record.allowed_for_ai
+        self.event_auto_end_from_start_cond = record.auto_end_from_start_cond
+        # Parsed events have the attribute names of XP_SOUND_EventItem
+        self.event_list = record.events
+
+
+def format_record_space(record):
+    "Formats a parsed space from the transform of the empty the importer would create."
+    if record.shape == 'AABB':
+        minx, miny, minz, maxx, maxy, maxz = record.values
+        location = ((minx + maxx) / 2, -(minz + maxz) / 2, (miny + maxy) / 2)
+        scale = ((maxx - minx) / 2, (maxz - minz) / 2, (maxy - miny) / 2)
+        return format_sound_space("Space", record.space_index, record.blend_depth, 'CUBE', location, scale, 1.0)
+    x, y, z, radius = record.values
+    return format_sound_space("Space", record.space_index, record.blend_depth, 'SPHERE', (x, z, y), (1.0, 1.0, 1.0), radius)
+
+
+def serialize(records, f):
+    "Writes records the way the exporter lays out a file."
+    ref_point = (0.0, 0.0)
+    disable_legacy_alerts = False
+    sections = {'SPACE': [], 'SNAPSHOT': [], 'SOUND': []}
+    for record in records:
+        if record.type == 'DIRECTIVE':
+            if record.keyword == 'REF_POINT_ACF':
+                ref_point = (float(record.args[0]), float(record.args[1]))
+            elif record.keyword == 'DISABLE_LEGACY_ALERT_SOUNDS':
+                disable_legacy_alerts = True
+        elif record.type == 'SPACE':
+            sections['SPACE'].append(format_record_space(record))
+        elif record.type == 'SNAPSHOT':
+            sections['SNAPSHOT'].append(format_snapshot_attachment("Snapshot", Item(record)))
+        else:
+            # Blender location and rotation of the empty, the serializer converts them back
+            x, y, z = record.position
+            rotation = (math.radians(record.phi), math.radians(record.theta), math.radians(record.psi))
+            sections['SOUND'].append(format_sound_attachment("Sound", format_transform((x, -z, y), rotation), Item(record)))
+    write_sections(f, format_header(*ref_point, disable_legacy_alerts), sections, format_footer(*PLUGIN))
+
+
+def roundtrip(source, target):
+    with open(target, "w") as f:
+        serialize(parse_snd_file(source), f)
+
+
+def test_sample_roundtrip_is_byte_identical(tmp_path):
+    source = tmp_path / "sample.snd"
+    target = tmp_path / "roundtrip.snd"
+    with open(source, "w") as f:
+        f.write(SAMPLE)
+    roundtrip(source, target)
+    assert target.read_bytes() == source.read_bytes()
+
+
+def random_events(rng):
+    events = []
+    for i in range(rng.randrange(5)):
+        dataref = f"sim/test/dataref_{rng.randrange(10)}[{rng.randrange(4)}]"
+        if rng.random() < 0.2:
+            events.append(SndEvent('ALWAYS', dataref))
+        else:
+            operator = rng.choice(("<", "<=", "==", "!=", ">=", ">"))
+            events.append(SndEvent(rng.choice(('START', 'END')), dataref, operator, round(rng.uniform(-1000, 1000), 4)))
+    return events
+
+
+def random_records(rng, count):
+    records = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.1:
+            record = SndSpace()
+            record.space_index = rng.randrange(64)
+            record.blend_depth = round(rng.uniform(0, 2), 2)
+            if rng.random() < 0.5:
+                record.shape = 'AABB'
+                low = [round(rng.uniform(-50, 0), 4) for _ in range(3)]
+                record.values = tuple(low + [round(value + rng.uniform(0.1, 20), 4) for value in low])
+            else:
+                record.shape = 'SPHERE'
+                record.values = tuple(round(rng.uniform(-50, 50), 4) for _ in range(3)) + (round(rng.uniform(0.1, 10), 2),)
+        else:
+            record = SndAttachment()
+            record.guid = f"/group_{rng.randrange(20)}/sound_{i}"
+            record.param_idx = rng.randrange(8)
+            record.auto_end_from_start_cond = rng.random() < 0.3
+            record.events = random_events(rng)
+            if kind < 0.2:
+                record.type = 'SNAPSHOT'
+            else:
+                record.position = tuple(round(rng.uniform(-30, 30), 4) for _ in range(3))
+                record.phi, record.theta, record.psi = (rng.choice((0.0, round(rng.uniform(-180, 180), 2))) for _ in range(3))
+                record.polyphonic = rng.random() < 0.3
+                record.allowed_for_ai = rng.random() < 0.3
+        records.append(record)
+    return records
+
+
+def test_random_roundtrip_is_byte_identical(tmp_path):
+    rng = random.Random(7)
+    source = tmp_path / "random.snd"
+    target = tmp_path / "roundtrip.snd"
+    with open(source, "w") as f:
+        serialize(random_records(rng, 500), f)
+    roundtrip(source, target)
+    assert target.read_bytes() == source.read_bytes()
+
+
+def test_parse_keeps_every_record():
+    records = list(iter_snd_records(SAMPLE.splitlines(True)))
+    assert [record.type for record in records if record.type != 'DIRECTIVE'] == ['SPACE', 'SPACE', 'SNAPSHOT', 'SOUND', 'SOUND']
+    starter = records[-2]
+    assert starter.guid == "/engines/starter"
+    assert starter.position == (1.5, 0.25, -3.125)
+    assert starter.psi == 90.0
+    assert starter.polyphonic and not starter.allowed_for_ai
+    assert [event.event_type for event in starter.events] == ['START', 'END']
@@ -0,0 +1,54 @@
+# SpaceIndex against a brute-force check of every volume.
+
+import random
+
+from xpsound.xpsound_spaces import SpaceIndex, SpaceVolume, make_volume
+
+
+def random_volume(rng, name, large=False):
+    center = tuple(rng.uniform(-20, 20) for _ in range(3))
+    size = 40 if large else 4
+    if rng.random() < 0.5:
+        extent = tuple(rng.uniform(0.1, size) for _ in range(3))
+        return SpaceVolume(name, rng.randrange(4), rng.uniform(0, 2), 'AABB', center, extent)
+    return SpaceVolume(name, rng.randrange(4), rng.uniform(0, 2), 'SPHERE', center, rng.uniform(0.1, size))
+
+
+def brute_query(volumes, point):
+    hits = [(volume, volume.weight(point)) for volume in volumes.values() if volume.contains(point)]
+    hits.sort(key=lambda hit: (hit[0].space_index, hit[0].name))
+    return hits
+
+
+def test_space_index_matches_brute_force():
+    rng = random.Random(3)
+    index = SpaceIndex(cell_size=2.0)
+    volumes = {}
+    for i in range(200):
+        volume = random_volume(rng, f"Space {i}", large=i % 25 == 0)
+        index.update(i, volume)
+        volumes[i] = volume
+
+    # Moved and removed volumes must leave no stale cells behind
+    for i in rng.sample(range(200), 60):
+        if i % 2:
+            volume = random_volume(rng, f"Space {i}")
+            index.update(i, volume)
+            volumes[i] = volume
+        else:
+            index.remove(i)
+            del volumes[i]
+    assert len(index) == len(volumes)
+    assert index.large
+
+    for _ in range(2000):
+        point = tuple(rng.uniform(-45, 45) for _ in range(3))
+        assert index.query(point) == brute_query(volumes, point)
+
+
+def test_make_volume():
+    cube = make_volume("Cube", 1, 0.5, 'CUBE', (1.0, 2.0, 3.0), (2.0, -1.0, 0.5), 1.5)
+    assert cube.shape == 'AABB'
+    assert cube.extent == (3.0, 1.5, 0.75)
+    assert make_volume("Sphere", 0, 0.0, 'SPHERE', (0.0, 0.0, 0.0), (1.0, 1.0, 1.0), 2.0).extent == 2.0
+    assert make_volume("Axes", 0, 0.0, 'PLAIN_AXES', (0.0, 0.0, 0.0), (1.0, 1.0, 1.0), 1.0) is None
@@ -0,0 +1,33 @@
+# Sweeps of the export validation against brute-force checks of every pair.
+
+import random
+
+from xpsound.xpsound_spaces import SpaceVolume
+from xpsound.xpsound_validation import EmitterRecord, emitters_outside_spaces, overlapping_spaces
+
+
+def random_volume(rng, name):
+    center = tuple(rng.uniform(-20, 20) for _ in range(3))
+    size = 4
+    if rng.random() < 0.5:
+        extent = tuple(rng.uniform(0.1, size) for _ in range(3))
+        return SpaceVolume(name, rng.randrange(4), rng.uniform(0, 2), 'AABB', center, extent)
+    return SpaceVolume(name, rng.randrange(4), rng.uniform(0, 2), 'SPHERE', center, rng.uniform(0.1, size))
+
+
+def test_overlapping_spaces_matches_all_pairs():
+    rng = random.Random(5)
+    spaces = [random_volume(rng, f"Space {i}") for i in range(300)]
+    found = {frozenset((first.name, second.name)) for first, second in overlapping_spaces(spaces)}
+    expected = {frozenset((a.name, b.name)) for i, a in enumerate(spaces) for b in spaces[i + 1:] if a.overlaps(b)}
+    assert found == expected
+
+
+def test_emitters_outside_spaces_matches_brute_force():
+    rng = random.Random(11)
+    spaces = [random_volume(rng, f"Space {i}") for i in range(80)]
+    emitters = [EmitterRecord(f"Sound {i}", 'SOUND', tuple(rng.uniform(-25, 25) for _ in range(3)), [])
+                for i in range(2000)]
+    found = {emitter.name for emitter in emitters_outside_spaces(emitters, spaces)}
+    expected = {emitter.name for emitter in emitters if not any(space.contains(emitter.location) for space in spaces)}
+    assert found == expected
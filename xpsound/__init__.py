@@ -12,6 +12,32 @@ bl_info = {
 
 if "bpy" in locals():
     import importlib
+    if "xpsound_parser" in locals():
+        importlib.reload(xpsound_parser)
+    if "xpsound_serializer" in locals():
+        importlib.reload(xpsound_serializer)
+    if "xpsound_guids" in locals():
+        importlib.reload(xpsound_guids)
+    if "xpsound_datarefs" in locals():
+        importlib.reload(xpsound_datarefs)
+    if "xpsound_stats" in locals():
+        importlib.reload(xpsound_stats)
+    if "xpsound_model" in locals():
+        importlib.reload(xpsound_model)
+    if "xpsound_transforms" in locals():
+        importlib.reload(xpsound_transforms)
+    if "xpsound_spaces" in locals():
+        importlib.reload(xpsound_spaces)
+    if "xpsound_validation" in locals():
+        importlib.reload(xpsound_validation)
+    if "xpsound_cluster" in locals():
+        importlib.reload(xpsound_cluster)
+    if "xpsound_copy" in locals():
+        importlib.reload(xpsound_copy)
+    if "xpsound_query" in locals():
+        importlib.reload(xpsound_query)
+    if "xpsound_status" in locals():
+        importlib.reload(xpsound_status)
     if "xpsound_props" in locals():
         importlib.reload(xpsound_props)
     if "xpsound_ops" in locals():
@@ -25,8 +51,14 @@ if "bpy" in locals():
     if "xpsound_helper" in locals():
         importlib.reload(xpsound_helper)
 
-import bpy
-from . import xpsound_props, xpsound_ops, xpsound_ui, xpsound_export, xpsound_import, xpsound_helper
+try:
+    import bpy
+except ImportError:
+    # Running outside of Blender, only the bpy-free modules (e.g. xpsound_parser) can be used
+    bpy = None
+
+if bpy is not None:
+    from . import xpsound_parser, xpsound_serializer, xpsound_guids, xpsound_datarefs, xpsound_stats, xpsound_model, xpsound_transforms, xpsound_spaces, xpsound_validation, xpsound_cluster, xpsound_copy, xpsound_query, xpsound_status, xpsound_props, xpsound_ops, xpsound_ui, xpsound_export, xpsound_import, xpsound_helper
 
 def register():
     xpsound_props.register()
@@ -35,6 +67,7 @@ def register():
     xpsound_import.register()
     xpsound_export.register()
     xpsound_helper.register()
+    xpsound_status.register()
 
 def unregister():
     xpsound_props.unregister()
@@ -43,6 +76,7 @@ def unregister():
     xpsound_import.unregister()
     xpsound_export.unregister()
     xpsound_helper.unregister()
+    xpsound_status.unregister()
 
 if __name__ == "__main__":
     register()
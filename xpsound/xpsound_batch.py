@@ -0,0 +1,234 @@
+# Headless batch converter for .blend and .snd files.
+#
+# Converts a list of inputs in parallel, one file per worker process:
+#     .blend -> .snd   exports with the xpsound.export_snd operator
+#     .snd -> .blend   imports into an empty scene with xpsound.import_snd
+#
+# Conversions run in background Blender processes, the driver itself can run
+# from plain Python or inside Blender:
+#     python -m xpsound.xpsound_batch -j 8 --blender /path/to/blender aircraft/*.blend
+#     blender --background --python xpsound/xpsound_batch.py -- -j 8 aircraft/*.blend
+#
+# With --check the .snd inputs are only parsed (no Blender needed) and their
+# record counts are printed.
+
+import argparse
+import concurrent.futures
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+# Running as a script (blender --python), make the package importable
+if not __package__:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xpsound.xpsound_parser import parse_snd_file
+
+RESULT_PREFIX = "XPSOUND_BATCH_RESULT "
+
+
+class BatchJob:
+    "A single file conversion, picklable so it can be sent to a worker process."
+    __slots__ = ('input', 'output', 'mode', 'blender', 'group_by_position')
+
+    def __init__(self, input, output, mode, blender=None, group_by_position=True):
+        self.input = input
+        self.output = output
+        self.mode = mode
+        self.blender = blender
+        self.group_by_position = group_by_position
+
+
+def check_snd(filepath):
+    "Parses a .snd file without Blender and returns its record counts."
+    stats = {'spaces': 0, 'sounds': 0, 'snapshots': 0, 'events': 0, 'bytes': os.path.getsize(filepath)}
+    for record in parse_snd_file(filepath):
+        if record.type == 'SPACE':
+            stats['spaces'] += 1
+        elif record.type == 'SOUND':
+            stats['sounds'] += 1
+            stats['events'] += len(record.events)
+        elif record.type == 'SNAPSHOT':
+            stats['snapshots'] += 1
+            stats['events'] += len(record.events)
+    return stats
+
+
+def run_job(job):
+    "Runs a job in the current worker process, returns a result dictionary."
+    start = time.perf_counter()
+    result = {'input': job.input, 'output': job.output, 'mode': job.mode, 'ok': True, 'error': None, 'stats': None}
+    try:
+        if job.mode == 'check':
+            result['stats'] = check_snd(job.input)
+        else:
+            result['stats'] = run_blender(job)
+            if 'FINISHED' not in result['stats']['result']:
+                result['ok'] = False
+                result['error'] = result['stats'].get('error') or f"Operator returned {', '.join(result['stats']['result'])}"
+    except Exception as e:
+        result['ok'] = False
+        result['error'] = str(e)
+    result['time'] = time.perf_counter() - start
+    return result
+
+
+def run_blender(job):
+    "Converts a file in a background Blender process running this module in worker mode."
+    command = [job.blender, "--background", "--factory-startup", "--addons", "xpsound"]
+    if job.mode == 'export':
+        command.append(job.input)
+    command += ["--python", os.path.abspath(__file__), "--", "--worker", job.mode, job.input, job.output or ""]
+    if not job.group_by_position:
+        command.append("--no-group")
+
+    process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    for line in process.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+
+    # No result line, show the end of Blender's output
+    tail = "\n".join(process.stdout.splitlines()[-10:])
+    raise RuntimeError(f"Blender exited with code {process.returncode}:\n{tail}")
+
+
+def worker_main(mode, input, output, group_by_position):
+    "Entry point inside the background Blender process, converts a single file."
+    start = time.perf_counter()
+    error = None
+    try:
+        if mode == 'export':
+            result = bpy.ops.xpsound.export_snd(filepath=output)
+            if output == "":
+                xp_global = bpy.context.scene.xp_sound_global
+                output = bpy.path.abspath(os.path.join("//", xp_global.fmod_path, xp_global.snd_filename))
+        else:
+            # Start from an empty scene
+            for obj in list(bpy.data.objects):
+                bpy.data.objects.remove(obj)
+            result = bpy.ops.xpsound.import_snd(filepath=input, group_by_position=group_by_position)
+            if 'FINISHED' in result:
+                bpy.ops.wm.save_as_mainfile(filepath=output)
+    except RuntimeError as e:
+        # Operators raise with the message of their error report
+        result = {'CANCELLED'}
+        error = str(e)
+
+    stats = {
+        'result': sorted(result),
+        'error': error,
+        'output': os.path.normpath(output),
+        'objects': len(bpy.data.objects),
+        'convert_time': time.perf_counter() - start,
+    }
+    print(RESULT_PREFIX + json.dumps(stats), flush=True)
+
+
+def make_jobs(inputs, output_dir, blender, check, group_by_position):
+    jobs = []
+    for input in inputs:
+        input = os.path.abspath(input)
+        stem, extension = os.path.splitext(os.path.basename(input))
+        directory = output_dir or os.path.dirname(input)
+        extension = extension.lower()
+        if check:
+            if extension == '.snd':
+                jobs.append(BatchJob(input, None, 'check'))
+        elif extension == '.blend':
+            # Without an output directory the .snd path comes from the scene settings
+            output = os.path.join(output_dir, stem + '.snd') if output_dir else None
+            jobs.append(BatchJob(input, output, 'export', blender, group_by_position))
+        elif extension == '.snd':
+            jobs.append(BatchJob(input, os.path.join(directory, stem + '.blend'), 'import', blender, group_by_position))
+        else:
+            print(f"Skipping {input}: unsupported file type", file=sys.stderr)
+    return jobs
+
+
+def find_blender(path):
+    if path:
+        return path
+    if bpy is not None and bpy.app.binary_path:
+        return bpy.app.binary_path
+    return os.environ.get("BLENDER") or shutil.which("blender")
+
+
+def print_result(result):
+    status = "ok" if result['ok'] else "FAILED"
+    target = f" -> {result['stats'].get('output')}" if result['ok'] and result['stats'].get('output') else ""
+    print(f"[{status:>6}] {result['time']:8.2f}s  {result['input']}{target}")
+    if result['ok'] and result['mode'] == 'check':
+        stats = result['stats']
+        print(f"          {stats['spaces']} spaces, {stats['sounds']} sounds, {stats['snapshots']} snapshots, "
+              f"{stats['events']} events, {stats['bytes']} bytes")
+    if result['error']:
+        print("          " + result['error'].replace("\n", "\n          "))
+
+
+def batch_main(argv):
+    parser = argparse.ArgumentParser(prog="xpsound_batch", description="Convert .blend and .snd files in parallel")
+    parser.add_argument("inputs", nargs="*", help=".blend or .snd files")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument("-o", "--output-dir", help="Directory for the converted files")
+    parser.add_argument("--blender", help="Blender executable, defaults to $BLENDER or blender on PATH")
+    parser.add_argument("--check", action="store_true", help="Only parse .snd files, Blender is not needed")
+    parser.add_argument("--no-group", action="store_true", help="Don't group imported sounds by position")
+    parser.add_argument("--worker", nargs=3, metavar=("MODE", "INPUT", "OUTPUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        worker_main(*args.worker, not args.no_group)
+        return 0
+
+    blender = find_blender(args.blender)
+    if not args.check and not blender:
+        parser.error("Blender executable not found, use --blender or set $BLENDER")
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    jobs = make_jobs(args.inputs, args.output_dir, blender, args.check, not args.no_group)
+    if not jobs:
+        print("Nothing to convert")
+        return 0
+
+    # Inside Blender the module can't be re-imported by a process pool, the jobs
+    # already run in their own Blender processes so threads are enough to drive them
+    if bpy is not None:
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs)
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs)
+
+    start = time.perf_counter()
+    results = []
+    with executor:
+        for result in executor.map(run_job, jobs):
+            print_result(result)
+            results.append(result)
+    elapsed = time.perf_counter() - start
+
+    failed = sum(1 for result in results if not result['ok'])
+    busy = sum(result['time'] for result in results)
+    print(f"\n{len(results) - failed} converted, {failed} failed in {elapsed:.2f}s "
+          f"({busy:.2f}s of work, {busy / elapsed if elapsed else 0:.1f}x parallel speedup)")
+    return 1 if failed else 0
+
+
+def script_args():
+    "Arguments after '--' when running inside Blender, or the regular command line."
+    if bpy is not None:
+        return sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    return sys.argv[1:]
+
+
+if __name__ == "__main__":
+    code = batch_main(script_args())
+    if bpy is None or bpy.app.background:
+        sys.exit(code)
@@ -0,0 +1,94 @@
+# Merging of near-coincident sound attachments.
+#
+# This module does not depend on bpy. Sounds of visible SOUND emitters are
+# grouped by everything the exporter writes for them except the position:
+# GUID, flags, template, events and the emitter's rotation rounded to the
+# angle tolerance. Within a group a grid with cells the size of the distance
+# tolerance finds the neighbours of each sound, the first sound of a cluster
+# in export order is kept and the others are removed. Positions are compared
+# in Blender coordinates, each sound is looked at once per neighbour cell.
+
+import math
+
+
+class Cluster:
+    "A kept sound and the sounds merged into it, as (emitter index, sound index) pairs."
+    __slots__ = ('kept', 'merged')
+
+    def __init__(self, kept, merged):
+        self.kept = kept
+        self.merged = merged
+
+    def __repr__(self):
+        return f"Cluster({self.kept!r}, merged={len(self.merged)})"
+
+
+def rotation_key(rotation, angle_tolerance):
+    "Rotation in radians rounded to angle_tolerance degrees, or to 1e-6 radians if the tolerance is 0."
+    if angle_tolerance <= 0.0:
+        return tuple(round(angle, 6) for angle in rotation)
+    return tuple(round(math.degrees(angle) / angle_tolerance) for angle in rotation)
+
+
+def sound_groups(emitters, angle_tolerance):
+    "Returns the lists of (emitter index, sound index) exported with the same GUID, conditions and rotation."
+    groups = {}
+    for i, emitter in enumerate(emitters):
+        if emitter.event_type != 'SOUND' or not emitter.visible:
+            continue
+        rotation = rotation_key(emitter.rotation, angle_tolerance)
+        for j, sound in enumerate(emitter.sounds):
+            if not sound.guid:
+                continue
+            # The sound's name isn't exported
+            key = (sound.key()[1:], rotation)
+            groups.setdefault(key, []).append((i, j))
+    return list(groups.values())
+
+
+def cluster_points(points, tolerance):
+    "Greedily clusters points in order, returns lists of indices whose first point is within tolerance of the others."
+    if tolerance <= 0.0:
+        clusters = {}
+        for k, point in enumerate(points):
+            clusters.setdefault(tuple(point), []).append(k)
+        return list(clusters.values())
+
+    cells = {}
+    for k, (x, y, z) in enumerate(points):
+        cells.setdefault((math.floor(x / tolerance), math.floor(y / tolerance), math.floor(z / tolerance)), []).append(k)
+
+    squared = tolerance * tolerance
+    assigned = [False] * len(points)
+    clusters = []
+    for k, (x, y, z) in enumerate(points):
+        if assigned[k]:
+            continue
+        assigned[k] = True
+        cluster = [k]
+        cx, cy, cz = math.floor(x / tolerance), math.floor(y / tolerance), math.floor(z / tolerance)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    for other in cells.get((cx + dx, cy + dy, cz + dz), ()):
+                        if assigned[other]:
+                            continue
+                        ox, oy, oz = points[other]
+                        if (ox - x) ** 2 + (oy - y) ** 2 + (oz - z) ** 2 <= squared:
+                            assigned[other] = True
+                            cluster.append(other)
+        clusters.append(cluster)
+    return clusters
+
+
+def find_clusters(emitters, tolerance, angle_tolerance=1.0):
+    "Returns a Cluster for every set of duplicate sounds of a list of EmitterModel, tolerance is in meters."
+    clusters = []
+    for members in sound_groups(emitters, angle_tolerance):
+        if len(members) < 2:
+            continue
+        points = [emitters[i].location for i, _ in members]
+        for cluster in cluster_points(points, tolerance):
+            if len(cluster) > 1:
+                clusters.append(Cluster(members[cluster[0]], [members[k] for k in cluster[1:]]))
+    return clusters
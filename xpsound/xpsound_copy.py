@@ -0,0 +1,236 @@
+# Deep copy of the XPSound property groups driven by RNA introspection.
+#
+# This module does not depend on bpy, it only walks the bl_rna of the
+# property groups it is given. The fields of every struct are listed once
+# from its RNA properties. Numbers of collection items are read and written
+# with one foreach_get/foreach_set per property like xpsound_model does,
+# strings and enums item by item. Copies are plain dicts holding only the
+# values that differ from the default, which keeps the JSON clipboard small.
+# Pasted data is checked against the same fields before anything is written.
+
+import json
+from .xpsound_model import foreach_set_tail
+
+CLIPBOARD_FORMAT = "xpsound"
+CLIPBOARD_VERSION = 1
+
+NUMBER_TYPES = {'BOOLEAN', 'INT', 'FLOAT'}
+
+# Types of property values named in the messages of check_struct
+TYPE_NAMES = {bool: "a boolean", int: "an integer", float: "a number", str: "a string"}
+
+
+class Field:
+    "A copied property: kind is 'NUMBER', 'ARRAY', 'FLAGS', 'VALUE', 'POINTER' or 'COLLECTION', struct the RNA of items."
+    __slots__ = ('identifier', 'kind', 'default', 'struct', 'items')
+
+    def __init__(self, identifier, kind, default=None, struct=None, items=None):
+        self.identifier = identifier
+        self.kind = kind
+        self.default = default
+        self.struct = struct
+        # Identifiers of a static enum, None if any value is accepted
+        self.items = items
+
+    def __repr__(self):
+        return f"Field({self.identifier!r}, {self.kind!r})"
+
+
+# Fields of every struct keyed by RNA identifier
+_schemas = {}
+
+
+def is_property_group(rna):
+    "Whether an RNA struct is a PropertyGroup, pointers to ID blocks are references and aren't copied."
+    while rna is not None:
+        if rna.identifier == 'PropertyGroup':
+            return True
+        rna = rna.base
+    return False
+
+
+def enum_items(prop):
+    "Identifiers of an enum property, None for enums whose items come from a callback."
+    return {item.identifier for item in prop.enum_items} or None
+
+
+def struct_fields(rna):
+    "Returns the Field list of an RNA struct, built the first time it is needed."
+    fields = _schemas.get(rna.identifier)
+    if fields is not None:
+        return fields
+
+    fields = []
+    for prop in rna.properties:
+        identifier = prop.identifier
+        if identifier == 'rna_type':
+            continue
+        if prop.type in {'COLLECTION', 'POINTER'}:
+            if is_property_group(prop.fixed_type):
+                fields.append(Field(identifier, prop.type, None, prop.fixed_type))
+        elif prop.is_readonly:
+            continue
+        elif prop.type in NUMBER_TYPES and prop.array_length > 0:
+            fields.append(Field(identifier, 'ARRAY', list(prop.default_array)))
+        elif prop.type in NUMBER_TYPES:
+            fields.append(Field(identifier, 'NUMBER', prop.default))
+        elif prop.type == 'ENUM' and prop.is_enum_flag:
+            fields.append(Field(identifier, 'FLAGS', sorted(prop.default_flag), items=enum_items(prop)))
+        elif prop.type == 'ENUM':
+            fields.append(Field(identifier, 'VALUE', prop.default, items=enum_items(prop)))
+        else:
+            fields.append(Field(identifier, 'VALUE', prop.default))
+    _schemas[rna.identifier] = fields
+    return fields
+
+
+def read_value(struct, field):
+    "Returns the copy of a non number field, or None if it has its default value."
+    value = getattr(struct, field.identifier)
+    if field.kind == 'COLLECTION':
+        return read_collection(value, field.struct) or None
+    if field.kind == 'POINTER':
+        return read_struct(value) or None
+    if field.kind == 'ARRAY':
+        value = list(value)
+    elif field.kind == 'FLAGS':
+        value = sorted(value)
+    return None if value == field.default else value
+
+
+def read_struct(struct):
+    "Returns a dict of the non default values of a property group, collections as lists of dicts."
+    data = {}
+    for field in struct_fields(struct.bl_rna):
+        if field.kind == 'NUMBER':
+            value = getattr(struct, field.identifier)
+            if value != field.default:
+                data[field.identifier] = value
+        else:
+            value = read_value(struct, field)
+            if value is not None:
+                data[field.identifier] = value
+    return data
+
+
+def read_collection(collection, rna):
+    "Returns a read_struct dict for every item of a collection of rna structs."
+    rows = [{} for _ in range(len(collection))]
+    if not rows:
+        return rows
+    for field in struct_fields(rna):
+        if field.kind == 'NUMBER':
+            # foreach_get returns booleans as integers
+            cast = type(field.default)
+            values = [field.default] * len(rows)
+            collection.foreach_get(field.identifier, values)
+            for row, value in zip(rows, values):
+                if value != field.default:
+                    row[field.identifier] = cast(value)
+        else:
+            for row, item in zip(rows, collection):
+                value = read_value(item, field)
+                if value is not None:
+                    row[field.identifier] = value
+    return rows
+
+
+def write_value(struct, field, value):
+    if field.kind == 'COLLECTION':
+        collection = getattr(struct, field.identifier)
+        collection.clear()
+        write_collection(collection, field.struct, value or ())
+    elif field.kind == 'POINTER':
+        write_struct(getattr(struct, field.identifier), value or {})
+    elif field.kind == 'FLAGS':
+        setattr(struct, field.identifier, set(value))
+    else:
+        setattr(struct, field.identifier, value)
+
+
+def write_struct(struct, data):
+    "Sets a property group from a read_struct dict, values missing from it are reset to their default."
+    for field in struct_fields(struct.bl_rna):
+        write_value(struct, field, data.get(field.identifier, field.default))
+
+
+def write_collection(collection, rna, rows):
+    "Appends an item of type rna set from each read_struct dict of rows to a collection."
+    if not rows:
+        return
+    items = [collection.add() for _ in rows]
+    for field in struct_fields(rna):
+        identifier = field.identifier
+        if field.kind == 'NUMBER':
+            # New items already hold the defaults
+            if any(identifier in row for row in rows):
+                foreach_set_tail(collection, identifier, [row.get(identifier, field.default) for row in rows])
+        else:
+            for item, row in zip(items, rows):
+                if identifier in row:
+                    write_value(item, field, row[identifier])
+
+
+def check_value(field, value, path):
+    "Raises ValueError if value can't be written to field, path locates it in the messages."
+    default = field.default
+    if field.kind == 'COLLECTION':
+        if not isinstance(value, list):
+            raise ValueError(f"{path} isn't a list")
+        for k, row in enumerate(value):
+            check_struct(field.struct, row, f"{path}[{k}]")
+    elif field.kind == 'POINTER':
+        check_struct(field.struct, value, path)
+    elif field.kind == 'ARRAY':
+        if not isinstance(value, list) or len(value) != len(default) or \
+                not all(is_number(item, default[0]) for item in value):
+            raise ValueError(f"{path} isn't an array of {len(default)} numbers")
+    elif field.kind == 'NUMBER':
+        if not is_number(value, default):
+            raise ValueError(f"{path} isn't {TYPE_NAMES[type(default)]}")
+    elif field.kind == 'FLAGS':
+        if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+            raise ValueError(f"{path} isn't a list of names")
+        if field.items is not None and not field.items.issuperset(value):
+            raise ValueError(f"{path} has unknown values {sorted(set(value) - field.items)}")
+    elif not isinstance(value, type(default)):
+        raise ValueError(f"{path} isn't {TYPE_NAMES.get(type(default), 'valid')}")
+    elif field.items is not None and value not in field.items:
+        raise ValueError(f"{path} has an unknown value {value!r}")
+
+
+def is_number(value, default):
+    "Whether a JSON value fits a number property with this default, booleans and integers are interchangeable."
+    if isinstance(default, float):
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return isinstance(value, int)
+
+
+def check_struct(rna, data, path=""):
+    "Raises ValueError if a read_struct dict doesn't match the fields of rna, unknown keys are ignored like write_struct does."
+    if not isinstance(data, dict):
+        raise ValueError(f"{path or 'The data'} isn't an object")
+    for field in struct_fields(rna):
+        if field.identifier in data:
+            check_value(field, data[field.identifier], f"{path}.{field.identifier}" if path else field.identifier)
+
+
+def dumps_clipboard(kind, data):
+    "Returns the compact JSON clipboard text of a read_struct dict, kind tells what was copied."
+    return json.dumps({"format": CLIPBOARD_FORMAT, "version": CLIPBOARD_VERSION, "kind": kind, "data": data},
+                      separators=(",", ":"))
+
+
+def loads_clipboard(text, kind):
+    "Returns the data of a clipboard written by dumps_clipboard for kind, raises ValueError otherwise."
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        payload = None
+    if not isinstance(payload, dict) or payload.get("format") != CLIPBOARD_FORMAT:
+        raise ValueError("The clipboard doesn't hold XPSound data")
+    if payload.get("version") != CLIPBOARD_VERSION:
+        raise ValueError(f"Unsupported XPSound clipboard version {payload.get('version')}")
+    if payload.get("kind") != kind:
+        raise ValueError(f"The clipboard holds a {str(payload.get('kind')).lower()}, not a {kind.lower()}")
+    return payload["data"]
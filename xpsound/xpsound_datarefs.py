@@ -0,0 +1,235 @@
+# Catalog of datarefs parsed from X-Plane's DataRefs.txt and custom plugin lists.
+#
+# This module does not depend on bpy. Every file is parsed into DatarefInfo
+# entries, optionally cached in a JSON file keyed on the source's size and
+# modification time. The entries of all files are merged into a DatarefIndex:
+# a dictionary for O(1) validation, a sorted list for prefix completion and a
+# trigram index for substring search. Array elements such as name[3] are
+# validated against the array size declared in the file.
+
+import bisect
+import hashlib
+import json
+import os
+import re
+
+CACHE_VERSION = 1
+
+# name[index] at the end of a dataref, e.g. sim/cockpit2/engine/actuators/throttle_ratio[0]
+ARRAY_SUFFIX = re.compile(r"^(.*)\[(\d+)\]$")
+
+# Array size of a type column, e.g. float[8] or byte[40]
+ARRAY_TYPE = re.compile(r"\[(\d+)\]")
+
+
+class DatarefInfo:
+    "A dataref declared in a catalog file, size is the array size or 0 for scalars and unknown types."
+    __slots__ = ('name', 'type', 'size', 'writable', 'units')
+
+    def __init__(self, name, type="", writable=False, units=""):
+        self.name = name
+        self.type = type
+        match = ARRAY_TYPE.search(type)
+        self.size = int(match.group(1)) if match else 0
+        self.writable = writable
+        self.units = units
+
+    def __repr__(self):
+        return f"DatarefInfo({self.name!r}, {self.type!r})"
+
+    def description(self):
+        text = self.type
+        if self.writable:
+            text += ", writable"
+        if self.units and self.units != "???":
+            text += f", {self.units}"
+        return text
+
+
+def parse_datarefs(lines):
+    "Returns the DatarefInfo of every dataref in DataRefs.txt lines or custom lists with one name per line."
+    entries = []
+    for line in lines:
+        parts = line.split("\t") if "\t" in line else line.split()
+        if not parts:
+            continue
+        name = parts[0].strip()
+        if "/" not in name or name.startswith("#"):
+            continue
+        type = parts[1].strip() if len(parts) > 1 else ""
+        writable = len(parts) > 2 and parts[2].strip() == "y"
+        units = parts[3].strip() if len(parts) > 3 else ""
+        entries.append(DatarefInfo(name, type, writable, units))
+    return entries
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class DatarefIndex:
+    "Datarefs of one or more catalog files, key is the tuple of the files' (path, size, mtime_ns)."
+
+    def __init__(self, key, entries):
+        self.key = key
+        self.entries = {}
+        for entry in entries:
+            self.entries.setdefault(entry.name, entry)
+
+        # Lowercase names sorted for prefix search, trigram postings are indices in that list
+        self.names = sorted(self.entries, key=str.lower)
+        self.lower_names = [name.lower() for name in self.names]
+        self.trigrams = {}
+        for i, name in enumerate(self.lower_names):
+            for trigram in trigrams(name):
+                self.trigrams.setdefault(trigram, []).append(i)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return f"DatarefIndex(files={len(self.key)}, datarefs={len(self.entries)})"
+
+    def get(self, name):
+        "Returns the DatarefInfo of a dataref or array element, or None if it isn't declared."
+        entry = self.entries.get(name)
+        if entry is not None:
+            return entry
+        match = ARRAY_SUFFIX.match(name)
+        if match is not None:
+            entry = self.entries.get(match.group(1))
+            # Custom lists don't declare types, any index is accepted there
+            if entry is not None and (entry.size > int(match.group(2)) or not entry.type):
+                return entry
+        return None
+
+    def is_valid(self, name):
+        return self.get(name) is not None
+
+    def search(self, text, limit=100):
+        "Returns up to limit names containing text (case insensitive), names starting with it first."
+        text = text.strip().lower()
+        match = ARRAY_SUFFIX.match(text)
+        if match is not None:
+            text = match.group(1)
+        if not text:
+            return self.names[:limit]
+
+        # Prefix matches are a contiguous range of the sorted names
+        start = bisect.bisect_left(self.lower_names, text)
+        end = start
+        while end < len(self.lower_names) and end - start < limit and self.lower_names[end].startswith(text):
+            end += 1
+        results = self.names[start:end]
+        if len(results) >= limit or len(text) < 3:
+            return results
+
+        # Substring matches are candidates present in every trigram posting list
+        postings = []
+        for trigram in trigrams(text):
+            posting = self.trigrams.get(trigram)
+            if posting is None:
+                return results
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return results
+
+        found = set(results)
+        for i in sorted(candidates):
+            name = self.names[i]
+            if name not in found and text in self.lower_names[i]:
+                results.append(name)
+                if len(results) >= limit:
+                    break
+        return results
+
+
+# Parsed files keyed by path and merged indices keyed by the tuple of file keys
+_files = {}
+_indices = {}
+
+
+def file_key(path):
+    "Returns (path, size, mtime_ns), raises OSError if the file is missing."
+    stat = os.stat(path)
+    return (path, stat.st_size, stat.st_mtime_ns)
+
+
+def cache_path(cache_dir, path):
+    return os.path.join(cache_dir, "datarefs-" + hashlib.sha1(path.encode("utf-8")).hexdigest()[:16] + ".json")
+
+
+def read_cache(cache_dir, key):
+    try:
+        with open(cache_path(cache_dir, key[0]), "r") as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != CACHE_VERSION or data.get("size") != key[1] or data.get("mtime_ns") != key[2]:
+        return None
+    return [DatarefInfo(*entry) for entry in data["entries"]]
+
+
+def write_cache(cache_dir, key, entries):
+    data = {
+        "version": CACHE_VERSION,
+        "path": key[0],
+        "size": key[1],
+        "mtime_ns": key[2],
+        "entries": [(entry.name, entry.type, entry.writable, entry.units) for entry in entries],
+    }
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_path(cache_dir, key[0]), "w") as file:
+            json.dump(data, file)
+    except OSError:
+        # The in-memory cache still works without a writable cache directory
+        pass
+
+
+def load_dataref_file(path, cache_dir=None):
+    "Returns (key, entries) of a catalog file, parsing it only if it changed since it was last loaded."
+    key = file_key(path)
+    cached = _files.get(path)
+    if cached is not None and cached[0] == key:
+        return cached
+
+    entries = read_cache(cache_dir, key) if cache_dir else None
+    if entries is None:
+        with open(path, "r", encoding="utf-8", errors="replace") as file:
+            entries = parse_datarefs(file)
+        if cache_dir:
+            write_cache(cache_dir, key, entries)
+
+    _files[path] = (key, entries)
+    return _files[path]
+
+
+def load_dataref_index(paths, cache_dir=None):
+    "Returns the DatarefIndex of the existing files in paths, or None if there is none."
+    files = []
+    for path in paths:
+        try:
+            files.append(load_dataref_file(path, cache_dir))
+        except OSError:
+            continue
+    if not files:
+        return None
+
+    key = tuple(file[0] for file in files)
+    index = _indices.get(key)
+    if index is None:
+        # Only the latest combination of files is kept
+        _indices.clear()
+        index = DatarefIndex(key, [entry for file in files for entry in file[1]])
+        _indices[key] = index
+    return index
+
+
+def clear_dataref_catalogs():
+    _files.clear()
+    _indices.clear()
@@ -1,129 +1,89 @@
 import bpy
 import os
-import io
-import math
 from xpsound import bl_info
-
-# Define the export function for .snd file
-def export_snapshot_attachment(f, collection, obj, snapshot):
-    "Writes sound event data to a .snd file for sound type events."
-
-    f.write(f"# {collection.name + ' -> ' if collection != bpy.context.scene.collection else ''}{obj.name} -> {snapshot.name}\n")
-    f.write("BEGIN_SOUND_ATTACHMENT\n")
-    # Write event name
-    f.write(f"\tSNAPSHOT_NAME {snapshot.guid}\n")
-
-    # Write param dataref index
-    f.write(f"\tPARAM_DREF_IDX {snapshot.event_param_idx}\n")
-
-    # Write sound events
-    for snapshot_event in snapshot.event_list:
-        comparison_value = round(snapshot_event.comparison_value, 4)
-        if snapshot_event.event_type == "START":
-            f.write(f"\tEVENT_START_COND {snapshot_event.dataref_name} {snapshot_event.comparison_operator} {comparison_value}\n")
-        elif snapshot_event.event_type == "END":
-            f.write(f"\tEVENT_END_COND {snapshot_event.dataref_name} {snapshot_event.comparison_operator} {comparison_value}\n")
-        elif snapshot_event.event_type == "ALWAYS":
-            f.write(f"\tEVENT_ALWAYS {snapshot_event.dataref_name}\n")
-        elif snapshot_event.event_type.startswith("CMND"):
-            f.write(f"\tEVENT_COMMAND {snapshot_event.event_type}\n")
-
-    # Write If event auto end from start condition
-    if snapshot.event_auto_end_from_start_cond == True:
-        f.write("\tEVENT_AUTO_END_FROM_START_COND\n")
-
-    # Write end directive
-    f.write("END_SOUND_ATTACHMENT\n\n")
+from .xpsound_status import get_snd_file_path, get_guids_file_path, get_dataref_index
+from .xpsound_guids import load_guid_catalog
+from .xpsound_spaces import SpaceVolume, make_volume
+from .xpsound_validation import EmitterRecord, emitter_record, validate
+from .xpsound_stats import make_stats, last_stats
+from .xpsound_transforms import TransformTable
+from .xpsound_model import read_sounds, read_snapshots, read_templates
+from .xpsound_serializer import (format_header, format_footer, format_veh_transform, format_events, format_sound_attachment,
+                                 format_snapshot_attachment, format_space, write_sections)
+
+# Serialized blocks of every exported object keyed by (collection name, object name),
+# each entry is (fingerprint, blocks, datarefs, validation record)
+export_cache = {}
+
+# Names of objects reported as updated by the depsgraph since the last export, the only cached objects read again
+dirty_objects = set()
+
+# Formatted event lines of every condition template keyed by name, as used by the cached blocks
+export_templates = {}
+
+def object_items(xp_data, event_type):
+    "Reads the sounds or snapshots of an object into SoundModel/SnapshotModel, spaces have none."
+    if event_type == "SOUND":
+        return read_sounds(xp_data.xp_sound_list)
+    if event_type == "SNAPSHOT":
+        return read_snapshots(xp_data.xp_snapshot_list)
+    return []
+
+# Event types whose dataref_name is written to the .snd file
+DATAREF_EVENT_TYPES = {"START", "END", "ALWAYS"}
+
+def events_datarefs(event_list):
+    return {event.dataref_name for event in event_list if event.event_type in DATAREF_EVENT_TYPES and event.dataref_name}
+
+def object_fingerprint(obj, xp_data, event_type, table, row, items):
+    "Content fingerprint of everything the object contributes to the .snd file."
+    if event_type == "SPACE":
+        content = (xp_data.space_index, xp_data.space_blend_depth)
+    else:
+        content = tuple(item.key() for item in items)
+    return (event_type, table.fingerprint(row), obj.empty_display_type, content)
+
+def validation_record(obj, xp_data, event_type, table, row, items):
+    "Returns the SpaceVolume of a space or the EmitterRecord of a sound or snapshot object."
+    if event_type == "SPACE":
+        return make_volume(obj.name, xp_data.space_index, xp_data.space_blend_depth, obj.empty_display_type,
+                           table.location[row], table.scale[row], table.display_size[row])
+    return emitter_record(obj.name, event_type, table.location[row], items)
+
+def serialize_object(obj, xp_data, event_type, comment, table, row, items, templates):
+    "Returns the list of .snd blocks written for an object, its transform is row of the collection's table."
+    if event_type == "SOUND":
+        # Position and orientation are the same for every sound of the object
+        transform = format_veh_transform(table.position[row], table.angles[row])
+        return [format_sound_attachment(comment, transform, sound, templates[sound.template] if sound.template else "")
+                for sound in items]
     
-# Define the export function for .snd file
-def export_sound_attachment(f, collection, obj, sound):
-    "Writes sound event data to a .snd file for sound type events."
+    if event_type == "SNAPSHOT":
+        return [format_snapshot_attachment(comment, snapshot, templates[snapshot.template] if snapshot.template else "")
+                for snapshot in items]
     
-    f.write(f"# {collection.name + ' -> ' if collection != bpy.context.scene.collection else ''}{obj.name} -> {sound.name}\n")
-    f.write("BEGIN_SOUND_ATTACHMENT\n")
-
-    # Write event name
-    f.write(f"\tEVENT_NAME {sound.guid}\n")
-
-    # Write object position
-    f.write(f"\tVEH_XYZ {round(obj.location.x, 4)} {round(obj.location.z, 4)} {-round(obj.location.y, 4)}\n")
-
-    # Write object orientation (Euler angles)
-
-    # Roll
-    phi = math.degrees(obj.rotation_euler.x)
-    if phi != 0:
-        f.write(f"\tVEH_PHI {round(phi, 2)}\n")
-
-    # Pitch        
-    theta = math.degrees(obj.rotation_euler.y)
-    if theta != 0:
-        f.write(f"\tVEH_THETA {round(theta, 2)}\n")
-
-    # Heading    
-    psi = math.degrees(obj.rotation_euler.z)
-    if psi != 0:
-        f.write(f"\tVEH_PSI {round(psi, 2)}\n")
-
-    # Write param dataref index
-    f.write(f"\tPARAM_DREF_IDX {sound.event_param_idx}\n")
-
-    # Write if event is polyphonic
-    if sound.event_polyphonic:
-        f.write(f"\tEVENT_POLYPHONIC\n")
-
-    # Write If event is allowed for AI
-    if sound.event_allowed_for_ai:
-        f.write(f"\tEVENT_ALLOWED_FOR_AI\n")
-
-    # Write sound events
-    for sound_event in sound.event_list:
-        comparison_value = round(sound_event.comparison_value, 4)
-        if sound_event.event_type == "START":
-            f.write(f"\tEVENT_START_COND {sound_event.dataref_name} {sound_event.comparison_operator} {comparison_value}\n")
-        elif sound_event.event_type == "END":
-            f.write(f"\tEVENT_END_COND {sound_event.dataref_name} {sound_event.comparison_operator} {comparison_value}\n")
-        elif sound_event.event_type == "ALWAYS":
-            f.write(f"\tEVENT_ALWAYS {sound_event.dataref_name}\n")
-        elif sound_event.event_type.startswith("CMND"):
-            f.write(f"\tEVENT_COMMAND {sound_event.event_type}\n")
-
-    # Write If event auto end from start condition
-    if sound.event_auto_end_from_start_cond == True:
-        f.write("\tEVENT_AUTO_END_FROM_START_COND\n")
-
-    # Write end directive
-    f.write("END_SOUND_ATTACHMENT\n\n")
-
-
-def export_sound_space(f, collection, obj):
-    "Writes sound event data to a .snd file for space type events."
-
-    f.write(f"# {collection.name + ' -> ' if collection != bpy.context.scene.collection else ''}{obj.name}\n")
-    f.write("BEGIN_SOUND_SPACE\n")
-
-    # Write space index
-    f.write(f"\tSOUND_INDEX {obj.xp_sound_data.space_index}\n")
-
-    # Write blend depth
-    f.write(f"\tBLEND_DEPTH {obj.xp_sound_data.space_blend_depth}\n")
-
     if obj.empty_display_type == "CUBE":
-        # Write bounding box dimensions
-        minx = obj.location.x - obj.empty_display_size * obj.scale.x
-        miny = obj.location.z - obj.empty_display_size * obj.scale.z
-        minz = -obj.location.y - obj.empty_display_size * obj.scale.y
-        maxx = obj.location.x + obj.empty_display_size * obj.scale.x
-        maxy = obj.location.z + obj.empty_display_size * obj.scale.z
-        maxz = -obj.location.y + obj.empty_display_size * obj.scale.y
-        f.write(f"\tAABB {round(minx, 4)} {round(miny, 4)} {round(minz, 4)} {round(maxx, 4)} {round(maxy, 4)} {round(maxz, 4)}\n")
-
-    if obj.empty_display_type == "SPHERE":
-        # Write sphere center and radius
-        f.write(f"\tSPHERE {round(obj.location.x, 4)} {round(obj.location.z, 4)} {round(obj.location.y, 4)} {obj.empty_display_size}\n")
-
-    f.write("END_SOUND_SPACE\n\n")
-
+        shape, values = 'AABB', table.aabb[row]
+    elif obj.empty_display_type == "SPHERE":
+        shape, values = 'SPHERE', table.sphere[row]
+    else:
+        shape, values = None, ()
+    return [format_space(comment, xp_data.space_index, xp_data.space_blend_depth, shape, values)]
+
+@bpy.app.handlers.persistent
+def track_dirty_objects(scene, depsgraph=None):
+    "Records objects updated by the depsgraph so their cached blocks are serialized again on the next export."
+    if depsgraph is None:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Object):
+            dirty_objects.add(update.id.name)
+
+@bpy.app.handlers.persistent
+def clear_export_cache(*args):
+    export_cache.clear()
+    dirty_objects.clear()
+    export_templates.clear()
 
 # Define the export operator to write sound event data to a .snd file
 class XPSOUND_export_snd(bpy.types.Operator):
@@ -131,103 +91,204 @@ class XPSOUND_export_snd(bpy.types.Operator):
 
     bl_idname = "xpsound.export_snd"
     bl_label = "Export to .snd"
+    
+    # Overrides the path from the scene settings, used by the batch converter
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH", default="", options={'HIDDEN', 'SKIP_SAVE'})
 
     def execute(self, context):
         scene = context.scene
+        xp_global = scene.xp_sound_global
 
         # Construct the path to snd file
-        snd_file_path = bpy.path.abspath(os.path.join("//", context.scene.xp_sound_global.fmod_path, context.scene.xp_sound_global.snd_filename))
-        snd_file_path = os.path.normpath(snd_file_path)
+        snd_file_path = os.path.normpath(self.filepath) if self.filepath else get_snd_file_path(context)
 
         print(snd_file_path)
 
-        with open(snd_file_path, "w") as f:
-            # Write header
-            f.write("A\n1000\nACF_SOUNDS\n\n")
-
-            if (scene.xp_sound_global.disable_legacy_alerts == True):
-                f.write("DISABLE_LEGACY_ALERT_SOUNDS \n");
-                
-            # Write Ref Point
-            f.write(f"REF_POINT_ACF {scene.xp_sound_global.ref_point_y} {scene.xp_sound_global.ref_point_z} \n\n")
-            
-            soundsIO = io.StringIO();
-            snapshotsIO = io.StringIO();
-            spacesIO = io.StringIO();
-    
-            # Recursively process collections
-            self.process_collections(soundsIO, snapshotsIO, spacesIO, bpy.context.scene.collection)
-            
-            if (spacesIO.getvalue() != ""):
-                f.write("############## \n");
-                f.write("### SPACES ### \n");
-                f.write("############## \n\n");
-                f.write(spacesIO.getvalue());
-                
-            if (snapshotsIO.getvalue() != ""):
-                f.write("################# \n");
-                f.write("### SNAPSHOTS ### \n");
-                f.write("################# \n\n");
-                f.write(snapshotsIO.getvalue());
-                
-            if (soundsIO.getvalue() != ""):
-                f.write("############## \n");
-                f.write("### SOUNDS ### \n");
-                f.write("############## \n\n");
-                f.write(soundsIO.getvalue());
-
-            # Write Info
-            plugin_name = bl_info["name"]
-            plugin_version = bl_info["version"]
-            f.write(f"### Generated by {plugin_name} -> Version:{plugin_version}\n\n")
+        # Serialized blocks for each section, written in SECTION_TITLES order
+        sections = {'SPACE': [], 'SNAPSHOT': [], 'SOUND': []}
+        self.incremental = xp_global.incremental_export
+        self.exported_keys = set()
+        self.serialized_count = 0
+        self.tables = {}
+        self.stats = stats = make_stats("export", xp_global.enable_profiling, bpy.app.tempdir if xp_global.profile_dump else None)
+        stats.start()
+        
+        # Template events are formatted once here and shared by every sound using them,
+        # cached blocks embed them so any template change invalidates the cache
+        self.datarefs = set()
+        self.records = []
+        self.missing_templates = []
+        with stats.phase("templates"):
+            templates = read_templates(xp_global.templates)
+            self.templates = {name: format_events(events) for name, events in templates.items()}
+            for events in templates.values():
+                self.datarefs.update(events_datarefs(events))
+            if self.templates != export_templates:
+                export_cache.clear()
+                export_templates.clear()
+                export_templates.update(self.templates)
+
+        # Recursively process collections, transform and serialization time are measured separately
+        with stats.phase("traversal"):
+            self.process_collections(sections, scene.collection, scene.collection)
+        stats.add_time("traversal", -stats.phases.get("serialization", 0.0) - stats.phases.get("transforms", 0.0))
+
+        # Without its template a sound would play unconditionally, nothing is written
+        if self.missing_templates:
+            stats.stop()
+            for name, template in self.missing_templates[:5]:
+                self.report({"ERROR"}, f"'{name}' uses the missing condition template '{template}'")
+            self.report({"ERROR"}, f"Export cancelled, {len(self.missing_templates)} sounds or snapshots use missing templates")
+            return {"CANCELLED"}
+
+        # Drop cached blocks of objects that are gone and start tracking changes again
+        for key in set(export_cache) - self.exported_keys:
+            del export_cache[key]
+        dirty_objects.clear()
+        
+        # Every dataref is checked with a single lookup in the catalog's hash index
+        if xp_global.validate_datarefs:
+            with stats.phase("validation"):
+                self.validate_datarefs(context)
+        if xp_global.validate_export:
+            with stats.phase("validation"):
+                self.validate_records(context)
+
+        header = format_header(xp_global.ref_point_y, xp_global.ref_point_z, xp_global.disable_legacy_alerts)
+        footer = format_footer(bl_info["name"], bl_info["version"])
+        with stats.phase("write"), open(snd_file_path, "w") as f:
+            write_sections(f, header, sections, footer)
+            stats.count("bytes", f.tell())
+        stats.stop()
             
-        self.report({"INFO"}, f"Exported sound events to {snd_file_path}")
+        self.report({"INFO"}, f"Exported sound events to {snd_file_path} "
+                              f"({self.serialized_count} of {len(self.exported_keys)} objects serialized)")
+        if xp_global.enable_profiling:
+            stats.count("objects", len(self.exported_keys))
+            stats.count("serialized objects", self.serialized_count)
+            stats.count("attachments", len(sections['SOUND']) + len(sections['SNAPSHOT']))
+            stats.count("spaces", len(sections['SPACE']))
+            last_stats["export"] = stats
+            self.report({"INFO"}, stats.summary())
         return {"FINISHED"}
 
-    def process_collections(self, soundsIO, snapshotsIO, spacesIO, collection):
+    def process_collections(self, sections, collection, scene_collection):
         "Recursively processes collections to find and export sound events."
         
         # Check if the collection is hidden
         if (collection.hide_viewport):
             return
         
-        # Check if the collection contains any empties with xpsound attributes
-        has_xpsound_empties = False
-        for obj in collection.objects:
-            if (
-                obj.type == "EMPTY"
-                and hasattr(obj, "xp_sound_data")
-                and obj.xp_sound_data.event_type != "NONE"
-                and not obj.hide_get()
-            ):
-                has_xpsound_empties = True
-                break
-
-        # Iterate through objects in the collection
-        for obj in collection.objects:
-            if obj.type == "EMPTY" and hasattr(obj, "xp_sound_data") and not obj.hide_get():
-                
-                if obj.xp_sound_data.event_type == "SOUND":
-                    for sound in obj.xp_sound_data.xp_sound_list:
-                        export_sound_attachment(soundsIO, collection, obj, sound)                    
-                
-                if obj.xp_sound_data.event_type == "SNAPSHOT":
-                    for snapshot in obj.xp_sound_data.xp_snapshot_list:
-                        export_snapshot_attachment(snapshotsIO, collection, obj, snapshot)
-                
-                if obj.xp_sound_data.event_type == "SPACE":                    
-                    export_sound_space(spacesIO, collection, obj)                    
+        prefix = collection.name + ' -> ' if collection != scene_collection else ''
 
+        # Iterate through objects in the collection, row is the object's index in the transform table
+        for row, obj in enumerate(collection.objects):
+            if obj.type == "EMPTY" and hasattr(obj, "xp_sound_data") and not obj.hide_get():
+                xp_data = obj.xp_sound_data
+                event_type = xp_data.event_type
+                if event_type in sections:
+                    sections[event_type].extend(self.object_blocks(obj, xp_data, event_type, collection, row, prefix))
 
         # Recursively process child collections
         for child in collection.children:
-            self.process_collections(soundsIO, snapshotsIO, spacesIO, child)
+            self.process_collections(sections, child, scene_collection)
+
+    def validate_datarefs(self, context):
+        "Reports the exported datarefs missing from the dataref catalog, if one is set."
+        index = get_dataref_index(context)
+        if index is None:
+            return
+        unknown = sorted(name for name in self.datarefs if not index.is_valid(name))
+        if unknown:
+            shown = ", ".join(unknown[:5]) + (", ..." if len(unknown) > 5 else "")
+            self.report({"WARNING"}, f"{len(unknown)} datarefs not found in the dataref files: {shown}")
+
+    def validate_records(self, context):
+        "Checks spaces, emitters and GUIDs of every exported object, prints all issues and reports a summary."
+        xp_global = context.scene.xp_sound_global
+        try:
+            catalog = load_guid_catalog(get_guids_file_path(context), xp_global.guid_cache_file)
+            events, snapshots = set(catalog.events), set(catalog.snapshots)
+        except OSError:
+            events = snapshots = None
+        
+        spaces = [record for record in self.records if isinstance(record, SpaceVolume)]
+        emitters = [record for record in self.records if isinstance(record, EmitterRecord)]
+        issues = validate(spaces, emitters, events, snapshots, set(self.templates))
+        if not issues:
+            return
+        
+        for issue in issues:
+            print(f"{issue.severity}: {issue.message}")
+        counts = {}
+        for issue in issues:
+            counts[issue.severity] = counts.get(issue.severity, 0) + 1
+        summary = ", ".join(f"{count} {severity.lower()}s" for severity, count in counts.items())
+        self.report({"WARNING"}, f"Validation found {summary}, see the console for details")
+        for issue in [issue for issue in issues if issue.severity == 'ERROR'][:3]:
+            self.report({"WARNING"}, issue.message)
+
+    def transform_table(self, collection):
+        "Bulk reads and converts the transforms of a collection's objects the first time one of them is needed."
+        table = self.tables.get(collection.name)
+        if table is None:
+            with self.stats.phase("transforms"):
+                table = TransformTable(collection.objects)
+            self.tables[collection.name] = table
+        return table
+
+    def object_blocks(self, obj, xp_data, event_type, collection, row, prefix):
+        "Returns the object's blocks, reusing the cached ones when the object didn't change."
+        key = (collection.name, obj.name)
+        self.exported_keys.add(key)
+        entry = export_cache.get(key) if self.incremental else None
+        
+        # Objects the depsgraph didn't report since the last export are reused without reading them,
+        # template changes already cleared the whole cache
+        if entry is not None and obj.name not in dirty_objects:
+            self.datarefs.update(entry[2])
+            self.records.append(entry[3])
+            return entry[1]
+        
+        table = self.transform_table(collection)
+        with self.stats.phase("serialization"):
+            items = object_items(xp_data, event_type)
+            fingerprint = object_fingerprint(obj, xp_data, event_type, table, row, items)
+            missing = [item.template for item in items if item.template and item.template not in self.templates]
+            if missing:
+                self.missing_templates.extend((obj.name, template) for template in missing)
+                return []
+            
+            # Reported objects are only serialized again when their fingerprint changed, e.g. not for a selection
+            if entry is not None and entry[0] == fingerprint:
+                self.datarefs.update(entry[2])
+                self.records.append(entry[3])
+                return entry[1]
+            
+            blocks = serialize_object(obj, xp_data, event_type, prefix + obj.name, table, row, items, self.templates)
+            datarefs = set()
+            for item in items:
+                datarefs.update(events_datarefs(item.event_list))
+            record = validation_record(obj, xp_data, event_type, table, row, items)
+            export_cache[key] = (fingerprint, blocks, datarefs, record)
+            self.datarefs.update(datarefs)
+            self.records.append(record)
+            self.serialized_count += 1
+            return blocks
 
 def register():
     bpy.utils.register_class(XPSOUND_export_snd)
+    bpy.app.handlers.depsgraph_update_post.append(track_dirty_objects)
+    bpy.app.handlers.load_post.append(clear_export_cache)
+    bpy.app.handlers.undo_post.append(clear_export_cache)
+    bpy.app.handlers.redo_post.append(clear_export_cache)
 
 def unregister():
     bpy.utils.unregister_class(XPSOUND_export_snd)
+    bpy.app.handlers.depsgraph_update_post.remove(track_dirty_objects)
+    bpy.app.handlers.load_post.remove(clear_export_cache)
+    bpy.app.handlers.undo_post.remove(clear_export_cache)
+    bpy.app.handlers.redo_post.remove(clear_export_cache)
 
 if __name__ == "__main__":
     register()
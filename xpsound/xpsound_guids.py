@@ -0,0 +1,241 @@
+# Catalog of FMOD event and snapshot paths parsed from GUIDS.txt.
+#
+# This module does not depend on bpy. Catalogs are cached in memory keyed on
+# the file's path, size and modification time, and optionally in a JSON
+# sidecar file next to GUIDS.txt so a new Blender session doesn't re-parse it.
+# GuidIndex ranks paths for the GUID picker: a trigram index finds the paths
+# containing every search word, a fuzzy scan completes short result lists,
+# and a folder tree built from the path segments is used for browsing.
+
+import json
+import os
+
+SIDECAR_SUFFIX = ".xpsound-cache.json"
+SIDECAR_VERSION = 1
+# Searches with fewer substring matches than this scan for fuzzy ones too
+FUZZY_SEARCH_RESULTS = 5
+
+
+class GuidCatalog:
+    "Event and snapshot paths of a GUIDS.txt file, key is (path, size, mtime_ns)."
+    __slots__ = ('key', 'events', 'snapshots', 'indices')
+
+    def __init__(self, key, events, snapshots):
+        self.key = key
+        self.events = events
+        self.snapshots = snapshots
+        self.indices = {}
+
+    def __repr__(self):
+        return f"GuidCatalog({self.key[0]!r}, events={len(self.events)}, snapshots={len(self.snapshots)})"
+
+    def index(self, kind):
+        "Returns the GuidIndex of the 'SOUND' event or 'SNAPSHOT' paths, built once per loaded catalog."
+        index = self.indices.get(kind)
+        if index is None:
+            index = GuidIndex(self.events if kind == 'SOUND' else self.snapshots)
+            self.indices[kind] = index
+        return index
+
+
+# Catalogs already loaded in this session, keyed by path
+_catalogs = {}
+
+
+def parse_guids(lines):
+    "Returns the event and snapshot paths listed in GUIDS.txt lines."
+    events = []
+    snapshots = []
+    for line in lines:
+        parts = line.split(None, 1)
+        if len(parts) > 1:
+            name = " ".join(parts[1].split())
+            if "event:" in name:
+                events.append(name[name.index("event:") + len("event:"):])
+            if "snapshot:" in name:
+                snapshots.append(name[name.index("snapshot:") + len("snapshot:"):])
+    return events, snapshots
+
+
+def file_key(path):
+    "Returns (path, size, mtime_ns), raises OSError if the file is missing."
+    stat = os.stat(path)
+    return (path, stat.st_size, stat.st_mtime_ns)
+
+
+def read_sidecar(path, key):
+    try:
+        with open(path + SIDECAR_SUFFIX, "r") as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != SIDECAR_VERSION or data.get("size") != key[1] or data.get("mtime_ns") != key[2]:
+        return None
+    return GuidCatalog(key, data["events"], data["snapshots"])
+
+
+def write_sidecar(path, catalog):
+    data = {
+        "version": SIDECAR_VERSION,
+        "size": catalog.key[1],
+        "mtime_ns": catalog.key[2],
+        "events": catalog.events,
+        "snapshots": catalog.snapshots,
+    }
+    try:
+        with open(path + SIDECAR_SUFFIX, "w") as file:
+            json.dump(data, file)
+    except OSError:
+        # The FMOD folder may be read-only, the in-memory cache still works
+        pass
+
+
+def load_guid_catalog(path, use_sidecar=False):
+    "Returns the catalog of GUIDS.txt at path, parsing it only if it changed since the last load."
+    key = file_key(path)
+    catalog = _catalogs.get(path)
+    if catalog is not None and catalog.key == key:
+        return catalog
+
+    catalog = read_sidecar(path, key) if use_sidecar else None
+    if catalog is None:
+        with open(path, "r") as file:
+            events, snapshots = parse_guids(file)
+        catalog = GuidCatalog(key, events, snapshots)
+        if use_sidecar:
+            write_sidecar(path, catalog)
+
+    _catalogs[path] = catalog
+    return catalog
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def fuzzy_span(pattern, text):
+    "Returns the length of text from the first character of pattern to a greedy match of the others, or -1."
+    start = position = text.find(pattern[0]) if pattern else 0
+    if start < 0:
+        return -1
+    for char in pattern[1:]:
+        position = text.find(char, position + 1)
+        if position < 0:
+            return -1
+    return position + 1 - start
+
+
+def word_rank(word, path, segments, fuzzy=True):
+    "Rank of a search word in a lowercase path, lower is better, None if it doesn't match."
+    name = segments[-1]
+    if name == word:
+        return 0
+    if name.startswith(word):
+        return 1
+    if any(segment.startswith(word) for segment in segments):
+        return 2
+    if word in path:
+        return 3
+    if not fuzzy:
+        return None
+    path_span = fuzzy_span(word, path)
+    if path_span < 0:
+        return None
+    # Fuzzy matches inside a segment rank above the ones across segments, tight ones above scattered ones
+    for segment in segments:
+        span = fuzzy_span(word, segment)
+        if span >= 0:
+            return 4 + (span - len(word)) / len(segment)
+    return 5 + (path_span - len(word)) / len(path)
+
+
+class GuidIndex:
+    "FMOD event or snapshot paths with a trigram index for search and a folder tree for browsing."
+
+    def __init__(self, paths):
+        self.paths = sorted(set(paths), key=str.lower)
+        self.lower_paths = [path.lower() for path in self.paths]
+        self.segments = [path.strip("/").split("/") for path in self.lower_paths]
+        self.trigrams = {}
+        # Words and every matching index of the last search that scanned for fuzzy matches
+        self.last_fuzzy = ((), ())
+        for i, path in enumerate(self.lower_paths):
+            for trigram in trigrams(path):
+                self.trigrams.setdefault(trigram, []).append(i)
+
+        # Folder path ("/" for the root) -> (sorted subfolder paths, sorted path indices)
+        folders = {}
+        for i, path in enumerate(self.paths):
+            parts = path.strip("/").split("/")
+            folder = "/"
+            for part in parts[:-1]:
+                subfolder = folder + part + "/"
+                folders.setdefault(folder, (set(), []))[0].add(subfolder)
+                folder = subfolder
+            folders.setdefault(folder, (set(), []))[1].append(i)
+        self.folders = {folder: (sorted(subfolders, key=str.lower), items) for folder, (subfolders, items) in folders.items()}
+
+    def __len__(self):
+        return len(self.paths)
+
+    def browse(self, folder="/"):
+        "Returns the subfolders and paths directly in a folder, e.g. '/engines/'."
+        subfolders, items = self.folders.get(folder, ((), ()))
+        return subfolders, [self.paths[i] for i in items]
+
+    def candidates(self, words):
+        "Returns the indices of the paths containing every word of 3 or more characters, or None to scan them all."
+        postings = []
+        for word in words:
+            for trigram in trigrams(word):
+                postings.append(self.trigrams.get(trigram, ()))
+        if not postings:
+            return None
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return candidates
+
+    def ranked(self, indices, words, fuzzy):
+        "Returns the indices of the paths matching every word, best first, substring matches only unless fuzzy."
+        results = []
+        for i in indices:
+            path = self.lower_paths[i]
+            total = 0
+            for word in words:
+                rank = word_rank(word, path, self.segments[i], fuzzy)
+                if rank is None:
+                    break
+                total += rank
+            else:
+                results.append((total, len(path), path, i))
+        results.sort()
+        return [i for *_, i in results]
+
+    def search(self, text, limit=100):
+        "Returns up to limit paths matching every word of text, substring matches ranked by segment, then fuzzy ones."
+        words = text.lower().replace("/", " ").split()
+        if not words:
+            return self.paths[:limit]
+
+        # Paths containing every word come first, the trigrams find them without a scan
+        candidates = self.candidates(words)
+        found = self.ranked(range(len(self.paths)) if candidates is None else candidates, words, False)
+        if len(found) < min(limit, FUZZY_SEARCH_RESULTS):
+            # Fuzzy matches need a scan, of the previous fuzzy matches when the words only grew while typing
+            last_words, last_found = self.last_fuzzy
+            if last_words and len(words) >= len(last_words) and all(map(str.startswith, words, last_words)):
+                pool = last_found
+            else:
+                pool = range(len(self.paths))
+            seen = set(found)
+            found += self.ranked((i for i in pool if i not in seen), words, True)
+            self.last_fuzzy = (words, sorted(found))
+        return [self.paths[i] for i in found[:limit]]
+
+
+def clear_guid_catalogs():
+    _catalogs.clear()
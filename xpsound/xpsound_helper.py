@@ -3,6 +3,8 @@ import gpu
 from gpu_extras.batch import batch_for_shader
 import math
 import mathutils
+import colorsys
+from .xpsound_spaces import SpaceIndex, space_volume
 
 def create_arrow_coords(length, head_size):
     shaft_start = (0, 0, 0)
@@ -37,57 +39,325 @@ fragment_shader = '''
     }
 '''
 
-shader = gpu.types.GPUShader(vertex_shader, fragment_shader)
-batch_arrow = batch_for_shader(shader, 'LINES', {"position": arrow_coords})
+color_vertex_shader = '''
+    uniform mat4 viewProjectionMatrix;
+    
+    in vec3 position;
+    in vec4 color;
+    
+    out vec4 finalColor;
+    
+    void main()
+    {
+        gl_Position = viewProjectionMatrix * vec4(position, 1.0);
+        finalColor = color;
+    }
+'''
+
+color_fragment_shader = '''
+    in vec4 finalColor;
+    
+    out vec4 fragColor;
+    
+    void main()
+    {
+        fragColor = finalColor;
+    }
+'''
+
+# Created on first draw, GPU resources aren't available in background mode
+shader = None
+color_shader = None
+batch_arrow = None
+
+def ensure_shaders():
+    global shader, color_shader, batch_arrow
+    if shader is None:
+        shader = gpu.types.GPUShader(vertex_shader, fragment_shader)
+        color_shader = gpu.types.GPUShader(color_vertex_shader, color_fragment_shader)
+        batch_arrow = batch_for_shader(shader, 'LINES', {"position": arrow_coords})
+
+# Corner pairs of the 12 box edges, corner bits are (x, y, z)
+BOX_EDGES = [(i, i | bit) for i in range(8) for bit in (4, 2, 1) if not i & bit]
+
+CIRCLE_SEGMENTS = 32
+unit_circle = [(math.cos(2 * math.pi * i / CIRCLE_SEGMENTS), math.sin(2 * math.pi * i / CIRCLE_SEGMENTS)) for i in range(CIRCLE_SEGMENTS)]
+
+def box_lines(center, half):
+    corners = [(center[0] + sx * half[0], center[1] + sy * half[1], center[2] + sz * half[2])
+               for sx in (-1, 1) for sy in (-1, 1) for sz in (-1, 1)]
+    return [corners[i] for edge in BOX_EDGES for i in edge]
+
+def sphere_lines(center, radius):
+    "Three great circles of the sphere."
+    cx, cy, cz = center
+    coords = []
+    for i in range(CIRCLE_SEGMENTS):
+        (a1, b1), (a2, b2) = unit_circle[i], unit_circle[(i + 1) % CIRCLE_SEGMENTS]
+        a1, b1, a2, b2 = a1 * radius, b1 * radius, a2 * radius, b2 * radius
+        coords += [(cx + a1, cy + b1, cz), (cx + a2, cy + b2, cz)]
+        coords += [(cx + a1, cy, cz + b1), (cx + a2, cy, cz + b2)]
+        coords += [(cx, cy + a1, cz + b1), (cx, cy + a2, cz + b2)]
+    return coords
+
+def space_color(space_index, alpha=1.0):
+    "Distinct color for each space index."
+    r, g, b = colorsys.hsv_to_rgb((space_index * 0.618034) % 1.0, 0.75, 1.0)
+    return (r, g, b, alpha)
+
+# Arrows of every sound emitter in world space, rebuilt when an emitter changed
+emitters_batch = None
+emitters_dirty = True
+
+def is_sound_emitter(obj):
+    return obj.type == 'EMPTY' and hasattr(obj, "xp_sound_data") and obj.xp_sound_data.event_type == "SOUND"
+
+def emitters_coords(scene):
+    "World space LINES coordinates of the arrow of every visible sound emitter."
+    coords = []
+    for obj in scene.objects:
+        if is_sound_emitter(obj) and obj.visible_get():
+            model_matrix = obj.matrix_world @ mathutils.Matrix.Scale(obj.empty_display_size, 4)
+            coords.extend(model_matrix @ mathutils.Vector(coord) for coord in arrow_coords)
+    return coords
+
+def build_emitters_batch(scene):
+    "Creates a single LINES batch with the arrow of every visible sound emitter."
+    coords = emitters_coords(scene)
+    if not coords:
+        return None
+    return batch_for_shader(shader, 'LINES', {"position": coords})
+
+# Volumes and blend shells of every sound space, rebuilt when a space changed
+spaces_batch = None
+spaces_dirty = True
+
+def spaces_coords(scene):
+    "LINES coordinates and colors of the volume and blend depth shell of every visible space."
+    coords = []
+    colors = []
+    for obj in scene.objects:
+        if obj.type != 'EMPTY' or obj.xp_sound_data.event_type != "SPACE" or not obj.visible_get():
+            continue
+        volume = space_volume(obj)
+        if volume is None:
+            continue
+        
+        lines = box_lines if volume.shape == 'AABB' else sphere_lines
+        outer = lines(volume.center, volume.extent)
+        coords += outer
+        colors += [space_color(volume.space_index)] * len(outer)
+        
+        # Inner boundary of the blend zone, drawn faded
+        if volume.blend_depth > 0:
+            inner = lines(volume.center, volume.inset(volume.blend_depth))
+            coords += inner
+            colors += [space_color(volume.space_index, 0.35)] * len(inner)
+    return coords, colors
+
+def build_spaces_batch(scene):
+    "Creates a single LINES batch with the volume and blend depth shell of every visible space."
+    coords, colors = spaces_coords(scene)
+    if not coords:
+        return None
+    return batch_for_shader(color_shader, 'LINES', {"position": coords, "color": colors})
+
+def draw_spaces(scene):
+    global spaces_batch, spaces_dirty
+    if spaces_dirty:
+        spaces_batch = build_spaces_batch(scene)
+        spaces_dirty = False
+    if spaces_batch is None:
+        return
+    
+    gpu.state.blend_set('ALPHA')
+    color_shader.bind()
+    color_shader.uniform_float("viewProjectionMatrix", bpy.context.region_data.perspective_matrix)
+    spaces_batch.draw(color_shader)
+    gpu.state.blend_set('NONE')
 
 def draw_callback_3d():
-    if not hasattr(bpy.context.scene, "xp_sound_global") or not bpy.context.scene.xp_sound_global.draw_helper:
+    global emitters_batch, emitters_dirty
+    
+    scene = bpy.context.scene
+    if not hasattr(scene, "xp_sound_global") or not scene.xp_sound_global.draw_helper:
         return
     
     active_object = bpy.context.active_object
-    if not active_object or active_object.type != 'EMPTY' or not hasattr(active_object, "xp_sound_data") or active_object.xp_sound_data.event_type != "SOUND":
+    draw_active = active_object is not None and is_sound_emitter(active_object)
+    draw_all = scene.xp_sound_global.draw_all_emitters
+    if not draw_active and not draw_all and not scene.xp_sound_global.draw_spaces:
         return
-
+    
+    ensure_shaders()
+    
     gpu.state.depth_test_set('LESS_EQUAL')
     gpu.state.line_width_set(2.0)
+    
+    if scene.xp_sound_global.draw_spaces:
+        draw_spaces(scene)
 
     shader.bind()
     
-    for area in bpy.context.screen.areas:
-        if area.type == 'VIEW_3D':
-            space = area.spaces[0]
-            view_matrix = space.region_3d.view_matrix
-            projection_matrix = space.region_3d.window_matrix
-            viewProjectionMatrix = projection_matrix @ view_matrix
-            shader.uniform_float("viewProjectionMatrix", viewProjectionMatrix)
-
-            # Arrow color (pink for active object)
-            color = (1.0, 0.0, 1.0, 1.0)
-            shader.uniform_float("color", color)
-
-            obj_matrix = active_object.matrix_world
-            arrow_length = active_object.empty_display_size
-            scale_matrix = mathutils.Matrix.Scale(arrow_length, 4)
-            model_matrix = obj_matrix @ scale_matrix
-            shader.uniform_float("modelMatrix", model_matrix)
-            batch_arrow.draw(shader)
+    # Draw for the region being redrawn only
+    shader.uniform_float("viewProjectionMatrix", bpy.context.region_data.perspective_matrix)
+    
+    if draw_all:
+        if emitters_dirty:
+            emitters_batch = build_emitters_batch(scene)
+            emitters_dirty = False
+        
+        if emitters_batch is not None:
+            # Arrows are already in world space
+            shader.uniform_float("modelMatrix", mathutils.Matrix.Identity(4))
+            shader.uniform_float("color", (0.0, 0.8, 1.0, 1.0))
+            emitters_batch.draw(shader)
+    
+    if draw_active:
+        # Arrow color (pink for active object)
+        shader.uniform_float("color", (1.0, 0.0, 1.0, 1.0))
+        scale_matrix = mathutils.Matrix.Scale(active_object.empty_display_size, 4)
+        shader.uniform_float("modelMatrix", active_object.matrix_world @ scale_matrix)
+        batch_arrow.draw(shader)
+
+# Minimum seconds between two redraws requested by depsgraph updates
+REDRAW_INTERVAL = 1 / 30
 
 draw_handle = None
+redraw_pending = False
 
 def register():
     global draw_handle
     draw_handle = bpy.types.SpaceView3D.draw_handler_add(draw_callback_3d, (), 'WINDOW', 'POST_VIEW')
     bpy.app.handlers.depsgraph_update_post.append(scene_update)
+    bpy.app.handlers.depsgraph_update_post.append(track_spaces)
+    bpy.app.handlers.load_post.append(invalidate_batches)
+    bpy.app.handlers.undo_post.append(invalidate_batches)
+    bpy.app.handlers.redo_post.append(invalidate_batches)
 
 def unregister():
-    global draw_handle
+    global draw_handle, redraw_pending, emitters_batch, spaces_batch
     bpy.types.SpaceView3D.draw_handler_remove(draw_handle, 'WINDOW')
     bpy.app.handlers.depsgraph_update_post.remove(scene_update)
+    bpy.app.handlers.depsgraph_update_post.remove(track_spaces)
+    bpy.app.handlers.load_post.remove(invalidate_batches)
+    bpy.app.handlers.undo_post.remove(invalidate_batches)
+    bpy.app.handlers.redo_post.remove(invalidate_batches)
+    emitters_batch = spaces_batch = None
+    reset_space_index()
+    if bpy.app.timers.is_registered(redraw_view3d):
+        bpy.app.timers.unregister(redraw_view3d)
+    redraw_pending = False
+
+def is_relevant_update(update, active_object):
+    "Whether a depsgraph update affects what the helper draws."
+    obj = update.id
+    if not isinstance(obj, bpy.types.Object):
+        return False
+    if active_object is not None and obj.original == active_object:
+        return True
+    return obj.type == 'EMPTY' and obj.xp_sound_data.event_type != 'NONE'
+
+def invalidates_batches(update):
+    "Whether a depsgraph update may change the cached batches (any empty, or objects added or removed)."
+    updated_id = update.id
+    if isinstance(updated_id, bpy.types.Object):
+        return updated_id.type == 'EMPTY'
+    # Scenes show up in most updates, linking and unlinking objects updates their collection
+    return isinstance(updated_id, bpy.types.Collection)
+
+@bpy.app.handlers.persistent
+def scene_update(scene, depsgraph=None):
+    "Schedules a coalesced viewport redraw when a sound emitter or the active object changed."
+    global redraw_pending, emitters_dirty, spaces_dirty
+    if not hasattr(scene, "xp_sound_global") or not scene.xp_sound_global.draw_helper:
+        # The cached batches can't be trusted once updates stop being tracked
+        emitters_dirty = spaces_dirty = True
+        return
+    
+    if depsgraph is None:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+    active_object = bpy.context.active_object
+    relevant = False
+    for update in depsgraph.updates:
+        if invalidates_batches(update):
+            emitters_dirty = spaces_dirty = True
+            relevant = True
+        elif not relevant and is_relevant_update(update, active_object):
+            relevant = True
+    
+    if relevant and not redraw_pending:
+        # Updates arriving until the timer fires are covered by the same redraw
+        redraw_pending = True
+        bpy.app.timers.register(redraw_view3d, first_interval=REDRAW_INTERVAL)
+
+@bpy.app.handlers.persistent
+def invalidate_batches(*args):
+    global emitters_dirty, spaces_dirty
+    emitters_dirty = spaces_dirty = True
+    reset_space_index()
+
+# Visible sound spaces keyed by object pointer for point queries, built on first query
+space_index = SpaceIndex()
+space_index_scene = None
+
+def reset_space_index():
+    global space_index_scene
+    space_index.clear()
+    space_index_scene = None
+
+def indexed_volume(obj):
+    "Returns the SpaceVolume of an object if it is a visible sound space, else None."
+    if obj.type != 'EMPTY' or obj.xp_sound_data.event_type != "SPACE" or not obj.visible_get():
+        return None
+    return space_volume(obj)
+
+def get_space_index(scene):
+    "Returns the SpaceIndex of the scene's visible sound spaces, rebuilding it only if it was reset."
+    global space_index_scene
+    if space_index_scene != scene.name:
+        space_index.clear()
+        for obj in scene.objects:
+            volume = indexed_volume(obj)
+            if volume is not None:
+                space_index.update(obj.as_pointer(), volume)
+        space_index_scene = scene.name
+    return space_index
+
+def containing_spaces(scene, point):
+    "Returns (SpaceVolume, blend weight) of every visible sound space containing point, by space index."
+    return get_space_index(scene).query(point)
+
+@bpy.app.handlers.persistent
+def track_spaces(scene, depsgraph=None):
+    "Updates the space index entry of every updated empty, independently of the viewport helper."
+    if space_index_scene != scene.name:
+        # Not built yet or built for another scene, the next query rebuilds it
+        return
+    if depsgraph is None:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+    for update in depsgraph.updates:
+        updated_id = update.id
+        if isinstance(updated_id, bpy.types.Collection):
+            # Objects were linked, unlinked or hidden
+            reset_space_index()
+            return
+        if isinstance(updated_id, bpy.types.Object) and updated_id.type == 'EMPTY':
+            obj = updated_id.original
+            volume = indexed_volume(obj)
+            if volume is None:
+                space_index.remove(obj.as_pointer())
+            else:
+                space_index.update(obj.as_pointer(), volume)
 
-def scene_update(dummy):
-    for area in bpy.context.screen.areas:
-        if area.type == 'VIEW_3D':
-            area.tag_redraw()
+def redraw_view3d():
+    global redraw_pending
+    redraw_pending = False
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+    return None
 
 if __name__ == "__main__":
     register()
\ No newline at end of file
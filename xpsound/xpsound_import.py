@@ -1,7 +1,13 @@
 import bpy
-import os
-from mathutils import Vector
 import math
+import os
+import threading
+import time
+import numpy as np
+from .xpsound_parser import iter_snd_records
+from .xpsound_transforms import xplane_to_blender, write_vectors
+from .xpsound_model import sound_from_record, snapshot_from_record, write_sounds, write_snapshots
+from .xpsound_stats import NULL_STATS, make_stats, last_stats
 
 def get_or_create_collection(name):
     if name in bpy.data.collections:
@@ -14,220 +20,400 @@ def get_or_create_collection(name):
 def get_sound_path(guid):
     return '/'.join(guid.split('/')[:-1])
 
-def euler_almost_equal(euler1, euler2, tolerance=0.001):
-    return all(abs(a - b) < tolerance for a, b in zip(euler1, euler2))
+# Largest position distance and angle difference of grouped sounds, in meters and radians
+GROUP_TOLERANCE = 0.001
+
+def grid_cell(position, tolerance=GROUP_TOLERANCE):
+    return tuple(math.floor(value / tolerance) for value in position)
+
+class ImportedEmpty:
+    "Description of an empty created by the importer, or of an existing one receiving new sounds."
+    __slots__ = ('obj', 'existing', 'type', 'name', 'location', 'rotation', 'scale', 'display_type',
+                 'space_index', 'blend_depth', 'sound_count', 'sounds', 'snapshots')
+
+    def __init__(self, type, name="XPSound", obj=None):
+        self.obj = obj
+        self.existing = obj is not None
+        self.type = type
+        self.name = name if obj is None else obj.name
+        self.location = None
+        self.rotation = None
+        self.scale = None
+        self.display_type = 'PLAIN_AXES'
+        self.space_index = None
+        self.blend_depth = None
+        self.sound_count = 0 if obj is None else len(obj.xp_sound_data.xp_sound_list)
+        self.sounds = []
+        self.snapshots = []
+
+    def add_sound(self, record):
+        self.sounds.append(sound_from_record(record))
+        self.sound_count += 1
+        
+        # Name the empty after the sound paths, computed here so the object is renamed only once
+        path = get_sound_path(record.guid)
+        if self.sound_count == 1:
+            self.name = f"Sound - {path}"
+        elif path not in self.name:
+            self.name += f"_{path}"
+
+class SoundObjectIndex:
+    "Grid of grouped sound empties with cells the size of the tolerance, keyed by cell and GUID base path."
+
+    def __init__(self, tolerance=GROUP_TOLERANCE):
+        self.tolerance = tolerance
+        self.cells = {}
+        self.count = 0
 
-def find_or_create_sound_object(context, position, rotation, type, collection, guid):
+    def seed(self, collection, plan):
+        "Indexes the sound objects already present in the collection."
+        for obj in collection.objects:
+            if obj.type == 'EMPTY' and obj.xp_sound_data.event_type == 'SOUND':
+                empty = ImportedEmpty('SOUND', obj=obj)
+                plan.append(empty)
+                position, rotation = tuple(obj.location), tuple(obj.rotation_euler)
+                for sound_path in {get_sound_path(sound.guid) for sound in obj.xp_sound_data.xp_sound_list}:
+                    self.add(empty, position, rotation, sound_path)
+
+    def find(self, position, rotation, sound_path):
+        "Returns the first indexed empty closer than the tolerance with the same rotation and GUID path, or None."
+        tolerance = self.tolerance
+        squared = tolerance * tolerance
+        cx, cy, cz = grid_cell(position, tolerance)
+        x, y, z = position
+        found = None
+        # Points within the tolerance are at most one cell away
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    entries = self.cells.get(((cx + dx, cy + dy, cz + dz), sound_path), ())
+                    for order, empty, (ox, oy, oz), other_rotation in entries:
+                        if found is not None and order > found[0]:
+                            continue
+                        if (ox - x) ** 2 + (oy - y) ** 2 + (oz - z) ** 2 < squared and \
+                                all(abs(a - b) < tolerance for a, b in zip(rotation, other_rotation)):
+                            found = (order, empty)
+        return found[1] if found is not None else None
+
+    def add(self, empty, position, rotation, sound_path):
+        # The insertion order picks the first match like a scan of the collection would
+        entries = self.cells.setdefault((grid_cell(position, self.tolerance), sound_path), [])
+        entries.append((self.count, empty, tuple(position), tuple(rotation)))
+        self.count += 1
+
+def find_or_create_sound_empty(plan, position, rotation, guid, index):
     sound_path = get_sound_path(guid)
-    for obj in collection.objects:
-        if obj.type == 'EMPTY' and obj.xp_sound_data.event_type == type:
-            if (obj.location - position).length < 0.001 and euler_almost_equal(obj.rotation_euler, rotation):
-                # Check if the existing object has a sound with the same base path
-                for sound in obj.xp_sound_data.xp_sound_list:
-                    if get_sound_path(sound.guid) == sound_path:
-                        return obj
-    
-    # If no existing object found, create a new one
-    new_obj = create_empty(context, collection)
-    new_obj.xp_sound_data.event_type = type
-    new_obj.location = position
-    new_obj.rotation_euler = rotation
-    return new_obj
-
-def import_snd_file(context, filepath, group_by_position, import_spaces, import_snapshots, import_sounds):
-    xpsounds_collection = get_or_create_collection("XPSounds")
+    empty = index.find(position, rotation, sound_path)
+    if empty is not None:
+        return empty
     
-    # Add a single empty object for all snapshots
-    snapshot_object = None if not import_snapshots else create_empty(context, xpsounds_collection)
-    if snapshot_object:
-        snapshot_object.name = "All Snapshots"
-        snapshot_object.xp_sound_data.event_type = 'SNAPSHOT'
-    
-    with open(filepath, 'r') as file:
-        lines = file.readlines()
-
-    current_object = None
-    current_type = None
-    current_position = None
-    current_rotation = None
-    current_guid = None
-    
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
+    # If no existing empty found, plan a new one
+    empty = ImportedEmpty('SOUND')
+    empty.location = position
+    empty.rotation = rotation
+    plan.append(empty)
+    index.add(empty, position, rotation, sound_path)
+    return empty
+
+def sound_transforms(records):
+    "Converts the positions and angles of sound records to Blender locations and rotations in one step."
+    position = np.array([record.position or (0.0, 0.0, 0.0) for record in records], dtype=np.float64).reshape(-1, 3)
+    angles = np.array([(record.phi, record.theta, record.psi) for record in records], dtype=np.float64).reshape(-1, 3)
+    location, rotation = xplane_to_blender(position, angles)
+    return location.tolist(), rotation.tolist()
+
+# Seconds of main thread work per timer event of the modal import
+IMPORT_TIME_SLICE = 0.02
+
+# Planned empties created per step, the time slice is checked between steps
+IMPORT_CHUNK_SIZE = 50
+
+class ImportJob:
+    "A .snd import split in steps: parsing (bpy-free, can run on a worker thread), planning and chunked object creation."
+
+    def __init__(self, filepath, group_by_position, import_spaces, import_snapshots, import_sounds, stats=NULL_STATS):
+        self.filepath = filepath
+        self.options = (group_by_position, import_spaces, import_snapshots, import_sounds)
+        self.stats = stats
+        self.size = os.path.getsize(filepath)
+        self.bytes_read = 0
+        self.planner = None
+        self.error = None
+        self.cancelled = False
+        self.invalidated = False
+        self.thread = None
+        self.collection = None
+        self.collection_created = False
+        self.plan = None
+        self.position = 0
+        self.existing = []
+
+    def read_lines(self, file):
+        "Yields the lines of the file, counting the characters read for the progress and stopping on cancel."
+        for line in file:
+            if self.cancelled:
+                return
+            self.bytes_read += len(line)
+            yield line
+
+    def prepare(self):
+        "Gets the XPSounds collection and indexes its sound objects, on the main thread before parsing."
+        self.collection_created = "XPSounds" not in bpy.data.collections
+        self.collection = get_or_create_collection("XPSounds")
+        self.planner = ImportPlan(self.collection, *self.options)
+
+    def parse(self):
+        "Parses the file and groups its records into planned empties, doesn't touch bpy so it can run on a worker thread."
+        start = time.perf_counter()
+        try:
+            with open(self.filepath, 'r') as file:
+                self.planner.add_records(iter_snd_records(self.read_lines(file)))
+        except Exception as e:
+            self.error = e
+        self.stats.add_time("parse", time.perf_counter() - start)
+
+    def start(self):
+        self.prepare()
+        self.thread = threading.Thread(target=self.parse, name="xpsound-import", daemon=True)
+        self.thread.start()
+
+    def parsing(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def progress(self):
+        "Returns the progress from 0 to 1, parsing counts for the first half."
+        if self.plan is None:
+            return 0.5 * min(1.0, self.bytes_read / self.size) if self.size else 0.5
+        return 0.5 + 0.5 * (self.position / len(self.plan) if self.plan else 1.0)
+
+    def begin(self):
+        "Takes the planned empties once parsing is done."
+        self.plan = self.planner.empties
         
-        if line.startswith('BEGIN_SOUND_SPACE'):
-            if import_spaces:
-                current_type = 'SPACE'
-                current_object = create_empty(context, xpsounds_collection)
-                current_object.xp_sound_data.event_type = 'SPACE'
-            else:
-                current_object = None
-                current_type = None
-                
-        if line.startswith('BEGIN_SOUND_ATTACHMENT'):
-            # Look ahead for SNAPSHOT_NAME/EVENT_NAME, VEH_XYZ, and rotation
-            j = i + 1
-            current_type = 'SOUND'
-            current_position = None
-            current_rotation = Vector((0, 0, 0))
-            current_guid = None
-            while j < len(lines) and not lines[j].strip().startswith('END_SOUND_ATTACHMENT'):
-                if 'SNAPSHOT_NAME' in lines[j]:
-                    current_type = 'SNAPSHOT'
-                    current_guid = lines[j].split()[1]
-                elif 'EVENT_NAME' in lines[j]:
-                    current_guid = lines[j].split()[1]
-                elif lines[j].strip().startswith('VEH_XYZ'):
-                    parts = lines[j].split()
-                    current_position = Vector((float(parts[1]), -float(parts[3]), float(parts[2])))
-                elif lines[j].strip().startswith('VEH_PSI'):
-                    current_rotation.z = math.radians(float(lines[j].split()[1]))
-                elif lines[j].strip().startswith('VEH_THETA'):
-                    current_rotation.x = math.radians(float(lines[j].split()[1]))
-                elif lines[j].strip().startswith('VEH_PHI'):
-                    current_rotation.y = math.radians(float(lines[j].split()[1]))
-                j += 1
+        # Existing objects may receive sounds and a new name, keep what's needed to restore them
+        self.existing = [(empty.obj, empty.obj.name, len(empty.obj.xp_sound_data.xp_sound_list))
+                         for empty in self.plan if empty.existing]
+
+    def step(self, deadline=None):
+        "Creates the next chunks of planned empties until deadline, returns True once all are created."
+        # Without a deadline everything is created in one chunk so transforms are written in bulk once
+        chunk_size = IMPORT_CHUNK_SIZE if deadline is not None else len(self.plan)
+        while self.position < len(self.plan):
+            chunk = self.plan[self.position:self.position + chunk_size]
+            with self.stats.phase("object creation"):
+                create_empties(self.collection, chunk)
+            with self.stats.phase("event population"):
+                populate_empties(chunk)
+            self.position += len(chunk)
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+        return self.position >= len(self.plan)
+
+    def valid(self):
+        "Whether the collection and the existing objects of the plan still exist, the scene stays editable while importing."
+        try:
+            if self.collection is not None and bpy.data.collections.get(self.collection.name) != self.collection:
+                return False
+            for obj, _, _ in self.existing:
+                obj.name
+        except ReferenceError:
+            return False
+        return True
+
+    def cancel(self):
+        "Stops parsing and removes everything created so far, objects the user removed meanwhile are skipped."
+        self.cancelled = True
+        if self.thread is not None:
+            self.thread.join()
+        # A chunk that failed halfway has objects past position, every created one is removed
+        for empty in self.plan or []:
+            if not empty.existing and empty.obj is not None:
+                try:
+                    bpy.data.objects.remove(empty.obj, do_unlink=True)
+                except ReferenceError:
+                    pass
+        for obj, name, sound_count in self.existing:
+            try:
+                sound_list = obj.xp_sound_data.xp_sound_list
+                while len(sound_list) > sound_count:
+                    sound_list.remove(len(sound_list) - 1)
+                if obj.name != name:
+                    obj.name = name
+            except ReferenceError:
+                pass
+        if self.collection_created:
+            try:
+                bpy.data.collections.remove(self.collection)
+            except ReferenceError:
+                pass
+            self.collection_created = False
+        self.plan = None
+
+    def finish(self):
+        plan = self.plan
+        stats = self.stats
+        stats.count("bytes", self.size)
+        stats.count("objects", sum(1 for empty in plan if empty.sounds or empty.snapshots or empty.type == 'SPACE'))
+        stats.count("sounds", sum(len(empty.sounds) for empty in plan))
+        stats.count("snapshots", sum(len(empty.snapshots) for empty in plan))
+        stats.count("events", sum(len(item.event_list) for empty in plan for item in empty.sounds + empty.snapshots))
+        return plan
+
+def import_snd_file(context, filepath, group_by_position, import_spaces, import_snapshots, import_sounds, stats=NULL_STATS):
+    "Imports a .snd file in one go, returns the list of ImportedEmpty."
+    job = ImportJob(filepath, group_by_position, import_spaces, import_snapshots, import_sounds, stats)
+    job.prepare()
+    job.parse()
+    if job.error is not None:
+        job.cancel()
+        raise job.error
+    job.begin()
+    job.step()
+    return job.finish()
+
+def build_import_plan(records, collection, group_by_position, import_spaces, import_snapshots, import_sounds):
+    "Builds the list of ImportedEmpty from parsed records without touching the scene."
+    plan = ImportPlan(collection, group_by_position, import_spaces, import_snapshots, import_sounds)
+    plan.add_records(records)
+    return plan.empties
+
+# Sound records whose transforms are converted together, records are consumed as they are parsed
+TRANSFORM_CHUNK_SIZE = 1024
+
+class ImportPlan:
+    "Planned empties built from a stream of records, only the constructor reads the scene."
+
+    def __init__(self, collection, group_by_position, import_spaces, import_snapshots, import_sounds):
+        self.group_by_position = group_by_position
+        self.import_spaces = import_spaces
+        self.import_snapshots = import_snapshots
+        self.import_sounds = import_sounds
+        self.empties = []
+        self.pending = []
+        
+        # Add a single empty object for all snapshots
+        self.snapshot_empty = None
+        if import_snapshots:
+            self.snapshot_empty = ImportedEmpty('SNAPSHOT', "All Snapshots")
+            self.empties.append(self.snapshot_empty)
+        
+        # Lookup of existing sound objects when grouping by position
+        self.index = None
+        if group_by_position and import_sounds:
+            self.index = SoundObjectIndex()
+            self.index.seed(collection, self.empties)
+
+    def add_records(self, records):
+        "Consumes records one at a time, sounds wait in a chunk until their transforms are converted."
+        for record in records:
+            if record.type == 'SPACE':
+                if self.import_spaces:
+                    # Keep the empties in file order
+                    self.flush()
+                    self.empties.append(plan_space(record))
             
-            if (current_type == 'SNAPSHOT' and import_snapshots) or (current_type == 'SOUND' and import_sounds):
-                if current_type == 'SNAPSHOT':
-                    current_object = snapshot_object
-                elif group_by_position and current_position and current_guid:
-                    current_object = find_or_create_sound_object(context, current_position, current_rotation, current_type, xpsounds_collection, current_guid)
-                else:
-                    current_object = create_empty(context, xpsounds_collection)
-                    current_object.xp_sound_data.event_type = current_type
-                    if current_position:
-                        current_object.location = current_position
-                    if current_rotation:
-                        current_object.rotation_euler = current_rotation
+            elif record.type == 'SNAPSHOT':
+                if self.import_snapshots:
+                    self.snapshot_empty.snapshots.append(snapshot_from_record(record))
+            
+            elif record.type == 'SOUND':
+                if self.import_sounds:
+                    self.pending.append(record)
+                    if len(self.pending) >= TRANSFORM_CHUNK_SIZE:
+                        self.flush()
+        self.flush()
+
+    def flush(self):
+        "Converts the transforms of the pending sound records and adds them to the plan."
+        if not self.pending:
+            return
+        locations, rotations = sound_transforms(self.pending)
+        for record, location, rotation in zip(self.pending, locations, rotations):
+            position = tuple(location) if record.position else None
+            rotation = tuple(rotation)
+            if self.group_by_position and position and record.guid:
+                empty = find_or_create_sound_empty(self.empties, position, rotation, record.guid, self.index)
             else:
-                current_object = None
-                current_type = None
-        elif line.startswith('END_SOUND_SPACE') or line.startswith('END_SOUND_ATTACHMENT'):
-            current_object = None
-            current_type = None
-            current_position = None
-            current_guid = None
-        elif current_object:
-            process_line(context, line, current_object, current_type)
-        
-        i += 1
+                empty = ImportedEmpty('SOUND')
+                empty.location = position
+                empty.rotation = rotation
+                self.empties.append(empty)
+            if record.guid:
+                empty.add_sound(record)
+        self.pending = []
 
-def create_empty(context, collection):
-    empty = bpy.data.objects.new("XPSound", None)
-    empty.empty_display_type = 'PLAIN_AXES'
-    collection.objects.link(empty)
+def plan_space(record):
+    empty = ImportedEmpty('SPACE')
+    if record.space_index is not None:
+        empty.space_index = record.space_index
+        empty.name = f"Space - {record.space_index}"
+    empty.blend_depth = record.blend_depth
+    values = record.values
+    if record.shape == 'AABB':
+        empty.display_type = 'CUBE'
+        min_point = (values[0], values[2], values[1])
+        max_point = (values[3], values[5], values[4])
+        empty.location = ((min_point[0] + max_point[0]) / 2, -(min_point[1] + max_point[1]) / 2, (min_point[2] + max_point[2]) / 2)
+        empty.scale = tuple((b - a) / 2 for a, b in zip(min_point, max_point))
+    elif record.shape == 'SPHERE':
+        empty.display_type = 'SPHERE'
+        empty.location = (values[0], values[2], values[1])
+        empty.scale = (values[3], values[3], values[3])
     return empty
 
-def process_line(context, line, obj, type):
-    parts = line.split()
-    if not parts:
+def create_empties(collection, plan):
+    "Creates all planned empties, then writes their transforms in bulk or per object for small chunks."
+    new_empties = [empty for empty in plan if empty.obj is None]
+    if not new_empties:
         return
-
-    if type == 'SOUND':
-        process_sound_line(obj, parts)
-    elif type == 'SPACE':
-        process_space_line(obj, parts)
-    elif type == 'SNAPSHOT':
-        process_snapshot_line(obj, parts)
-
-def process_sound_line(obj, parts):
-    if parts[0] == 'EVENT_NAME':
-        sound = obj.xp_sound_data.xp_sound_list.add()
-        sound.guid = parts[1]
-        
-        # Split the sound name into path and actual name
-        path_parts = sound.guid.split('/')
-        sound_name = path_parts[-1]
-        path = '/'.join(path_parts[:-1])
-        
-        # Rename the empty object
-        if len(obj.xp_sound_data.xp_sound_list) == 1:
-            obj.name = f"Sound - {path}"
-        elif path not in obj.name:
-            obj.name += f"_{path}"
-        
-        # Rename the sound inside the list
-        sound.name = sound_name
-    elif parts[0] == 'VEH_PSI':
-        obj.rotation_euler[2] = math.radians(float(parts[1]))  # Yaw (Z-axis rotation)
-    elif parts[0] == 'VEH_THETA':
-        obj.rotation_euler[0] = math.radians(float(parts[1]))  # Pitch (X-axis rotation)
-    elif parts[0] == 'VEH_PHI':
-        obj.rotation_euler[1] = math.radians(float(parts[1]))  # Roll (Y-axis rotation)
-    elif parts[0] == 'PARAM_DREF_IDX':
-        sound = obj.xp_sound_data.xp_sound_list[-1]
-        sound.event_param_idx = int(parts[1])
-    elif parts[0] == 'EVENT_ALLOWED_FOR_AI':
-        sound = obj.xp_sound_data.xp_sound_list[-1]
-        sound.event_allowed_for_ai = True
-    elif parts[0] == 'EVENT_AUTO_END_FROM_START_COND':
-        sound = obj.xp_sound_data.xp_sound_list[-1]
-        sound.event_auto_end_from_start_cond = True
-    elif parts[0] in ['EVENT_START_COND', 'EVENT_END_COND', 'EVENT_ALWAYS']:
-        add_sound_event(obj, parts)
-
-def process_space_line(obj, parts):
-    if parts[0] == 'SOUND_INDEX':
-        obj.xp_sound_data.space_index = int(parts[1])
-        obj.name = f"Space - {obj.xp_sound_data.space_index}"
-    if parts[0] == 'BLEND_DEPTH':
-        obj.xp_sound_data.space_blend_depth = float(parts[1])
-    elif parts[0] == 'AABB':
-        set_aabb(obj, parts)
-    elif parts[0] == 'SPHERE':
-        set_sphere(obj, parts)    
-
-def process_snapshot_line(obj, parts):
-    if parts[0] == 'SNAPSHOT_NAME':
-        snapshot = obj.xp_sound_data.xp_snapshot_list.add()
-        snapshot.guid = parts[1]
-        snapshot.name = snapshot.guid.split('/')[-1]
-    elif parts[0] == 'PARAM_DREF_IDX':
-        snapshot = obj.xp_sound_data.xp_snapshot_list[-1]
-        snapshot.event_param_idx = int(parts[1])
-    elif parts[0] == 'EVENT_AUTO_END_FROM_START_COND':
-        snapshot = obj.xp_sound_data.xp_snapshot_list[-1]
-        snapshot.event_auto_end_from_start_cond = True        
-    elif parts[0] in ['EVENT_START_COND', 'EVENT_END_COND', 'EVENT_ALWAYS']:
-        add_snapshot_event(obj, parts)
-
-def set_aabb(obj, parts):
-    obj.empty_display_type = 'CUBE'
-    min_point = Vector((float(parts[1]), float(parts[3]), float(parts[2])))
-    max_point = Vector((float(parts[4]), float(parts[6]), float(parts[5])))
-    obj.location = (min_point + max_point) / 2
-    obj.location.y = -obj.location.y
-    obj.scale = (max_point - min_point) / 2
     
-def set_sphere(obj, parts):
-    obj.empty_display_type = 'SPHERE'
-    obj.location = Vector((float(parts[1]), float(parts[3]), float(parts[2])))
-    radius = float(parts[4])
-    obj.scale = Vector((radius, radius, radius))
+    objects = collection.objects
+    first = len(objects)
+    for empty in new_empties:
+        obj = bpy.data.objects.new(empty.name, None)
+        obj.empty_display_type = empty.display_type
+        objects.link(obj)
+        empty.obj = obj
+    
+    # A bulk write reads and writes every object of the collection, chunks of a large
+    # collection set their few objects directly instead
+    if len(new_empties) * 2 < len(objects):
+        for empty in new_empties:
+            obj = empty.obj
+            if empty.location is not None:
+                obj.location = empty.location
+            if empty.rotation is not None:
+                obj.rotation_euler = empty.rotation
+            if empty.scale is not None:
+                obj.scale = empty.scale
+        return
     
-def add_sound_event(obj, parts):
-    sound = obj.xp_sound_data.xp_sound_list[-1]
-    event = sound.event_list.add()
-    event.event_type = parts[0].split('_')[1]
-    if event.event_type != 'ALWAYS':
-        event.dataref_name = parts[1]
-        event.comparison_operator = parts[2] if len(parts) > 2 else '!='
-        event.comparison_value = float(parts[3]) if len(parts) > 3 else 0
-
-def add_snapshot_event(obj, parts):
-    snapshot = obj.xp_sound_data.xp_snapshot_list[-1]
-    event = snapshot.event_list.add()
-    event.event_type = parts[0].split('_')[1]
-    if event.event_type != 'ALWAYS':
-        event.dataref_name = parts[1]
-        event.comparison_operator = parts[2] if len(parts) > 2 else '!='
-        event.comparison_value = float(parts[3]) if len(parts) > 3 else 0
+    # Newly linked objects are appended at the end of collection.objects, planned
+    # empties without a transform keep the defaults of a new object
+    write_vectors(objects, 'location', first, [empty.location or (0.0, 0.0, 0.0) for empty in new_empties])
+    write_vectors(objects, 'rotation_euler', first, [empty.rotation or (0.0, 0.0, 0.0) for empty in new_empties])
+    write_vectors(objects, 'scale', first, [empty.scale or (1.0, 1.0, 1.0) for empty in new_empties])
+
+def populate_empties(plan):
+    "Writes sound data, sounds, snapshots and events to the created empties."
+    for empty in plan:
+        obj = empty.obj
+        xp_data = obj.xp_sound_data
+        if xp_data.event_type != empty.type:
+            xp_data.event_type = empty.type
+        if obj.name != empty.name:
+            obj.name = empty.name
+        if empty.space_index is not None:
+            xp_data.space_index = empty.space_index
+        if empty.blend_depth is not None:
+            xp_data.space_blend_depth = empty.blend_depth
+        write_sounds(xp_data.xp_sound_list, empty.sounds)
+        write_snapshots(xp_data.xp_snapshot_list, empty.snapshots)
 
 class XPSOUND_import_snd(bpy.types.Operator):
     bl_idname = "xpsound.import_snd"
     bl_label = "Import from .snd"
+    bl_options = {'REGISTER', 'UNDO'}
     
     filepath: bpy.props.StringProperty(subtype="FILE_PATH")
     filter_glob: bpy.props.StringProperty(
@@ -256,11 +442,115 @@ class XPSOUND_import_snd(bpy.types.Operator):
         description="Import Sound Attachments",
         default=True
     )
+    use_modal: bpy.props.BoolProperty(
+        name="Import in Background",
+        description="Keep Blender responsive and show the progress while importing, Esc cancels",
+        default=True
+    )
     
     def execute(self, context):
-        import_snd_file(context, self.filepath, self.group_by_position,
-                        self.import_spaces, self.import_snapshots, self.import_sounds)
+        xp_global = context.scene.xp_sound_global
+        self.stats = make_stats("import", xp_global.enable_profiling, bpy.app.tempdir if xp_global.profile_dump else None)
+        self.stats.start()
+        self.job = ImportJob(self.filepath, self.group_by_position, self.import_spaces,
+                             self.import_snapshots, self.import_sounds, self.stats)
+        
+        # Without a window (background mode, batch conversion) the file is imported synchronously
+        if bpy.app.background or not self.use_modal or context.window is None:
+            self.job.prepare()
+            self.job.parse()
+            if self.job.error is not None:
+                self.job.cancel()
+                self.stats.stop()
+                self.report({'ERROR'}, f"Failed to import {self.filepath}: {self.job.error}")
+                return {'CANCELLED'}
+            self.job.begin()
+            self.job.step()
+            self.stats.stop()
+            return self.finish(context)
+        
+        # Parse on a worker thread, objects are created on timer events of the modal handler
+        self.job.start()
+        wm = context.window_manager
+        self.timer = wm.event_timer_add(0.05, window=context.window)
+        wm.progress_begin(0, 100)
+        wm.modal_handler_add(self)
+        running_jobs.add(self.job)
+        self.update_progress(context)
+        return {'RUNNING_MODAL'}
+    
+    def modal(self, context, event):
+        job = self.job
+        if event.type == 'ESC':
+            job.cancel()
+            self.end_modal(context)
+            self.report({'WARNING'}, "Import cancelled")
+            return {'CANCELLED'}
+        
+        # Undoing would invalidate the objects of the plan, the undo shortcuts are blocked until the import ends
+        if event.type in {'Z', 'Y'} and (event.ctrl or event.oskey):
+            return {'RUNNING_MODAL'}
+        
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+        
+        if job.invalidated:
+            # Undo from a menu or a file load, the references of the plan can't be used for a rollback
+            job.cancelled = True
+            if job.thread is not None:
+                job.thread.join()
+            self.end_modal(context)
+            self.report({'ERROR'}, "Import stopped, the scene was undone or reloaded while importing")
+            return {'CANCELLED'}
+        
+        if job.plan is None:
+            if job.parsing():
+                self.update_progress(context)
+                return {'PASS_THROUGH'}
+            if job.error is not None:
+                job.cancel()
+                self.end_modal(context)
+                self.report({'ERROR'}, f"Failed to import {self.filepath}: {job.error}")
+                return {'CANCELLED'}
+        
+        try:
+            if not job.valid():
+                raise RuntimeError("the XPSounds collection or an object receiving sounds was removed")
+            if job.plan is None:
+                job.begin()
+            done = job.step(time.perf_counter() + IMPORT_TIME_SLICE)
+        except Exception as e:
+            job.cancel()
+            self.end_modal(context)
+            self.report({'ERROR'}, f"Failed to import {self.filepath}: {e}")
+            return {'CANCELLED'}
+        
+        if done:
+            self.end_modal(context)
+            return self.finish(context)
+        self.update_progress(context)
+        return {'PASS_THROUGH'}
+    
+    def update_progress(self, context):
+        percent = int(self.job.progress() * 100)
+        context.window_manager.progress_update(percent)
+        step = "Parsing" if self.job.plan is None else "Creating objects"
+        context.workspace.status_text_set(f"Importing {os.path.basename(self.filepath)}: {step} {percent}% (Esc to cancel)")
+    
+    def end_modal(self, context):
+        running_jobs.discard(self.job)
+        wm = context.window_manager
+        wm.event_timer_remove(self.timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+        self.stats.stop()
+    
+    def finish(self, context):
+        self.job.finish()
         self.report({'INFO'}, f"Imported sound events from {self.filepath}")
+        if context.scene.xp_sound_global.enable_profiling:
+            last_stats["import"] = self.stats
+            self.report({'INFO'}, self.stats.summary())
         return {'FINISHED'}
     
     def invoke(self, context, event):
@@ -271,16 +561,32 @@ class XPSOUND_import_snd(bpy.types.Operator):
         layout = self.layout
         layout.label(text="Options:")
         layout.prop(self, "group_by_position")
+        layout.prop(self, "use_modal")
         layout.label(text="Import Types:")
         layout.prop(self, "import_spaces")
         layout.prop(self, "import_snapshots")
         layout.prop(self, "import_sounds")
 
+# Imports running in a modal handler
+running_jobs = set()
+
+@bpy.app.handlers.persistent
+def invalidate_running_jobs(*args):
+    "Flags the running imports, undo and file loads invalidate the objects they refer to."
+    for job in running_jobs:
+        job.invalidated = True
+
 def register():
     bpy.utils.register_class(XPSOUND_import_snd)
+    bpy.app.handlers.undo_pre.append(invalidate_running_jobs)
+    bpy.app.handlers.redo_pre.append(invalidate_running_jobs)
+    bpy.app.handlers.load_pre.append(invalidate_running_jobs)
 
 def unregister():
     bpy.utils.unregister_class(XPSOUND_import_snd)
+    bpy.app.handlers.undo_pre.remove(invalidate_running_jobs)
+    bpy.app.handlers.redo_pre.remove(invalidate_running_jobs)
+    bpy.app.handlers.load_pre.remove(invalidate_running_jobs)
 
 if __name__ == "__main__":
     register()
\ No newline at end of file
@@ -0,0 +1,267 @@
+# Plain Python model of the sound setup.
+#
+# This module does not depend on bpy. Item classes use the attribute names of
+# the property groups in xpsound_props, so the serializer and any code that
+# only reads attributes accepts both. The converters read and write Blender
+# collections with foreach_get/foreach_set for the numeric properties, they
+# only need the collections themselves so bpy isn't imported here. Models can
+# be pickled and sent to worker processes.
+
+
+class EventModel:
+    "Plain copy of an XP_SOUND_EventItem."
+    __slots__ = ('event_type', 'dataref_name', 'comparison_operator', 'comparison_value')
+
+    def __init__(self, event_type='START', dataref_name='', comparison_operator='<', comparison_value=0.0):
+        self.event_type = event_type
+        self.dataref_name = dataref_name
+        self.comparison_operator = comparison_operator
+        self.comparison_value = comparison_value
+
+    def __repr__(self):
+        return f"EventModel({self.event_type!r}, {self.dataref_name!r}, {self.comparison_operator!r}, {self.comparison_value!r})"
+
+    def key(self):
+        return (self.event_type, self.dataref_name, self.comparison_operator, self.comparison_value)
+
+
+class SoundModel:
+    "Plain copy of an XP_SOUND_item, event_list is a list of EventModel and template a template name."
+    __slots__ = ('name', 'guid', 'event_param_idx', 'event_polyphonic', 'event_allowed_for_ai',
+                 'event_auto_end_from_start_cond', 'event_list', 'template')
+
+    def __init__(self, name="New Sound", guid="", event_param_idx=0, event_polyphonic=False,
+                 event_allowed_for_ai=False, event_auto_end_from_start_cond=False, event_list=None, template=""):
+        self.name = name
+        self.guid = guid
+        self.event_param_idx = event_param_idx
+        self.event_polyphonic = event_polyphonic
+        self.event_allowed_for_ai = event_allowed_for_ai
+        self.event_auto_end_from_start_cond = event_auto_end_from_start_cond
+        self.event_list = [] if event_list is None else event_list
+        self.template = template
+
+    def __repr__(self):
+        return f"SoundModel({self.name!r}, {self.guid!r}, events={len(self.event_list)})"
+
+    def key(self):
+        return (self.name, self.guid, self.event_param_idx, self.event_polyphonic, self.event_allowed_for_ai,
+                self.event_auto_end_from_start_cond, tuple(event.key() for event in self.event_list), self.template)
+
+
+class SnapshotModel:
+    "Plain copy of an XP_SNAPSHOT_item, event_list is a list of EventModel and template a template name."
+    __slots__ = ('name', 'guid', 'event_param_idx', 'event_auto_end_from_start_cond', 'event_list', 'template')
+
+    def __init__(self, name="New Snapshot", guid="", event_param_idx=0, event_auto_end_from_start_cond=False,
+                 event_list=None, template=""):
+        self.name = name
+        self.guid = guid
+        self.event_param_idx = event_param_idx
+        self.event_auto_end_from_start_cond = event_auto_end_from_start_cond
+        self.event_list = [] if event_list is None else event_list
+        self.template = template
+
+    def __repr__(self):
+        return f"SnapshotModel({self.name!r}, {self.guid!r}, events={len(self.event_list)})"
+
+    def key(self):
+        return (self.name, self.guid, self.event_param_idx, self.event_auto_end_from_start_cond,
+                tuple(event.key() for event in self.event_list), self.template)
+
+
+class EmitterModel:
+    "A sound, snapshot or space empty with its transform in Blender coordinates."
+    __slots__ = ('name', 'collection', 'visible', 'event_type', 'location', 'rotation', 'scale',
+                 'display_type', 'display_size', 'space_index', 'space_blend_depth', 'sounds', 'snapshots')
+
+    def __init__(self, name, collection="", event_type='NONE'):
+        self.name = name
+        self.collection = collection
+        self.visible = True
+        self.event_type = event_type
+        self.location = (0.0, 0.0, 0.0)
+        self.rotation = (0.0, 0.0, 0.0)
+        self.scale = (1.0, 1.0, 1.0)
+        self.display_type = 'PLAIN_AXES'
+        self.display_size = 1.0
+        self.space_index = 0
+        self.space_blend_depth = 0.0
+        self.sounds = []
+        self.snapshots = []
+
+    def __repr__(self):
+        return f"EmitterModel({self.name!r}, {self.event_type!r}, sounds={len(self.sounds)}, snapshots={len(self.snapshots)})"
+
+
+######################################################################################
+# PARSER RECORDS
+######################################################################################
+
+def event_from_record(record):
+    return EventModel(record.event_type, record.dataref_name, record.comparison_operator, record.comparison_value)
+
+
+def sound_from_record(record):
+    "Converts a parsed SOUND attachment, the sound is named after the last segment of its GUID."
+    return SoundModel(record.guid.split('/')[-1], record.guid, record.param_idx, record.polyphonic, record.allowed_for_ai,
+                      record.auto_end_from_start_cond, [event_from_record(event) for event in record.events])
+
+
+def snapshot_from_record(record):
+    "Converts a parsed SNAPSHOT attachment, the snapshot is named after the last segment of its GUID."
+    return SnapshotModel(record.guid.split('/')[-1], record.guid, record.param_idx, record.auto_end_from_start_cond,
+                         [event_from_record(event) for event in record.events])
+
+
+######################################################################################
+# BULK READS
+######################################################################################
+
+def read_values(collection, attribute, default=0, size=1):
+    "Reads a numeric attribute of every item with one foreach_get, vectors are returned as tuples."
+    values = [default] * (len(collection) * size)
+    collection.foreach_get(attribute, values)
+    if size == 1:
+        return values
+    return [tuple(values[i:i + size]) for i in range(0, len(values), size)]
+
+
+def read_flags(collection, attribute):
+    return [bool(value) for value in read_values(collection, attribute, False)]
+
+
+def read_events(event_list):
+    values = read_values(event_list, 'comparison_value', 0.0)
+    return [EventModel(event.event_type, event.dataref_name, event.comparison_operator, value)
+            for event, value in zip(event_list, values)]
+
+
+def read_sound(sound):
+    "Returns a SoundModel of a single XP_SOUND_item."
+    return SoundModel(sound.name, sound.guid, sound.event_param_idx, sound.event_polyphonic, sound.event_allowed_for_ai,
+                      sound.event_auto_end_from_start_cond, read_events(sound.event_list), sound.template)
+
+
+def read_sounds(sound_list):
+    "Returns a SoundModel for every item of an xp_sound_list."
+    param_idx = read_values(sound_list, 'event_param_idx')
+    polyphonic = read_flags(sound_list, 'event_polyphonic')
+    allowed_for_ai = read_flags(sound_list, 'event_allowed_for_ai')
+    auto_end = read_flags(sound_list, 'event_auto_end_from_start_cond')
+    return [SoundModel(sound.name, sound.guid, param_idx[i], polyphonic[i], allowed_for_ai[i], auto_end[i],
+                       read_events(sound.event_list), sound.template)
+            for i, sound in enumerate(sound_list)]
+
+
+def read_snapshots(snapshot_list):
+    "Returns a SnapshotModel for every item of an xp_snapshot_list."
+    param_idx = read_values(snapshot_list, 'event_param_idx')
+    auto_end = read_flags(snapshot_list, 'event_auto_end_from_start_cond')
+    return [SnapshotModel(snapshot.name, snapshot.guid, param_idx[i], auto_end[i], read_events(snapshot.event_list),
+                          snapshot.template)
+            for i, snapshot in enumerate(snapshot_list)]
+
+
+def read_templates(templates):
+    "Returns the events of every condition template keyed by template name."
+    return {template.name: read_events(template.event_list) for template in templates}
+
+
+def read_emitters(collection, hidden=False):
+    "Returns an EmitterModel for every sound empty directly in a collection, transforms are read in bulk."
+    objects = collection.objects
+    locations = read_values(objects, 'location', 0.0, 3)
+    rotations = read_values(objects, 'rotation_euler', 0.0, 3)
+    scales = read_values(objects, 'scale', 0.0, 3)
+    sizes = read_values(objects, 'empty_display_size', 0.0)
+
+    emitters = []
+    for i, obj in enumerate(objects):
+        if obj.type != 'EMPTY' or not hasattr(obj, "xp_sound_data"):
+            continue
+        xp_data = obj.xp_sound_data
+        if xp_data.event_type == 'NONE':
+            continue
+        emitter = EmitterModel(obj.name, collection.name, xp_data.event_type)
+        emitter.visible = not hidden and not obj.hide_get()
+        emitter.location = locations[i]
+        emitter.rotation = rotations[i]
+        emitter.scale = scales[i]
+        emitter.display_type = obj.empty_display_type
+        emitter.display_size = sizes[i]
+        emitter.space_index = xp_data.space_index
+        emitter.space_blend_depth = xp_data.space_blend_depth
+        emitter.sounds = read_sounds(xp_data.xp_sound_list)
+        emitter.snapshots = read_snapshots(xp_data.xp_snapshot_list)
+        emitters.append(emitter)
+    return emitters
+
+
+def read_scene(collection, hidden=False):
+    "Returns the EmitterModel of every sound empty below a collection, in export order."
+    hidden = hidden or collection.hide_viewport
+    emitters = read_emitters(collection, hidden)
+    for child in collection.children:
+        emitters.extend(read_scene(child, hidden))
+    return emitters
+
+
+######################################################################################
+# BULK WRITES
+######################################################################################
+
+def foreach_set_tail(collection, attribute, values):
+    "Bulk writes values to the last len(values) items of a property collection."
+    count = len(collection)
+    if count != len(values):
+        buffer = [0] * count
+        collection.foreach_get(attribute, buffer)
+        buffer[count - len(values):] = values
+        values = buffer
+    collection.foreach_set(attribute, values)
+
+
+def write_events(event_list, events):
+    "Appends events (EventModel or any object with the same attributes) to an event_list."
+    if not events:
+        return
+    for model in events:
+        event = event_list.add()
+        event.event_type = model.event_type
+        event.dataref_name = model.dataref_name
+        event.comparison_operator = model.comparison_operator
+    foreach_set_tail(event_list, 'comparison_value', [model.comparison_value for model in events])
+
+
+def write_sounds(sound_list, sounds):
+    "Appends SoundModel items to an xp_sound_list."
+    if not sounds:
+        return
+    for model in sounds:
+        sound = sound_list.add()
+        sound.guid = model.guid
+        sound.name = model.name
+        if model.template:
+            sound.template = model.template
+        write_events(sound.event_list, model.event_list)
+    foreach_set_tail(sound_list, 'event_param_idx', [model.event_param_idx for model in sounds])
+    foreach_set_tail(sound_list, 'event_polyphonic', [model.event_polyphonic for model in sounds])
+    foreach_set_tail(sound_list, 'event_allowed_for_ai', [model.event_allowed_for_ai for model in sounds])
+    foreach_set_tail(sound_list, 'event_auto_end_from_start_cond', [model.event_auto_end_from_start_cond for model in sounds])
+
+
+def write_snapshots(snapshot_list, snapshots):
+    "Appends SnapshotModel items to an xp_snapshot_list."
+    if not snapshots:
+        return
+    for model in snapshots:
+        snapshot = snapshot_list.add()
+        snapshot.guid = model.guid
+        snapshot.name = model.name
+        if model.template:
+            snapshot.template = model.template
+        write_events(snapshot.event_list, model.event_list)
+    foreach_set_tail(snapshot_list, 'event_param_idx', [model.event_param_idx for model in snapshots])
+    foreach_set_tail(snapshot_list, 'event_auto_end_from_start_cond', [model.event_auto_end_from_start_cond for model in snapshots])
+
@@ -1,5 +1,10 @@
 import bpy
-import os
+from .xpsound_model import read_sound, read_events, read_scene, read_templates, write_sounds, write_events
+from .xpsound_cluster import find_clusters
+from .xpsound_copy import read_struct, write_struct, check_struct, dumps_clipboard, loads_clipboard
+from .xpsound_query import ItemIndex
+from .xpsound_props import XP_SOUND_data, EVENT_TYPE_ITEMS, COMPARISON_OPERATOR_ITEMS, dataref_search, unique_template_name
+from .xpsound_status import get_guids_file_path, get_guid_catalog, refresh_dataref_index, file_change_callbacks
 
 ######################################################################################
 # SOUNDS
@@ -65,42 +70,33 @@ class XP_SOUND_OT_SOUND_COPY(bpy.types.Operator):
     bl_label = "Copy Sound"
     
     def execute(self, context):
-        obj = context.object
-        xp_sound = obj.xp_sound_data.xp_sound_list[obj.xp_sound_data.xp_sound_index]
-        copied_data = {
-            'name': xp_sound.name,
-            'guid': xp_sound.guid,
-            'event_auto_end_from_start_cond': xp_sound.event_auto_end_from_start_cond,
-            'event_polyphonic': xp_sound.event_polyphonic,
-            'event_allowed_for_ai': xp_sound.event_allowed_for_ai,
-            'event_param_idx': xp_sound.event_param_idx,
-            'events': [(event.event_type, event.dataref_name, event.comparison_operator, event.comparison_value) for event in xp_sound.event_list]
-        }
-        context.window_manager.clipboard = str(copied_data)
+        xp_data = context.object.xp_sound_data
+        if not 0 <= xp_data.xp_sound_index < len(xp_data.xp_sound_list):
+            self.report({'WARNING'}, "No sound selected")
+            return {'CANCELLED'}
+        xp_sound = xp_data.xp_sound_list[xp_data.xp_sound_index]
+        context.window_manager.clipboard = dumps_clipboard('SOUND', read_struct(xp_sound))
         return {'FINISHED'}
     
 # Operator to paste the selected sound
 class XP_SOUND_OT_SOUND_PASTE(bpy.types.Operator):
     bl_idname = "object.xp_sound_paste"
     bl_label = "Paste Sound"
+    bl_options = {'REGISTER', 'UNDO'}
     
     def execute(self, context):
-        obj = context.object
-        xp_sound = obj.xp_sound_data.xp_sound_list.add()
         try:
-            copied_data = eval(context.window_manager.clipboard)
-            xp_sound.name = copied_data['name']
-            xp_sound.guid = copied_data['guid']
-            xp_sound.event_auto_end_from_start_cond = copied_data['event_auto_end_from_start_cond']
-            xp_sound.event_polyphonic = copied_data['event_polyphonic']
-            xp_sound.event_allowed_for_ai = copied_data['event_allowed_for_ai']
-            xp_sound.event_param_idx = copied_data['event_param_idx']
-            # Copy events
-            for event_data in copied_data['events']:
-                event = xp_sound.event_list.add()
-                event.event_type, event.dataref_name, event.comparison_operator, event.comparison_value = event_data
-        except Exception as e:
+            copied_data = loads_clipboard(context.window_manager.clipboard, 'SOUND')
+        except ValueError as e:
+            self.report({'ERROR'}, f"Failed to paste sound: {e}")
+            return {'CANCELLED'}
+        sound_list = context.object.xp_sound_data.xp_sound_list
+        try:
+            write_struct(sound_list.add(), copied_data)
+        except (TypeError, ValueError, AttributeError) as e:
+            sound_list.remove(len(sound_list) - 1)
             self.report({'ERROR'}, f"Failed to paste sound: {e}")
+            return {'CANCELLED'}
         return {'FINISHED'}
 
 # Operator to duplicate the selected sound
@@ -115,22 +111,8 @@ class XP_SOUND_OT_SOUND_DUPLICATE(bpy.types.Operator):
         if self.index >= 0:
             xp_sound = obj.xp_sound_data.xp_sound_list[self.index]
             
-            # Duplicate the sound
-            new_xp_sound = obj.xp_sound_data.xp_sound_list.add()
-            new_xp_sound.name = xp_sound.name
-            new_xp_sound.guid = xp_sound.guid
-            new_xp_sound.event_auto_end_from_start_cond = xp_sound.event_auto_end_from_start_cond
-            new_xp_sound.event_polyphonic = xp_sound.event_polyphonic
-            new_xp_sound.event_allowed_for_ai = xp_sound.event_allowed_for_ai
-            new_xp_sound.event_param_idx = xp_sound.event_param_idx
-            
-            # Duplicate events
-            for event in xp_sound.event_list:
-                new_event = new_xp_sound.event_list.add()
-                new_event.event_type = event.event_type
-                new_event.dataref_name = event.dataref_name
-                new_event.comparison_Operator = event.comparison_operator
-                new_event.comparison_value = event.comparison_value
+            # Duplicate the sound and its events
+            write_sounds(obj.xp_sound_data.xp_sound_list, [read_sound(xp_sound)])
         return {'FINISHED'}
 
 
@@ -192,6 +174,600 @@ class XP_SOUND_OT_SNAPSHOT_EVENT_REMOVE(bpy.types.Operator):
             xp_snapshot.event_index = 0
         return {"FINISHED"}
 
+######################################################################################
+# CONDITION TEMPLATES
+######################################################################################
+
+def scene_items(scene):
+    "Yields every sound and snapshot item of the scene's objects."
+    for obj in scene.objects:
+        if obj.type == 'EMPTY':
+            xp_data = obj.xp_sound_data
+            yield from xp_data.xp_sound_list
+            yield from xp_data.xp_snapshot_list
+
+def active_item(obj):
+    "Returns the active sound or snapshot of an object, depending on its event type."
+    xp_data = obj.xp_sound_data
+    if xp_data.event_type == 'SOUND' and 0 <= xp_data.xp_sound_index < len(xp_data.xp_sound_list):
+        return xp_data.xp_sound_list[xp_data.xp_sound_index]
+    if xp_data.event_type == 'SNAPSHOT' and 0 <= xp_data.xp_snapshot_index < len(xp_data.xp_snapshot_list):
+        return xp_data.xp_snapshot_list[xp_data.xp_snapshot_index]
+    return None
+
+def events_key(event_list):
+    return tuple(event.key() for event in read_events(event_list))
+
+# Operator to add a condition template
+class XP_SOUND_OT_TEMPLATE_ADD(bpy.types.Operator):
+    "Add a condition template to the scene."
+    bl_idname = "xpsound.add_template"
+    bl_label = "Add Condition Template"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        xp_global = context.scene.xp_sound_global
+        template = xp_global.templates.add()
+        template.name = unique_template_name(xp_global.templates, "New Template", template)
+        template.linked_name = template.name
+        xp_global.template_index = len(xp_global.templates) - 1
+        return {'FINISHED'}
+
+# Operator to remove a condition template
+class XP_SOUND_OT_TEMPLATE_REMOVE(bpy.types.Operator):
+    "Remove a condition template, sounds and snapshots using it get its events back."
+    bl_idname = "xpsound.remove_template"
+    bl_label = "Remove Condition Template"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    index: bpy.props.IntProperty()
+
+    def execute(self, context):
+        xp_global = context.scene.xp_sound_global
+        template = xp_global.templates[self.index]
+        events = read_events(template.event_list)
+        
+        # Template events are written first, keep that order so the exported file doesn't change
+        for item in scene_items(context.scene):
+            if item.template == template.name:
+                own_events = read_events(item.event_list)
+                item.event_list.clear()
+                write_events(item.event_list, events + own_events)
+                item.template = ""
+        
+        xp_global.templates.remove(self.index)
+        xp_global.template_index = min(max(0, self.index - 1), len(xp_global.templates) - 1)
+        return {'FINISHED'}
+
+# Operator to add an event to the active condition template
+class XP_SOUND_OT_TEMPLATE_EVENT_ADD(bpy.types.Operator):
+    "Add an event to the active condition template."
+    bl_idname = "xpsound.add_template_event"
+    bl_label = "Add Template Event"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        xp_global = context.scene.xp_sound_global
+        if 0 <= xp_global.template_index < len(xp_global.templates):
+            template = xp_global.templates[xp_global.template_index]
+            template.event_list.add()
+            template.event_index = len(template.event_list) - 1
+        return {'FINISHED'}
+
+# Operator to remove an event from the active condition template
+class XP_SOUND_OT_TEMPLATE_EVENT_REMOVE(bpy.types.Operator):
+    "Remove an event from the active condition template."
+    bl_idname = "xpsound.remove_template_event"
+    bl_label = "Remove Template Event"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    index: bpy.props.IntProperty()
+
+    def execute(self, context):
+        xp_global = context.scene.xp_sound_global
+        if 0 <= xp_global.template_index < len(xp_global.templates):
+            template = xp_global.templates[xp_global.template_index]
+            template.event_list.remove(self.index)
+            template.event_index = 0
+        return {'FINISHED'}
+
+# Operator to turn the events of the active sound or snapshot into a template
+class XP_SOUND_OT_TEMPLATE_FROM_EVENTS(bpy.types.Operator):
+    "Move the events of the active sound or snapshot to a new condition template, shared by every item with the same events."
+    bl_idname = "xpsound.template_from_events"
+    bl_label = "Make Template"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        item = active_item(context.active_object)
+        if item is None or len(item.event_list) == 0:
+            self.report({'WARNING'}, "The active item has no events")
+            return {'CANCELLED'}
+        if item.template:
+            self.report({'WARNING'}, f"The active item already uses template '{item.template}'")
+            return {'CANCELLED'}
+        
+        events = read_events(item.event_list)
+        key = tuple(event.key() for event in events)
+        
+        # Name the template after its first dataref, Blender doesn't make collection item names unique
+        templates = context.scene.xp_sound_global.templates
+        base_name = events[0].dataref_name.split('/')[-1] or "Conditions"
+        name = unique_template_name(templates, base_name)
+        template = templates.add()
+        template.name = name
+        template.linked_name = name
+        write_events(template.event_list, events)
+        context.scene.xp_sound_global.template_index = len(templates) - 1
+        
+        # Replace the identical event lists of every other item without a template
+        count = 0
+        for other in scene_items(context.scene):
+            if not other.template and len(other.event_list) == len(events) and events_key(other.event_list) == key:
+                other.event_list.clear()
+                other.template = name
+                count += 1
+        
+        self.report({'INFO'}, f"Template '{name}' is now shared by {count} sounds and snapshots")
+        return {'FINISHED'}
+
+######################################################################################
+# SOUND SETUPS
+######################################################################################
+
+def selected_empties(context, exclude=None):
+    return [obj for obj in context.selected_objects if obj.type == 'EMPTY' and obj != exclude]
+
+def paste_setup(objects, data):
+    "Replaces the whole xp_sound_data of objects with a copied setup, returns the number of objects written."
+    count = 0
+    for obj in objects:
+        write_struct(obj.xp_sound_data, data)
+        count += 1
+    return count
+
+# Operator to copy the sounds, snapshots or space settings of the active object
+class XP_SOUND_OT_SETUP_COPY(bpy.types.Operator):
+    "Copy the whole sound setup of the active empty: type, sounds, snapshots, events and space settings."
+    bl_idname = "xpsound.copy_setup"
+    bl_label = "Copy Sound Setup"
+
+    @classmethod
+    def poll(cls, context):
+        return context.object is not None and context.object.type == 'EMPTY'
+
+    def execute(self, context):
+        context.window_manager.clipboard = dumps_clipboard('SETUP', read_struct(context.object.xp_sound_data))
+        return {'FINISHED'}
+
+# Operator to paste a sound setup to every selected empty
+class XP_SOUND_OT_SETUP_PASTE(bpy.types.Operator):
+    "Replace the sound setup of every selected empty with the copied one."
+    bl_idname = "xpsound.paste_setup"
+    bl_label = "Paste Sound Setup"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        objects = selected_empties(context)
+        
+        # Nothing is written unless the whole clipboard matches the sound data
+        try:
+            data = loads_clipboard(context.window_manager.clipboard, 'SETUP')
+            check_struct(XP_SOUND_data.bl_rna, data)
+        except ValueError as e:
+            self.report({'ERROR'}, f"Failed to paste sound setup: {e}")
+            return {'CANCELLED'}
+        
+        try:
+            count = paste_setup(objects, data)
+        except (TypeError, ValueError, AttributeError) as e:
+            # Some objects may already be written, finishing keeps the undo step
+            self.report({'ERROR'}, f"Failed to paste sound setup: {e}")
+            return {'FINISHED'}
+        self.report({'INFO'}, f"Pasted the sound setup to {count} empties")
+        return {'FINISHED'}
+
+# Operator to copy the active object's sound setup to the other selected empties
+class XP_SOUND_OT_SETUP_COPY_TO_SELECTED(bpy.types.Operator):
+    "Replace the sound setup of the other selected empties with the active empty's one."
+    bl_idname = "xpsound.copy_setup_to_selected"
+    bl_label = "Copy Sound Setup to Selected"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.object is not None and context.object.type == 'EMPTY'
+
+    def execute(self, context):
+        # Read once, written to every target
+        data = read_struct(context.object.xp_sound_data)
+        count = paste_setup(selected_empties(context, context.object), data)
+        self.report({'INFO'}, f"Copied the sound setup to {count} empties")
+        return {'FINISHED'}
+
+######################################################################################
+# CLEANUP
+######################################################################################
+
+def scene_emitters(scene):
+    "Returns the EmitterModel of every sound empty of the scene, objects linked in several collections once."
+    emitters = []
+    names = set()
+    for emitter in read_scene(scene.collection):
+        if emitter.name not in names:
+            names.add(emitter.name)
+            emitters.append(emitter)
+    return emitters
+
+# Operator to merge sounds exported several times at nearly the same place
+class XP_SOUND_OT_MERGE_SOUNDS(bpy.types.Operator):
+    "Remove sounds duplicating another sound with the same GUID, conditions and rotation within a distance, each one is an FMOD event instance in X-Plane."
+    bl_idname = "xpsound.merge_sounds"
+    bl_label = "Merge Coincident Sounds"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    tolerance: bpy.props.FloatProperty(name="Distance", description="Sounds closer than this to the kept sound are merged into it",
+                                       default=0.05, min=0.0, unit='LENGTH')
+    angle_tolerance: bpy.props.FloatProperty(name="Angle", description="Rotation difference in degrees still considered the same",
+                                             default=1.0, min=0.0, max=180.0)
+    delete_empty: bpy.props.BoolProperty(name="Delete Empty Emitters", description="Delete sound empties left without sounds, unless they have children",
+                                         default=True)
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        emitters = scene_emitters(context.scene)
+        clusters = find_clusters(emitters, self.tolerance, self.angle_tolerance)
+        if not clusters:
+            self.report({'INFO'}, "No coincident sounds found")
+            return {'CANCELLED'}
+        
+        # Remove from the end so the indices of the remaining sounds stay valid
+        removals = {}
+        for cluster in clusters:
+            for i, j in cluster.merged:
+                removals.setdefault(i, []).append(j)
+        
+        removed = 0
+        deleted = 0
+        for i, indices in removals.items():
+            obj = context.scene.objects[emitters[i].name]
+            xp_data = obj.xp_sound_data
+            for j in sorted(indices, reverse=True):
+                xp_data.xp_sound_list.remove(j)
+                removed += 1
+            xp_data.xp_sound_index = min(xp_data.xp_sound_index, len(xp_data.xp_sound_list) - 1)
+            if self.delete_empty and len(xp_data.xp_sound_list) == 0 and not obj.children:
+                bpy.data.objects.remove(obj)
+                deleted += 1
+        
+        self.report({'INFO'}, f"Removed {removed} sounds merged into {len(clusters)}, deleted {deleted} empty emitters")
+        return {'FINISHED'}
+
+######################################################################################
+# BATCH EDIT
+######################################################################################
+
+FLAG_ITEMS = [
+    ('KEEP', "Keep", "Leave the flag unchanged"),
+    ('ENABLE', "Enable", "Enable the flag"),
+    ('DISABLE', "Disable", "Disable the flag"),
+]
+
+# (index, object signatures, object count, template signature) of every scene keyed by pointer,
+# kept between runs of batch edit until the indexed XPSound data changes
+batch_indices = {}
+
+def items_signature(items):
+    "What the batch index reads of a sound or snapshot list: GUIDs, templates and event datarefs."
+    return tuple((item.guid, item.template, tuple(event.dataref_name for event in item.event_list)) for item in items)
+
+def object_signature(obj):
+    xp_data = obj.xp_sound_data
+    if xp_data.event_type == 'NONE':
+        return None
+    return (obj.name, items_signature(xp_data.xp_sound_list), items_signature(xp_data.xp_snapshot_list))
+
+def templates_signature(scene):
+    return tuple((template.name, tuple(event.dataref_name for event in template.event_list))
+                 for template in scene.xp_sound_global.templates)
+
+def get_batch_index(scene):
+    "Returns the cached ItemIndex of the sounds and snapshots of a scene, built again after a change."
+    key = scene.as_pointer()
+    entry = batch_indices.get(key)
+    # Removed objects send no update, they change the object count
+    if entry is None or entry[2] != len(scene.objects):
+        signatures = {obj.as_pointer(): object_signature(obj) for obj in scene.objects if obj.type == 'EMPTY'}
+        index = ItemIndex(scene_emitters(scene), read_templates(scene.xp_sound_global.templates))
+        entry = (index, signatures, len(scene.objects), templates_signature(scene))
+        batch_indices[key] = entry
+    return entry[0]
+
+@bpy.app.handlers.persistent
+def invalidate_batch_indices(scene, depsgraph=None):
+    if not batch_indices:
+        return
+    if depsgraph is None:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+    # Selections and transforms also update objects and scenes, only changed XPSound data drops an index
+    for update in depsgraph.updates:
+        id = update.id
+        if isinstance(id, bpy.types.Object) and id.type == 'EMPTY':
+            obj = id.original
+            pointer = obj.as_pointer()
+            signature = object_signature(obj)
+            for key, entry in list(batch_indices.items()):
+                if entry[1].get(pointer) != signature:
+                    del batch_indices[key]
+        elif isinstance(id, bpy.types.Scene):
+            key = id.original.as_pointer()
+            entry = batch_indices.get(key)
+            if entry is not None and entry[3] != templates_signature(id.original):
+                del batch_indices[key]
+
+@bpy.app.handlers.persistent
+def clear_batch_indices(*args):
+    batch_indices.clear()
+
+# Operator to edit every sound and snapshot matching a query
+class XP_SOUND_OT_BATCH_EDIT(bpy.types.Operator):
+    "Edit the flags and events of every sound and snapshot matching a GUID prefix and a dataref, in a single undo step."
+    bl_idname = "xpsound.batch_edit"
+    bl_label = "Batch Edit Sounds"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # Query
+    scope: bpy.props.EnumProperty(name="Scope", items=[
+        ('SELECTED', "Selected", "Sounds and snapshots of the selected empties"),
+        ('SCENE', "Scene", "Every sound and snapshot of the scene"),
+    ], default='SELECTED')
+    item_types: bpy.props.EnumProperty(name="Items", items=[
+        ('SOUND', "Sounds", ""),
+        ('SNAPSHOT', "Snapshots", ""),
+        ('BOTH', "Both", ""),
+    ], default='SOUND')
+    guid_prefix: bpy.props.StringProperty(name="GUID Starts With", description="Only items whose GUID starts with this, e.g. /engines/")
+    dataref: bpy.props.StringProperty(name="Uses Dataref", description="Only items whose own or template events use this dataref", **dataref_search)
+
+    # Item changes
+    polyphonic: bpy.props.EnumProperty(name="Polyphonic", items=FLAG_ITEMS, description="Sounds only")
+    allowed_for_ai: bpy.props.EnumProperty(name="Allowed for AI", items=FLAG_ITEMS, description="Sounds only")
+    auto_end: bpy.props.EnumProperty(name="Auto End from Start Cond", items=FLAG_ITEMS)
+    set_param_idx: bpy.props.BoolProperty(name="Set Param Idx")
+    param_idx: bpy.props.IntProperty(name="Param Idx")
+
+    # Changes of the item's own events using the queried dataref, template events are left to the template
+    new_dataref: bpy.props.StringProperty(name="Rename Dataref To", **dataref_search)
+    set_value: bpy.props.BoolProperty(name="Set Comparison Value")
+    comparison_value: bpy.props.FloatProperty(name="Comparison Value")
+    remove_events: bpy.props.BoolProperty(name="Remove Events", description="Remove the events using the queried dataref")
+
+    # Event added to every match
+    add_event: bpy.props.BoolProperty(name="Add Event")
+    event_type: bpy.props.EnumProperty(name="Event Type", items=EVENT_TYPE_ITEMS)
+    event_dataref: bpy.props.StringProperty(name="Dataref Name", **dataref_search)
+    comparison_operator: bpy.props.EnumProperty(name="Comparison Operator", items=COMPARISON_OPERATOR_ITEMS)
+    event_value: bpy.props.FloatProperty(name="Comparison Value")
+
+    def matches(self, context, index):
+        kinds = ('SOUND', 'SNAPSHOT') if self.item_types == 'BOTH' else (self.item_types,)
+        objects = {obj.name for obj in context.selected_objects} if self.scope == 'SELECTED' else None
+        return index.query(self.guid_prefix, self.dataref, kinds, objects)
+
+    def invoke(self, context, event):
+        # Built here so drawing the dialog only reads it
+        get_batch_index(context.scene)
+        return context.window_manager.invoke_props_dialog(self, width=400)
+
+    def draw(self, context):
+        layout = self.layout
+        col = layout.column()
+        col.prop(self, "scope")
+        col.prop(self, "item_types")
+        col.prop(self, "guid_prefix")
+        col.prop(self, "dataref")
+        entry = batch_indices.get(context.scene.as_pointer())
+        if entry is not None:
+            col.label(text=f"{len(self.matches(context, entry[0]))} matches", icon="VIEWZOOM")
+        
+        col = layout.column()
+        col.prop(self, "polyphonic")
+        col.prop(self, "allowed_for_ai")
+        col.prop(self, "auto_end")
+        row = col.row()
+        row.prop(self, "set_param_idx")
+        row.prop(self, "param_idx", text="")
+        
+        col = layout.column()
+        col.enabled = bool(self.dataref)
+        col.prop(self, "new_dataref")
+        row = col.row()
+        row.prop(self, "set_value")
+        row.prop(self, "comparison_value", text="")
+        col.prop(self, "remove_events")
+        
+        col = layout.column()
+        col.prop(self, "add_event")
+        if self.add_event:
+            col.prop(self, "event_type")
+            col.prop(self, "event_dataref")
+            row = col.row()
+            row.prop(self, "comparison_operator", text="")
+            row.prop(self, "event_value", text="")
+
+    def edit_item(self, item, kind):
+        "Applies the changes to a sound or snapshot, returns whether it was modified."
+        changed = False
+        flags = [("event_auto_end_from_start_cond", self.auto_end)]
+        if kind == 'SOUND':
+            flags += [("event_polyphonic", self.polyphonic), ("event_allowed_for_ai", self.allowed_for_ai)]
+        for attribute, mode in flags:
+            if mode != 'KEEP' and getattr(item, attribute) != (mode == 'ENABLE'):
+                setattr(item, attribute, mode == 'ENABLE')
+                changed = True
+        if self.set_param_idx and item.event_param_idx != self.param_idx:
+            item.event_param_idx = self.param_idx
+            changed = True
+        
+        if self.dataref and (self.new_dataref or self.set_value or self.remove_events):
+            # From the end so removals keep the remaining indices valid
+            for i in range(len(item.event_list) - 1, -1, -1):
+                event = item.event_list[i]
+                if event.dataref_name != self.dataref:
+                    continue
+                if self.remove_events:
+                    item.event_list.remove(i)
+                    changed = True
+                    continue
+                if self.new_dataref:
+                    event.dataref_name = self.new_dataref
+                    changed = True
+                if self.set_value and event.comparison_value != self.comparison_value:
+                    event.comparison_value = self.comparison_value
+                    changed = True
+            item.event_index = min(item.event_index, max(0, len(item.event_list) - 1))
+        
+        if self.add_event:
+            event = item.event_list.add()
+            event.event_type = self.event_type
+            event.dataref_name = self.event_dataref
+            event.comparison_operator = self.comparison_operator
+            event.comparison_value = self.event_value
+            changed = True
+        return changed
+
+    def execute(self, context):
+        # The redo panel runs execute again without invoke, after an undo that cleared the index
+        matches = self.matches(context, get_batch_index(context.scene))
+        objects = context.scene.objects
+        edited = 0
+        for name, kind, i in matches:
+            xp_data = objects[name].xp_sound_data
+            item = (xp_data.xp_sound_list if kind == 'SOUND' else xp_data.xp_snapshot_list)[i]
+            if self.edit_item(item, kind):
+                edited += 1
+        self.report({'INFO'}, f"Edited {edited} of {len(matches)} matching sounds and snapshots")
+        return {'FINISHED'}
+
+def update_parsed_events(context, catalog):
+    "Fills the window manager collections used by the GUID fields, returns False if they were up to date."
+    wm_catalog = context.window_manager.xp_sound_catalog
+    catalog_key = repr(catalog.key) if catalog else ""
+    if wm_catalog.catalog_key == catalog_key:
+        return False
+    
+    wm_catalog.parsed_events.clear()
+    wm_catalog.parsed_snapshots.clear()
+    if catalog:
+        for event_name in catalog.events:
+            wm_catalog.parsed_events.add().name = event_name
+        for snapshot_name in catalog.snapshots:
+            wm_catalog.parsed_snapshots.add().name = snapshot_name
+    wm_catalog.catalog_key = catalog_key
+    return True
+
+def refresh_guid_catalog(context):
+    "Loads GUIDS.txt through the catalog cache, returns (catalog, changed), catalog is None if the file is missing."
+    catalog = get_guid_catalog(context)
+    if catalog is not None:
+        # Build the search indices now rather than on the first keystroke
+        catalog.index('SOUND')
+        catalog.index('SNAPSHOT')
+    return catalog, update_parsed_events(context, catalog)
+
+@bpy.app.handlers.persistent
+def load_guid_catalog_on_load(dummy):
+    context = bpy.context
+    
+    # Files saved by older versions kept the parsed events in the scene
+    xp_global = context.scene.xp_sound_global
+    for key in ("parsed_events", "parsed_snapshots"):
+        if key in xp_global:
+            del xp_global[key]
+    
+    context.window_manager.xp_sound_catalog.catalog_key = ""
+    refresh_guid_catalog(context)
+    refresh_dataref_index(context)
+    
+    # Templates saved before renames were tracked
+    for scene in bpy.data.scenes:
+        for template in scene.xp_sound_global.templates:
+            if not template.linked_name:
+                template.linked_name = template.name
+
+def refresh_guid_catalog_on_change(context, status):
+    # GUIDS.txt was modified, added or removed on disk
+    if status.path == get_guids_file_path(context):
+        refresh_guid_catalog(context)
+
+def load_guid_catalog_on_register():
+    # Scene data isn't accessible while the addon registers, load on the first timer tick instead
+    if bpy.context.scene is not None:
+        refresh_guid_catalog(bpy.context)
+        refresh_dataref_index(bpy.context)
+    return None
+
+# Most entries listed by one page of the GUID browser
+BROWSE_LIMIT = 200
+
+# Popup listing a folder of the FMOD event or snapshot paths
+class XP_SOUND_OT_GUID_BROWSE(bpy.types.Operator):
+    "Browse the FMOD folders of GUIDS.txt and pick the event of the active sound or snapshot."
+    bl_idname = "xpsound.browse_guids"
+    bl_label = "Browse Event GUIDs"
+
+    kind: bpy.props.EnumProperty(items=[('SOUND', "Events", ""), ('SNAPSHOT', "Snapshots", "")])
+    folder: bpy.props.StringProperty(default="/")
+
+    def invoke(self, context, event):
+        if get_guid_catalog(context) is None:
+            self.report({'WARNING'}, "GUIDS.txt not found, set the FMOD directory")
+            return {'CANCELLED'}
+        return context.window_manager.invoke_popup(self, width=400)
+
+    def draw(self, context):
+        layout = self.layout
+        catalog = get_guid_catalog(context)
+        if catalog is None:
+            return
+        subfolders, paths = catalog.index(self.kind).browse(self.folder)
+        layout.label(text=self.folder, icon="FILE_FOLDER")
+        col = layout.column(align=True)
+        if self.folder != "/":
+            button = col.operator("xpsound.browse_guids", text="..", icon="FILE_PARENT")
+            button.kind = self.kind
+            button.folder = self.folder[:self.folder.rstrip("/").rindex("/") + 1]
+        for subfolder in subfolders[:BROWSE_LIMIT]:
+            button = col.operator("xpsound.browse_guids", text=subfolder[len(self.folder):], icon="FILE_FOLDER")
+            button.kind = self.kind
+            button.folder = subfolder
+        for path in paths[:max(0, BROWSE_LIMIT - len(subfolders))]:
+            col.operator("xpsound.pick_guid", text=path[len(self.folder):], icon="SPEAKER").guid = path
+        hidden = len(subfolders) + len(paths) - BROWSE_LIMIT
+        if hidden > 0:
+            col.label(text=f"{hidden} more, type in the GUID field to search them", icon="INFO")
+
+    def execute(self, context):
+        return {'FINISHED'}
+
+# Operator setting the GUID of the active sound or snapshot
+class XP_SOUND_OT_GUID_PICK(bpy.types.Operator):
+    "Use this event for the active sound or snapshot."
+    bl_idname = "xpsound.pick_guid"
+    bl_label = "Pick Event GUID"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    guid: bpy.props.StringProperty()
+
+    def execute(self, context):
+        item = active_item(context.object) if context.object else None
+        if item is None:
+            return {'CANCELLED'}
+        item.guid = self.guid
+        return {'FINISHED'}
+
 # Refresh the list of events from GUIDs file    
 class XP_SOUND_refresh_parsed_events(bpy.types.Operator):
     "Refreshes the list of parsed events from the GUIDS.txt file."
@@ -199,39 +775,15 @@ class XP_SOUND_refresh_parsed_events(bpy.types.Operator):
     bl_label = "Refresh Parsed Events"
 
     def execute(self, context):
-        obj = context.active_object
+        guids_file_path = get_guids_file_path(context)
+        catalog, changed = refresh_guid_catalog(context)
 
-        # Construct the path to the GUIDS.txt file
-        guids_file_path = bpy.path.abspath(os.path.join("//", context.scene.xp_sound_global.fmod_path, "GUIDS.txt"))
-        guids_file_path = os.path.normpath(guids_file_path)
-
-        # Clear the existing parsed events
-        context.scene.xp_sound_global.parsed_events.clear()
-        context.scene.xp_sound_global.parsed_snapshots.clear()
-
-        if os.path.exists(guids_file_path):
-            # Parse the GUIDS.txt file and add the events to the collection
-            with open(guids_file_path, "r") as file:
-                for line in file:
-                    line = line.strip()
-                    parts = line.split()
-                    if len(parts) > 1:
-                        guid = parts[0]
-                        name = " ".join(parts[1:])
-                        if "event:" in name:
-                            event_name = name[name.index("event:") + len("event:") :]
-                            new_event = context.scene.xp_sound_global.parsed_events.add()
-                            new_event.name = event_name
-                        if "snapshot:" in name:
-                            event_name = name[
-                                name.index("snapshot:") + len("snapshot:") :
-                            ]
-                            new_event = context.scene.xp_sound_global.parsed_snapshots.add()
-                            new_event.name = event_name
+        if catalog is None:
+            self.report({'WARNING'}, f"GUIDS file is missing at: {guids_file_path}")
+        elif changed:
             self.report({'INFO'}, f"Updated from GUIDS: {guids_file_path}")
-            
         else:
-            self.report({'WARNING'}, f"GUIDS file is missing at: {guids_file_path}")
+            self.report({'INFO'}, f"GUIDS unchanged: {guids_file_path}")
 
         return {"FINISHED"}
 
@@ -250,16 +802,45 @@ classes = (
     XP_SOUND_OT_SNAPSHOT_EVENT_ADD,
     XP_SOUND_OT_SNAPSHOT_EVENT_REMOVE,
 
+    XP_SOUND_OT_TEMPLATE_ADD,
+    XP_SOUND_OT_TEMPLATE_REMOVE,
+    XP_SOUND_OT_TEMPLATE_EVENT_ADD,
+    XP_SOUND_OT_TEMPLATE_EVENT_REMOVE,
+    XP_SOUND_OT_TEMPLATE_FROM_EVENTS,
+
+    XP_SOUND_OT_SETUP_COPY,
+    XP_SOUND_OT_SETUP_PASTE,
+    XP_SOUND_OT_SETUP_COPY_TO_SELECTED,
+
+    XP_SOUND_OT_MERGE_SOUNDS,
+    XP_SOUND_OT_BATCH_EDIT,
+
+    XP_SOUND_OT_GUID_BROWSE,
+    XP_SOUND_OT_GUID_PICK,
     XP_SOUND_refresh_parsed_events
 )
 
 def register():
     for cls in classes:
         bpy.utils.register_class(cls)
+    bpy.app.handlers.load_post.append(load_guid_catalog_on_load)
+    bpy.app.timers.register(load_guid_catalog_on_register, first_interval=0.1)
+    file_change_callbacks.append(refresh_guid_catalog_on_change)
+    bpy.app.handlers.depsgraph_update_post.append(invalidate_batch_indices)
+    bpy.app.handlers.load_post.append(clear_batch_indices)
+    bpy.app.handlers.undo_post.append(clear_batch_indices)
+    bpy.app.handlers.redo_post.append(clear_batch_indices)
            
 def unregister():
     for cls in classes:
         bpy.utils.unregister_class(cls)
+    bpy.app.handlers.load_post.remove(load_guid_catalog_on_load)
+    file_change_callbacks.remove(refresh_guid_catalog_on_change)
+    bpy.app.handlers.depsgraph_update_post.remove(invalidate_batch_indices)
+    bpy.app.handlers.load_post.remove(clear_batch_indices)
+    bpy.app.handlers.undo_post.remove(clear_batch_indices)
+    bpy.app.handlers.redo_post.remove(clear_batch_indices)
+    batch_indices.clear()
 
 if __name__ == "__main__":
     register()
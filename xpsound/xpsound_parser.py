@@ -0,0 +1,187 @@
+# Streaming parser for X-Plane .snd files.
+#
+# This module does not depend on bpy so it can be used from plain Python
+# (batch tools, worker processes) as well as from the Blender importer.
+# Files are read line by line and every line is tokenized exactly once,
+# records are yielded as soon as their END_* directive is reached.
+
+EVENT_KEYWORDS = {
+    'EVENT_START_COND': 'START',
+    'EVENT_END_COND': 'END',
+    'EVENT_ALWAYS': 'ALWAYS',
+}
+
+
+class SndEvent:
+    "A single EVENT_START_COND/EVENT_END_COND/EVENT_ALWAYS condition."
+    __slots__ = ('event_type', 'dataref_name', 'comparison_operator', 'comparison_value')
+
+    def __init__(self, event_type, dataref_name='', comparison_operator='!=', comparison_value=0.0):
+        self.event_type = event_type
+        self.dataref_name = dataref_name
+        self.comparison_operator = comparison_operator
+        self.comparison_value = comparison_value
+
+    def __repr__(self):
+        return f"SndEvent({self.event_type!r}, {self.dataref_name!r}, {self.comparison_operator!r}, {self.comparison_value!r})"
+
+
+class SndAttachment:
+    "A BEGIN_SOUND_ATTACHMENT block, type is 'SOUND' or 'SNAPSHOT'."
+    __slots__ = ('type', 'guid', 'position', 'phi', 'theta', 'psi', 'param_idx',
+                 'polyphonic', 'allowed_for_ai', 'auto_end_from_start_cond', 'events', 'line')
+
+    def __init__(self, line=0):
+        self.type = 'SOUND'
+        self.guid = None
+        # Position and angles are kept in X-Plane coordinates (VEH_XYZ, degrees)
+        self.position = None
+        self.phi = 0.0
+        self.theta = 0.0
+        self.psi = 0.0
+        self.param_idx = 0
+        self.polyphonic = False
+        self.allowed_for_ai = False
+        self.auto_end_from_start_cond = False
+        self.events = []
+        self.line = line
+
+    def __repr__(self):
+        return f"SndAttachment({self.type!r}, {self.guid!r}, events={len(self.events)})"
+
+
+class SndSpace:
+    "A BEGIN_SOUND_SPACE block, shape is 'AABB', 'SPHERE' or None."
+    __slots__ = ('type', 'space_index', 'blend_depth', 'shape', 'values', 'line')
+
+    def __init__(self, line=0):
+        self.type = 'SPACE'
+        self.space_index = None
+        self.blend_depth = None
+        # AABB: (minx, miny, minz, maxx, maxy, maxz), SPHERE: (x, y, z, radius)
+        self.shape = None
+        self.values = None
+        self.line = line
+
+    def __repr__(self):
+        return f"SndSpace({self.space_index!r}, {self.shape!r}, {self.values!r})"
+
+
+class SndDirective:
+    "Any line found outside of a block, e.g. REF_POINT_ACF or DISABLE_LEGACY_ALERT_SOUNDS."
+    __slots__ = ('type', 'keyword', 'args', 'line')
+
+    def __init__(self, keyword, args, line=0):
+        self.type = 'DIRECTIVE'
+        self.keyword = keyword
+        self.args = args
+        self.line = line
+
+    def __repr__(self):
+        return f"SndDirective({self.keyword!r}, {self.args!r})"
+
+
+class SndParseError(ValueError):
+    "Raised when a line inside a block can't be converted."
+
+    def __init__(self, line, message):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+
+def parse_event(parts):
+    event_type = EVENT_KEYWORDS[parts[0]]
+    event = SndEvent(event_type)
+    if len(parts) > 1:
+        event.dataref_name = parts[1]
+    if event_type != 'ALWAYS':
+        if len(parts) > 2:
+            event.comparison_operator = parts[2]
+        if len(parts) > 3:
+            event.comparison_value = float(parts[3])
+    return event
+
+
+def parse_attachment_line(record, keyword, parts):
+    if keyword == 'EVENT_NAME':
+        record.guid = parts[1]
+    elif keyword == 'SNAPSHOT_NAME':
+        record.type = 'SNAPSHOT'
+        record.guid = parts[1]
+    elif keyword == 'VEH_XYZ':
+        record.position = (float(parts[1]), float(parts[2]), float(parts[3]))
+    elif keyword == 'VEH_PSI':
+        record.psi = float(parts[1])
+    elif keyword == 'VEH_THETA':
+        record.theta = float(parts[1])
+    elif keyword == 'VEH_PHI':
+        record.phi = float(parts[1])
+    elif keyword == 'PARAM_DREF_IDX':
+        record.param_idx = int(parts[1])
+    elif keyword == 'EVENT_POLYPHONIC':
+        record.polyphonic = True
+    elif keyword == 'EVENT_ALLOWED_FOR_AI':
+        record.allowed_for_ai = True
+    elif keyword == 'EVENT_AUTO_END_FROM_START_COND':
+        record.auto_end_from_start_cond = True
+    elif keyword in EVENT_KEYWORDS:
+        record.events.append(parse_event(parts))
+
+
+def parse_space_line(record, keyword, parts):
+    if keyword == 'SOUND_INDEX':
+        record.space_index = int(parts[1])
+    elif keyword == 'BLEND_DEPTH':
+        record.blend_depth = float(parts[1])
+    elif keyword == 'AABB':
+        record.shape = 'AABB'
+        record.values = tuple(float(v) for v in parts[1:7])
+    elif keyword == 'SPHERE':
+        record.shape = 'SPHERE'
+        record.values = tuple(float(v) for v in parts[1:5])
+
+
+def iter_snd_records(lines):
+    "Yields SndDirective, SndSpace and SndAttachment records from an iterable of lines."
+    current = None
+    line_number = 0
+    for line_number, line in enumerate(lines, 1):
+        parts = line.split()
+        if not parts:
+            continue
+        keyword = parts[0]
+        if keyword[0] == '#':
+            continue
+
+        if keyword == 'BEGIN_SOUND_ATTACHMENT':
+            if current is not None:
+                yield current
+            current = SndAttachment(line_number)
+        elif keyword == 'BEGIN_SOUND_SPACE':
+            if current is not None:
+                yield current
+            current = SndSpace(line_number)
+        elif keyword == 'END_SOUND_ATTACHMENT' or keyword == 'END_SOUND_SPACE':
+            if current is not None:
+                yield current
+            current = None
+        elif current is None:
+            yield SndDirective(keyword, parts[1:], line_number)
+        else:
+            try:
+                if current.type == 'SPACE':
+                    parse_space_line(current, keyword, parts)
+                else:
+                    parse_attachment_line(current, keyword, parts)
+            except (IndexError, ValueError) as e:
+                raise SndParseError(line_number, f"invalid {keyword} line: {e}") from e
+
+    # Unterminated block at the end of the file
+    if current is not None:
+        yield current
+
+
+def parse_snd_file(filepath):
+    "Incrementally parses a .snd file, see iter_snd_records."
+    with open(filepath, 'r') as file:
+        yield from iter_snd_records(file)
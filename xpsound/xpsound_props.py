@@ -1,37 +1,72 @@
 import bpy
+from .xpsound_status import get_dataref_index, get_guid_catalog, refresh_dataref_index
+
+def search_datarefs(self, context, edit_text):
+    "Completion of dataref names from the scene's dataref catalog."
+    index = get_dataref_index(context)
+    if index is None:
+        return []
+    return [(name, index.entries[name].description()) for name in index.search(edit_text)]
+
+def search_guids(context, kind, edit_text):
+    "Ranked GUIDS.txt paths of a kind ('SOUND' or 'SNAPSHOT') matching the text."
+    catalog = get_guid_catalog(context)
+    if catalog is None:
+        return []
+    return catalog.index(kind).search(edit_text)
+
+def search_event_guids(self, context, edit_text):
+    return search_guids(context, 'SOUND', edit_text)
+
+def search_snapshot_guids(self, context, edit_text):
+    return search_guids(context, 'SNAPSHOT', edit_text)
+
+# Search-as-you-type completion of string properties needs Blender 3.3, suggestions allow any text
+# and leave out 'SORT' so results keep their ranking
+if bpy.app.version >= (3, 3, 0):
+    dataref_search = {"search": search_datarefs, "search_options": {'SUGGESTION'}}
+    event_guid_search = {"search": search_event_guids, "search_options": {'SUGGESTION'}}
+    snapshot_guid_search = {"search": search_snapshot_guids, "search_options": {'SUGGESTION'}}
+else:
+    dataref_search = event_guid_search = snapshot_guid_search = {}
+
+# Event and comparison choices, shared with the batch edit operator
+EVENT_TYPE_ITEMS = [
+    ("START", "Start", "Event start condition"),
+    ("END", "End", "Event end condition"),
+    ("ALWAYS", "Always", "Always play event"),
+    ("CUE_TRIGGER_COND", "Cue Trigger", "Sets conditions for cue triggering based on dataref"),
+    ("CMND_DOWN", "Command Down", "Event triggered on command press down"),
+    ("CMND_UP", "Command Up", "Event triggered on command release"),
+    ("CMND_HOLD_STOP", "Command Hold Stop", "Event triggered on command press and stopped on release"),
+    ("CMND_HOLD_CUE", "Command Hold Cue", "Event triggered on command press and cued on release"),
+]
+
+COMPARISON_OPERATOR_ITEMS = [
+    ("<", "<", ""),
+    ("<=", "<=", ""),
+    ("==", "==", ""),
+    ("!=", "!=", ""),
+    (">=", ">=", ""),
+    (">", ">", ""),
+]
 
 class XP_SOUND_EventItem(bpy.types.PropertyGroup):
     event_type: (
         bpy.props.EnumProperty(  # Type of the sound event (START, END, ALWAYS, etc.)
             name="Event Type",
-            items=[
-                ("START", "Start", "Event start condition"),
-                ("END", "End", "Event end condition"),
-                ("ALWAYS", "Always", "Always play event"),
-                ("CUE_TRIGGER_COND", "Cue Trigger", "Sets conditions for cue triggering based on dataref"),
-                ("CMND_DOWN", "Command Down", "Event triggered on command press down"),
-                ("CMND_UP", "Command Up", "Event triggered on command release"),
-                ("CMND_HOLD_STOP", "Command Hold Stop", "Event triggered on command press and stopped on release"),
-                ("CMND_HOLD_CUE", "Command Hold Cue", "Event triggered on command press and cued on release"),
-            ],
+            items=EVENT_TYPE_ITEMS,
         )
     )
 
     # Dataref name for the sound event condition
-    dataref_name: bpy.props.StringProperty(name="Dataref Name")  
+    dataref_name: bpy.props.StringProperty(name="Dataref Name", **dataref_search)  
 
     # Comparison operator for the dataref value
     comparison_operator: (
         bpy.props.EnumProperty(  
             name="Comparison Operator",
-            items=[
-                ("<", "<", ""),
-                ("<=", "<=", ""),
-                ("==", "==", ""),
-                ("!=", "!=", ""),
-                (">=", ">=", ""),
-                (">", ">", ""),
-            ],
+            items=COMPARISON_OPERATOR_ITEMS,
         )
     )
 
@@ -39,10 +74,52 @@ class XP_SOUND_EventItem(bpy.types.PropertyGroup):
     comparison_value: bpy.props.FloatProperty(name="Comparison Value")  
     
         
+# Named list of conditions stored once on the scene and referenced by sounds and snapshots
+def unique_template_name(templates, base_name, exclude=None):
+    "Returns base_name, or base_name.001, .002... if another template than exclude already uses it."
+    names = {template.name for template in templates if template != exclude}
+    name = base_name
+    suffix = 1
+    while name in names:
+        name = f"{base_name}.{suffix:03}"
+        suffix += 1
+    return name
+
+def rename_template(self, context):
+    "Keeps template names unique and moves the sounds and snapshots using the old name to the new one."
+    scene = self.id_data
+    templates = scene.xp_sound_global.templates
+    name = unique_template_name(templates, self.name, self)
+    if name != self.name:
+        # Runs this callback again with the unique name
+        self.name = name
+        return
+    old_name = self.linked_name
+    self.linked_name = name
+    if not old_name or old_name == name:
+        return
+    for obj in scene.objects:
+        if obj.type == 'EMPTY':
+            xp_data = obj.xp_sound_data
+            for item in (*xp_data.xp_sound_list, *xp_data.xp_snapshot_list):
+                if item.template == old_name:
+                    item.template = name
+
+class XP_SOUND_template(bpy.types.PropertyGroup):
+    name: bpy.props.StringProperty(name="Template Name", default="New Template", update=rename_template)
+    
+    # Name the sounds and snapshots refer to, follows renames of the template
+    linked_name: bpy.props.StringProperty(options={'HIDDEN'})
+
+    # List
+    event_list: bpy.props.CollectionProperty(type=XP_SOUND_EventItem)
+    event_index: bpy.props.IntProperty()
+
 # Define the PropertyGroup for snapshot objects
 class XP_SNAPSHOT_item(bpy.types.PropertyGroup):
-    guid: bpy.props.StringProperty(name="Event GUID", default="")
+    guid: bpy.props.StringProperty(name="Event GUID", default="", **snapshot_guid_search)
     name: bpy.props.StringProperty(name="Snapshot Name", default="New Snapshot")
+    template: bpy.props.StringProperty(name="Condition Template", description="Shared conditions written before the snapshot's own events")
 
     event_param_idx: bpy.props.IntProperty(name="Event Param Idx", description="Index of the parameter dataref for the sound event")
     event_auto_end_from_start_cond: bpy.props.BoolProperty(name="Event Auto End from Start Cond", description="Whether the sound event auto ends from start condition")
@@ -53,8 +130,9 @@ class XP_SNAPSHOT_item(bpy.types.PropertyGroup):
 
 # Define the PropertyGroup for sound objects
 class XP_SOUND_item(bpy.types.PropertyGroup):
-    guid: bpy.props.StringProperty(name="Event GUID", default="")
+    guid: bpy.props.StringProperty(name="Event GUID", default="", **event_guid_search)
     name: bpy.props.StringProperty(name="Sound Name", default="New Sound")
+    template: bpy.props.StringProperty(name="Condition Template", description="Shared conditions written before the sound's own events")
 
     event_param_idx: bpy.props.IntProperty(name="Event Param Idx", description="Index of the parameter dataref for the sound event")
     event_polyphonic: bpy.props.BoolProperty(name="Event Polyphonic", description="Whether the sound event is polyphonic")
@@ -94,25 +172,54 @@ class XP_SOUND_data(bpy.types.PropertyGroup):
 def refresh_parsed_events_on_path_change(self, context):
     bpy.ops.object.xp_sound_refresh_parsed_events()
 
+def refresh_datarefs_on_path_change(self, context):
+    refresh_dataref_index(context)
+
 class XP_SOUND_global(bpy.types.PropertyGroup):
     # Aircraft Reference Point
     ref_point_y: bpy.props.FloatProperty(name="Ref Point Y", description="Vertical Reference", unit="LENGTH")
     ref_point_z: bpy.props.FloatProperty(name="Ref Point Z", description="Longitudinal Reference", unit="LENGTH")    
     
-    # Parsed items from GUIDS.txt
-    parsed_events: bpy.props.CollectionProperty(type=bpy.types.PropertyGroup)
-    parsed_snapshots: bpy.props.CollectionProperty(type=bpy.types.PropertyGroup)    
-    
     # Paths
     snd_filename: bpy.props.StringProperty(name="SND FILENAME", default="aircraft.snd", description="This is the .snd filename, example: aircraft.snd")
     fmod_path: bpy.props.StringProperty(name="FMOD PATH", default="", update=refresh_parsed_events_on_path_change, description="Set this path to aircraft FMOD folder, example: ../fmod/")    
     
+    # Dataref catalogs used for completion and validation
+    datarefs_file: bpy.props.StringProperty(name="DataRefs File", subtype="FILE_PATH", update=refresh_datarefs_on_path_change, description="X-Plane's Resources/plugins/DataRefs.txt")
+    custom_datarefs_file: bpy.props.StringProperty(name="Custom DataRefs File", subtype="FILE_PATH", update=refresh_datarefs_on_path_change, description="Dataref list of plugins, in DataRefs.txt format or one name per line")
+    validate_export: bpy.props.BoolProperty(name="Validate on Export", description="Check spaces, emitters and GUIDs on export: overlapping spaces with the same index, emitters outside every space, duplicate attachments, empty and unknown GUIDs", default=True)
+    validate_datarefs: bpy.props.BoolProperty(name="Validate DataRefs", description="Warn about datarefs missing from the dataref files on export", default=True)
+    
+    # Keep parsed GUIDS.txt in a sidecar file next to it
+    guid_cache_file: bpy.props.BoolProperty(name="Cache GUIDs File", description="Store the parsed GUIDS.txt in a sidecar file so new sessions don't parse it again", default=False)
+    
+    # Condition templates
+    templates: bpy.props.CollectionProperty(type=XP_SOUND_template)
+    template_index: bpy.props.IntProperty()
+    
     # Global event properties
     disable_legacy_alerts: bpy.props.BoolProperty(name="Disable Legacy Alert Sounds")    
     
+    # Reuse serialized blocks of objects that didn't change since the last export
+    incremental_export: bpy.props.BoolProperty(name="Incremental Export", description="Only serialize objects that changed since the last export", default=True)
+    
     # Helper that draw arrow to show direction
     draw_helper: bpy.props.BoolProperty(name="Draw Helper", description="Display an arrow on the selected empty pointing on sound direction", default=False)
+    draw_all_emitters: bpy.props.BoolProperty(name="All Emitters", description="Display the direction arrow of every sound emitter in the scene", default=False)
+    draw_spaces: bpy.props.BoolProperty(name="Sound Spaces", description="Display every sound space and its blend depth, colored by space index", default=False)
+    
+    # Instrumentation of import and export
+    enable_profiling: bpy.props.BoolProperty(name="Profiling", description="Time each import/export phase and show the statistics", default=False)
+    profile_dump: bpy.props.BoolProperty(name="cProfile Dump", description="Also write a cProfile dump of each import/export to Blender's temporary directory", default=False)
     
+# Parsed items from GUIDS.txt, kept on the window manager so they aren't saved in the .blend
+class XP_SOUND_catalog(bpy.types.PropertyGroup):
+    parsed_events: bpy.props.CollectionProperty(type=bpy.types.PropertyGroup)
+    parsed_snapshots: bpy.props.CollectionProperty(type=bpy.types.PropertyGroup)
+    
+    # Key of the GUIDS.txt file (path, size, mtime) the collections were filled from
+    catalog_key: bpy.props.StringProperty()
+
 def add_parsed_event(self, context):
     event = self.parsed_events.add()
     event.name = ""
@@ -126,13 +233,16 @@ def add_parsed_snapshot(self, context):
 
 def register():
     bpy.utils.register_class(XP_SOUND_EventItem)
+    bpy.utils.register_class(XP_SOUND_template)
     bpy.utils.register_class(XP_SNAPSHOT_item)
     bpy.utils.register_class(XP_SOUND_item)
     bpy.utils.register_class(XP_SOUND_data)
     bpy.utils.register_class(XP_SOUND_global)
+    bpy.utils.register_class(XP_SOUND_catalog)
     
     # Global
     bpy.types.Scene.xp_sound_global = bpy.props.PointerProperty(type=XP_SOUND_global)
+    bpy.types.WindowManager.xp_sound_catalog = bpy.props.PointerProperty(type=XP_SOUND_catalog)
     
     # Object Data
     bpy.types.Object.xp_sound_data = bpy.props.PointerProperty(type=XP_SOUND_data)
@@ -140,8 +250,11 @@ def register():
 def unregister():
     bpy.utils.unregister_class(XP_SNAPSHOT_item)
     bpy.utils.unregister_class(XP_SOUND_EventItem)
+    bpy.utils.unregister_class(XP_SOUND_template)
     bpy.utils.unregister_class(XP_SOUND_item)
     bpy.utils.unregister_class(XP_SOUND_data)
+    bpy.utils.unregister_class(XP_SOUND_catalog)
+    del bpy.types.WindowManager.xp_sound_catalog
 
 if __name__ == "__main__":
     register()
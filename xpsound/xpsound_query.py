@@ -0,0 +1,125 @@
+# Index of sounds and snapshots by GUID and dataref for batch edits.
+#
+# This module does not depend on bpy. The index is built from the
+# EmitterModel list of xpsound_model.read_scene. GUIDs are kept sorted so a
+# GUID prefix is a bisect range, datarefs map to the items whose own or
+# template events use them. Items are (object name, 'SOUND' or 'SNAPSHOT',
+# index in the object's list), a query only intersects posting lists.
+# ListIndex caches the sort orders and search results of a single list for
+# the UI lists' filter_items.
+
+import bisect
+
+
+class ItemIndex:
+    "Sounds and snapshots of a list of EmitterModel, templates maps template names to their events."
+
+    def __init__(self, emitters, templates=None):
+        self.items = []
+        self.by_guid = {}
+        self.by_dataref = {}
+        template_datarefs = {name: {event.dataref_name for event in events} for name, events in (templates or {}).items()}
+        for emitter in emitters:
+            for kind, items in (('SOUND', emitter.sounds), ('SNAPSHOT', emitter.snapshots)):
+                for i, item in enumerate(items):
+                    entry = (emitter.name, kind, i)
+                    self.items.append(entry)
+                    self.by_guid.setdefault(item.guid, []).append(entry)
+                    datarefs = {event.dataref_name for event in item.event_list}
+                    datarefs.update(template_datarefs.get(item.template, ()))
+                    for dataref in datarefs:
+                        if dataref:
+                            self.by_dataref.setdefault(dataref, []).append(entry)
+        self.guids = sorted(self.by_guid)
+
+    def __len__(self):
+        return len(self.items)
+
+    def guid_entries(self, prefix):
+        "Returns the items whose GUID starts with prefix."
+        entries = []
+        for i in range(bisect.bisect_left(self.guids, prefix), len(self.guids)):
+            guid = self.guids[i]
+            if not guid.startswith(prefix):
+                break
+            entries.extend(self.by_guid[guid])
+        return entries
+
+    def query(self, guid_prefix="", dataref="", kinds=('SOUND', 'SNAPSHOT'), objects=None):
+        "Returns the sorted items whose GUID starts with guid_prefix and whose events use dataref, empty criteria match all."
+        candidates = None
+        if dataref:
+            candidates = set(self.by_dataref.get(dataref, ()))
+        if guid_prefix:
+            entries = self.guid_entries(guid_prefix)
+            candidates = set(entries) if candidates is None else candidates.intersection(entries)
+        if candidates is None:
+            candidates = self.items
+        return sorted(entry for entry in candidates
+                      if entry[1] in kinds and (objects is None or entry[0] in objects))
+
+
+def fuzzy_match(pattern, text):
+    "Whether the characters of pattern appear in text in the same order."
+    position = 0
+    for char in pattern:
+        position = text.find(char, position) + 1
+        if position == 0:
+            return False
+    return True
+
+
+class ListIndex:
+    "Names, GUIDs and event counts of a sound or snapshot list with cached sort orders and filter results."
+
+    # Sort keys of the list's sort_by choices
+    SORT_KEYS = {
+        'NAME': lambda index, i: (index.lower_names[i], i),
+        'GUID': lambda index, i: (index.lower_guids[i], i),
+        'EVENTS': lambda index, i: (index.event_counts[i], index.lower_names[i], i),
+    }
+
+    def __init__(self, names, guids, event_counts):
+        self.lower_names = [name.lower() for name in names]
+        self.lower_guids = [guid.lower() for guid in guids]
+        self.event_counts = event_counts
+        self.missing_guids = [not guid for guid in guids]
+        self.orders = {}
+        self.last_filter = None
+        self.last_matches = None
+
+    def __len__(self):
+        return len(self.lower_names)
+
+    def order(self, sort_by, reverse=False):
+        "Returns the new position of every item, as UIList.filter_items expects it, or [] to keep the list order."
+        if sort_by not in self.SORT_KEYS:
+            return []
+        key = (sort_by, reverse)
+        order = self.orders.get(key)
+        if order is None:
+            sort_key = self.SORT_KEYS[sort_by]
+            sorted_items = sorted(range(len(self)), key=lambda i: sort_key(self, i), reverse=reverse)
+            order = [0] * len(self)
+            for position, i in enumerate(sorted_items):
+                order[i] = position
+            self.orders[key] = order
+        return order
+
+    def matches(self, text, missing_guid_only=False):
+        "Returns whether each item matches a name or GUID search, substring or fuzzy, and the missing GUID filter."
+        text = text.lower()
+        key = (text, missing_guid_only)
+        if key == self.last_filter:
+            return self.last_matches
+        matches = []
+        for name, guid, missing in zip(self.lower_names, self.lower_guids, self.missing_guids):
+            if missing_guid_only and not missing:
+                matches.append(False)
+            elif not text or text in name or text in guid:
+                matches.append(True)
+            else:
+                matches.append(fuzzy_match(text, name) or fuzzy_match(text, guid))
+        self.last_filter = key
+        self.last_matches = matches
+        return matches
@@ -0,0 +1,153 @@
+# Text formatting of .snd blocks.
+#
+# This module does not depend on bpy, the exporter passes Blender objects and
+# property groups but any object with the same attributes can be serialized.
+# Every block is built in a single formatting step and returned as one string
+# so callers can collect fragments in lists and write them with writelines.
+
+import math
+
+HEADER = "A\n1000\nACF_SOUNDS\n\n"
+
+SECTION_TITLES = (
+    ('SPACE', "############## \n### SPACES ### \n############## \n\n"),
+    ('SNAPSHOT', "################# \n### SNAPSHOTS ### \n################# \n\n"),
+    ('SOUND', "############## \n### SOUNDS ### \n############## \n\n"),
+)
+
+POLYPHONIC_LINE = "\tEVENT_POLYPHONIC\n"
+ALLOWED_FOR_AI_LINE = "\tEVENT_ALLOWED_FOR_AI\n"
+AUTO_END_LINE = "\tEVENT_AUTO_END_FROM_START_COND\n"
+
+
+def format_header(ref_point_y, ref_point_z, disable_legacy_alerts):
+    "Formats the file header, legacy alerts directive and reference point."
+    legacy = "DISABLE_LEGACY_ALERT_SOUNDS \n" if disable_legacy_alerts else ""
+    return f"{HEADER}{legacy}REF_POINT_ACF {ref_point_y} {ref_point_z} \n\n"
+
+
+def format_footer(plugin_name, plugin_version):
+    return f"### Generated by {plugin_name} -> Version:{plugin_version}\n\n"
+
+
+def format_transform(location, rotation):
+    "Formats the VEH_XYZ and VEH_PHI/THETA/PSI lines from a Blender location and rotation."
+    x, y, z = location
+    return format_veh_transform((x, z, -y), (math.degrees(rotation[0]), math.degrees(rotation[1]), math.degrees(rotation[2])))
+
+
+def format_veh_transform(position, angles):
+    "Formats the VEH_XYZ and VEH_PHI/THETA/PSI lines, shared by every sound of an object."
+    x, y, z = position
+    text = f"\tVEH_XYZ {round(x, 4)} {round(y, 4)} {round(z, 4)}\n"
+
+    # Roll, pitch and heading in degrees
+    phi, theta, psi = angles
+    if phi != 0:
+        text += f"\tVEH_PHI {round(phi, 2)}\n"
+    if theta != 0:
+        text += f"\tVEH_THETA {round(theta, 2)}\n"
+    if psi != 0:
+        text += f"\tVEH_PSI {round(psi, 2)}\n"
+    return text
+
+
+def format_event(event):
+    event_type = event.event_type
+    if event_type == "START":
+        return f"\tEVENT_START_COND {event.dataref_name} {event.comparison_operator} {round(event.comparison_value, 4)}\n"
+    if event_type == "END":
+        return f"\tEVENT_END_COND {event.dataref_name} {event.comparison_operator} {round(event.comparison_value, 4)}\n"
+    if event_type == "ALWAYS":
+        return f"\tEVENT_ALWAYS {event.dataref_name}\n"
+    if event_type.startswith("CMND"):
+        return f"\tEVENT_COMMAND {event_type}\n"
+    return ""
+
+
+def format_events(event_list):
+    return "".join([format_event(event) for event in event_list])
+
+
+def format_sound_attachment(comment, transform, sound, template_events=""):
+    "Formats a sound as a BEGIN_SOUND_ATTACHMENT block, transform and template_events are already formatted lines."
+    polyphonic = POLYPHONIC_LINE if sound.event_polyphonic else ""
+    allowed_for_ai = ALLOWED_FOR_AI_LINE if sound.event_allowed_for_ai else ""
+    auto_end = AUTO_END_LINE if sound.event_auto_end_from_start_cond else ""
+    return (
+        f"# {comment} -> {sound.name}\n"
+        f"BEGIN_SOUND_ATTACHMENT\n"
+        f"\tEVENT_NAME {sound.guid}\n"
+        f"{transform}"
+        f"\tPARAM_DREF_IDX {sound.event_param_idx}\n"
+        f"{polyphonic}{allowed_for_ai}{template_events}{format_events(sound.event_list)}{auto_end}"
+        f"END_SOUND_ATTACHMENT\n\n"
+    )
+
+
+def format_snapshot_attachment(comment, snapshot, template_events=""):
+    "Formats a snapshot as a BEGIN_SOUND_ATTACHMENT block, template_events are the lines of its condition template."
+    auto_end = AUTO_END_LINE if snapshot.event_auto_end_from_start_cond else ""
+    return (
+        f"# {comment} -> {snapshot.name}\n"
+        f"BEGIN_SOUND_ATTACHMENT\n"
+        f"\tSNAPSHOT_NAME {snapshot.guid}\n"
+        f"\tPARAM_DREF_IDX {snapshot.event_param_idx}\n"
+        f"{template_events}{format_events(snapshot.event_list)}{auto_end}"
+        f"END_SOUND_ATTACHMENT\n\n"
+    )
+
+
+def space_shape(display_type, location, scale, display_size):
+    "Returns the X-Plane shape ('AABB', 'SPHERE' or None) and values of a CUBE or SPHERE empty."
+    if display_type == "CUBE":
+        # Bounding box dimensions
+        minx = location[0] - display_size * scale[0]
+        miny = location[2] - display_size * scale[2]
+        minz = -location[1] - display_size * scale[1]
+        maxx = location[0] + display_size * scale[0]
+        maxy = location[2] + display_size * scale[2]
+        maxz = -location[1] + display_size * scale[1]
+        return 'AABB', (minx, miny, minz, maxx, maxy, maxz)
+    if display_type == "SPHERE":
+        # Sphere center and radius
+        return 'SPHERE', (location[0], location[2], location[1], display_size)
+    return None, ()
+
+
+def format_sound_space(comment, space_index, blend_depth, display_type, location, scale, display_size):
+    "Formats a BEGIN_SOUND_SPACE block from a CUBE (AABB) or SPHERE empty."
+    shape, values = space_shape(display_type, location, scale, display_size)
+    return format_space(comment, space_index, blend_depth, shape, values)
+
+
+def format_space(comment, space_index, blend_depth, shape, values):
+    "Formats a BEGIN_SOUND_SPACE block from X-Plane AABB or SPHERE values."
+    if shape == 'AABB':
+        minx, miny, minz, maxx, maxy, maxz = values
+        shape = f"\tAABB {round(minx, 4)} {round(miny, 4)} {round(minz, 4)} {round(maxx, 4)} {round(maxy, 4)} {round(maxz, 4)}\n"
+    elif shape == 'SPHERE':
+        x, y, z, radius = values
+        shape = f"\tSPHERE {round(x, 4)} {round(y, 4)} {round(z, 4)} {radius}\n"
+    else:
+        shape = ""
+
+    return (
+        f"# {comment}\n"
+        "BEGIN_SOUND_SPACE\n"
+        f"\tSOUND_INDEX {space_index}\n"
+        f"\tBLEND_DEPTH {blend_depth}\n"
+        f"{shape}"
+        "END_SOUND_SPACE\n\n"
+    )
+
+
+def write_sections(f, header, sections, footer):
+    "Streams the header, every non-empty section and the footer to an open file."
+    f.write(header)
+    for key, title in SECTION_TITLES:
+        fragments = sections[key]
+        if fragments:
+            f.write(title)
+            f.writelines(fragments)
+    f.write(footer)
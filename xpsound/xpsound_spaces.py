@@ -0,0 +1,152 @@
+# Geometry of sound spaces.
+#
+# This module does not depend on bpy. Volumes are built from the same values
+# export_sound_space writes: CUBE empties become an AABB centered on the
+# object location with half extents empty_display_size * scale, SPHERE
+# empties a sphere of radius empty_display_size. Coordinates are Blender's.
+# SpaceIndex answers which spaces contain a point, with their blend weight.
+
+import math
+
+
+class SpaceVolume:
+    "AABB or sphere of a SPACE object, extent is the half extents (AABB) or the radius (SPHERE)."
+    __slots__ = ('name', 'space_index', 'blend_depth', 'shape', 'center', 'extent')
+
+    def __init__(self, name, space_index, blend_depth, shape, center, extent):
+        self.name = name
+        self.space_index = space_index
+        self.blend_depth = blend_depth
+        self.shape = shape
+        self.center = center
+        self.extent = extent
+
+    def __repr__(self):
+        return f"SpaceVolume({self.name!r}, {self.space_index}, {self.shape!r}, {self.center!r}, {self.extent!r})"
+
+    def bounds(self):
+        "Returns the (min, max) corners of the volume's bounding box."
+        cx, cy, cz = self.center
+        if self.shape == 'AABB':
+            hx, hy, hz = self.extent
+        else:
+            hx = hy = hz = self.extent
+        return (cx - hx, cy - hy, cz - hz), (cx + hx, cy + hy, cz + hz)
+
+    def inset(self, distance):
+        "Returns the half extents or radius shrunk by distance, clamped to zero."
+        if self.shape == 'AABB':
+            return tuple(max(0.0, h - distance) for h in self.extent)
+        return max(0.0, self.extent - distance)
+
+
+    def contains(self, point):
+        "Returns True if the point is inside the volume or on its boundary."
+        if self.shape == 'AABB':
+            return all(abs(p - c) <= h for p, c, h in zip(point, self.center, self.extent))
+        return sum((p - c) ** 2 for p, c in zip(point, self.center)) <= self.extent ** 2
+
+    def depth(self, point):
+        "Returns how far inside the volume the point is, negative outside."
+        if self.shape == 'AABB':
+            return min(h - abs(p - c) for p, c, h in zip(point, self.center, self.extent))
+        return self.extent - math.sqrt(sum((p - c) ** 2 for p, c in zip(point, self.center)))
+
+    def weight(self, point):
+        "Returns the blend weight of a point inside the volume, 0 on the boundary up to 1 at blend_depth inside."
+        depth = self.depth(point)
+        if depth < 0.0:
+            return 0.0
+        if self.blend_depth <= 0.0:
+            return 1.0
+        return min(1.0, depth / self.blend_depth)
+
+    def overlaps(self, other):
+        "Returns True if both volumes share some space, touching boundaries don't count."
+        if self.shape == 'AABB' and other.shape == 'AABB':
+            return all(abs(a - b) < ha + hb for a, b, ha, hb in zip(self.center, other.center, self.extent, other.extent))
+        if self.shape == 'SPHERE' and other.shape == 'SPHERE':
+            return sum((a - b) ** 2 for a, b in zip(self.center, other.center)) < (self.extent + other.extent) ** 2
+        box, sphere = (self, other) if self.shape == 'AABB' else (other, self)
+        # Distance from the sphere center to the closest point of the box
+        distance = sum(max(0.0, abs(s - c) - h) ** 2 for s, c, h in zip(sphere.center, box.center, box.extent))
+        return distance < sphere.extent ** 2
+
+
+class SpaceIndex:
+    "Uniform grid of SpaceVolume keyed by any hashable key, updated one volume at a time."
+
+    # Volumes covering more cells than this are checked by every query instead
+    MAX_CELLS = 512
+
+    def __init__(self, cell_size=2.0):
+        self.cell_size = cell_size
+        self.volumes = {}
+        self.cells = {}
+        self.volume_cells = {}
+        self.large = set()
+
+    def __len__(self):
+        return len(self.volumes)
+
+    def cell(self, point):
+        size = self.cell_size
+        return (math.floor(point[0] / size), math.floor(point[1] / size), math.floor(point[2] / size))
+
+    def update(self, key, volume):
+        "Adds or replaces the volume of a key."
+        self.remove(key)
+        self.volumes[key] = volume
+        low, high = volume.bounds()
+        (x0, y0, z0), (x1, y1, z1) = self.cell(low), self.cell(high)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) * (z1 - z0 + 1) > self.MAX_CELLS:
+            self.large.add(key)
+            return
+        cells = [(x, y, z) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1) for z in range(z0, z1 + 1)]
+        for cell in cells:
+            self.cells.setdefault(cell, set()).add(key)
+        self.volume_cells[key] = cells
+
+    def remove(self, key):
+        if self.volumes.pop(key, None) is None:
+            return
+        self.large.discard(key)
+        for cell in self.volume_cells.pop(key, ()):
+            keys = self.cells[cell]
+            keys.discard(key)
+            if not keys:
+                del self.cells[cell]
+
+    def clear(self):
+        self.volumes.clear()
+        self.cells.clear()
+        self.volume_cells.clear()
+        self.large.clear()
+
+    def query(self, point):
+        "Returns (volume, weight) of every volume containing the point, sorted by space index."
+        keys = self.cells.get(self.cell(point), set()) | self.large
+        hits = []
+        for key in keys:
+            volume = self.volumes[key]
+            if volume.contains(point):
+                hits.append((volume, volume.weight(point)))
+        hits.sort(key=lambda hit: (hit[0].space_index, hit[0].name))
+        return hits
+
+
+def make_volume(name, space_index, blend_depth, display_type, location, scale, display_size):
+    "Returns the SpaceVolume of a CUBE or SPHERE empty's transform, or None for other display types."
+    if display_type == 'CUBE':
+        extent = (display_size * abs(scale[0]), display_size * abs(scale[1]), display_size * abs(scale[2]))
+        return SpaceVolume(name, space_index, blend_depth, 'AABB', tuple(location), extent)
+    if display_type == 'SPHERE':
+        return SpaceVolume(name, space_index, blend_depth, 'SPHERE', tuple(location), display_size)
+    return None
+
+
+def space_volume(obj):
+    "Returns the SpaceVolume of a SPACE empty, or None if its display type isn't exported."
+    xp_data = obj.xp_sound_data
+    return make_volume(obj.name, xp_data.space_index, xp_data.space_blend_depth, obj.empty_display_type,
+                       obj.location, obj.scale, obj.empty_display_size)
@@ -0,0 +1,127 @@
+# Opt-in timing, counters and cProfile capture for import and export.
+#
+# This module does not depend on bpy. Operators create a PhaseStats when
+# profiling is enabled in the global settings, otherwise NULL_STATS is used
+# so the instrumented code paths cost next to nothing.
+
+import cProfile
+import os
+import time
+from contextlib import contextmanager
+
+
+class PhaseStats:
+    "Wall time per phase and counters of a single import or export."
+
+    def __init__(self, operation, profile_path=None):
+        self.operation = operation
+        self.phases = {}
+        self.counters = {}
+        self.total = 0.0
+        self.profile_path = profile_path
+        self.profiler = None
+        self.started = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        if self.profile_path:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.profile_path)
+            self.profiler = None
+        self.total = time.perf_counter() - self.started
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def timed_iter(self, name, iterable):
+        "Yields from iterable, timing only the time spent producing items."
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_time(name, time.perf_counter() - start)
+                return
+            self.add_time(name, time.perf_counter() - start)
+            yield item
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self):
+        "One line summary used in the Info report."
+        phases = ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in self.phases.items())
+        counters = ", ".join(f"{value} {name}" for name, value in self.counters.items())
+        text = f"{self.operation.capitalize()} {self.total * 1000:.1f} ms: {phases}"
+        if counters:
+            text += f" | {counters}"
+        if self.profile_path:
+            text += f" | profile: {self.profile_path}"
+        return text
+
+
+class NullPhase:
+    "Reusable context manager doing nothing."
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+NULL_PHASE = NullPhase()
+
+
+class NullStats:
+    "Stand-in used when profiling is disabled."
+    profile_path = None
+    phases = {}
+    counters = {}
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def phase(self, name):
+        return NULL_PHASE
+
+    def add_time(self, name, seconds):
+        pass
+
+    def timed_iter(self, name, iterable):
+        return iterable
+
+    def count(self, name, value=1):
+        pass
+
+
+NULL_STATS = NullStats()
+
+
+def make_stats(operation, enabled, profile_dir=None):
+    "Returns a PhaseStats if enabled, with a cProfile dump in profile_dir if given, else NULL_STATS."
+    if not enabled:
+        return NULL_STATS
+    profile_path = os.path.join(profile_dir, f"xpsound_{operation}.prof") if profile_dir else None
+    return PhaseStats(operation, profile_path)
+
+
+# Statistics of the last profiled run keyed by operation ('import', 'export')
+last_stats = {}
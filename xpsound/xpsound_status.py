@@ -0,0 +1,140 @@
+import bpy
+import os
+import time
+from .xpsound_datarefs import load_dataref_index
+from .xpsound_guids import load_guid_catalog
+
+# Seconds a cached file status stays valid when read outside of the poll timer
+STATUS_TTL = 5.0
+
+# Seconds between two polls of the watched files
+POLL_INTERVAL = 2.0
+
+class FileStatus:
+    "Result of the last stat of a file."
+    __slots__ = ('path', 'exists', 'size', 'mtime_ns', 'checked')
+
+    def __init__(self, path):
+        self.path = path
+        self.checked = time.monotonic()
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.exists = False
+            self.size = 0
+            self.mtime_ns = 0
+        else:
+            self.exists = os.path.isfile(path)
+            self.size = stat.st_size
+            self.mtime_ns = stat.st_mtime_ns
+
+    def changed(self, other):
+        return (self.exists, self.size, self.mtime_ns) != (other.exists, other.size, other.mtime_ns)
+
+# Cached statuses keyed by absolute path
+file_status = {}
+
+# Absolute paths keyed by (blend file, directory, filename)
+resolved_paths = {}
+
+# Functions called as callback(context, status) when a watched file changes on disk
+file_change_callbacks = []
+
+def resolve_path(directory, filename):
+    "Returns the normalized absolute path of a file in a directory relative to the .blend."
+    key = (bpy.data.filepath, directory, filename)
+    path = resolved_paths.get(key)
+    if path is None:
+        path = os.path.normpath(bpy.path.abspath(os.path.join("//", directory, filename)))
+        resolved_paths[key] = path
+    return path
+
+def get_guids_file_path(context):
+    "Returns the absolute path of GUIDS.txt in the FMOD folder."
+    return resolve_path(context.scene.xp_sound_global.fmod_path, "GUIDS.txt")
+
+def get_snd_file_path(context):
+    "Returns the absolute path of the exported .snd file."
+    xp_global = context.scene.xp_sound_global
+    return resolve_path(xp_global.fmod_path, xp_global.snd_filename)
+
+def get_guid_catalog(context):
+    "Returns the GuidCatalog of the scene's GUIDS.txt, or None if the file is missing."
+    try:
+        return load_guid_catalog(get_guids_file_path(context), context.scene.xp_sound_global.guid_cache_file)
+    except OSError:
+        return None
+
+def get_datarefs_file_paths(context):
+    "Returns the absolute paths of the DataRefs.txt and custom dataref list files that are set."
+    xp_global = context.scene.xp_sound_global
+    return [resolve_path("", filename) for filename in (xp_global.datarefs_file, xp_global.custom_datarefs_file) if filename]
+
+def get_dataref_index(context):
+    "Returns the DatarefIndex of the scene's dataref files, or None if none of them exists."
+    cache_dir = bpy.utils.user_resource('CONFIG', path="xpsound")
+    return load_dataref_index(get_datarefs_file_paths(context), cache_dir)
+
+# DatarefIndex of the dataref files keyed by their absolute paths, refreshed by the poll timer and path updates
+dataref_indices = {}
+
+def refresh_dataref_index(context):
+    "Loads the dataref files of the scene again if they changed, returns True if the cached index was replaced."
+    paths = tuple(get_datarefs_file_paths(context))
+    previous = dataref_indices.get(paths)
+    index = get_dataref_index(context)
+    dataref_indices.clear()
+    dataref_indices[paths] = index
+    return index is not previous
+
+def cached_dataref_index(context):
+    "Returns the DatarefIndex of the last refresh without touching the files, for draw code."
+    return dataref_indices.get(tuple(get_datarefs_file_paths(context)))
+
+def get_file_status(path, ttl=STATUS_TTL):
+    "Returns the cached status of a file, it's only checked again once older than ttl."
+    status = file_status.get(path)
+    if status is None or time.monotonic() - status.checked > ttl:
+        status = FileStatus(path)
+        file_status[path] = status
+    return status
+
+def watched_paths(context):
+    return (get_guids_file_path(context), get_snd_file_path(context))
+
+def poll_file_status():
+    "Timer checking the watched files of the current scene, runs the callbacks of changed ones."
+    context = bpy.context
+    if context.scene is None or not hasattr(context.scene, "xp_sound_global"):
+        return POLL_INTERVAL
+
+    changed = refresh_dataref_index(context)
+    for path in watched_paths(context):
+        previous = file_status.get(path)
+        status = FileStatus(path)
+        file_status[path] = status
+        if previous is not None and status.changed(previous):
+            changed = True
+            for callback in file_change_callbacks:
+                callback(context, status)
+
+    # Redraw the sidebar so the panel shows the new status
+    if changed and context.window_manager is not None:
+        for window in context.window_manager.windows:
+            for area in window.screen.areas:
+                if area.type == 'VIEW_3D':
+                    area.tag_redraw()
+    return POLL_INTERVAL
+
+def register():
+    bpy.app.timers.register(poll_file_status, first_interval=POLL_INTERVAL, persistent=True)
+
+def unregister():
+    if bpy.app.timers.is_registered(poll_file_status):
+        bpy.app.timers.unregister(poll_file_status)
+    file_status.clear()
+    resolved_paths.clear()
+    dataref_indices.clear()
+
+if __name__ == "__main__":
+    register()
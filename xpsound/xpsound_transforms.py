@@ -0,0 +1,76 @@
+# Bulk transform reads and Blender <-> X-Plane coordinate conversion.
+#
+# This module does not depend on bpy, it only needs NumPy (bundled with
+# Blender). Transforms of every object of a collection are read with a single
+# foreach_get per attribute and converted as arrays, Blender's (x, y, z) is
+# X-Plane's VEH_XYZ (x, z, -y). Rounding is left to the serializer, Python's
+# round() is correctly rounded while np.round() may print extra digits.
+
+import numpy as np
+
+
+def read_vectors(objects, attribute, size=3):
+    "Reads a float attribute of every item of a bpy collection into a (count, size) array."
+    values = np.empty(len(objects) * size, dtype=np.float32)
+    objects.foreach_get(attribute, values)
+    return values.reshape(-1, size).astype(np.float64)
+
+
+def write_vectors(objects, attribute, first, rows):
+    "Writes rows to the items of a bpy collection starting at index first, other items keep their values."
+    values = np.empty(len(objects) * 3, dtype=np.float32)
+    objects.foreach_get(attribute, values)
+    values = values.reshape(-1, 3)
+    values[first:first + len(rows)] = rows
+    objects.foreach_set(attribute, values.ravel())
+
+
+def blender_to_xplane(location, rotation, scale, display_size):
+    "Converts (n, 3) Blender transforms to VEH_XYZ positions, PHI/THETA/PSI degrees, AABB and SPHERE values."
+    x, y, z = location[:, 0], location[:, 1], location[:, 2]
+    position = np.column_stack((x, z, -y))
+
+    # X -> VEH_PHI, Y -> VEH_THETA, Z -> VEH_PSI
+    angles = np.degrees(rotation)
+
+    # Half extents of CUBE empties in X-Plane axes, the Y and Z scales swap
+    half = (scale * display_size[:, np.newaxis])[:, [0, 2, 1]]
+    aabb = np.hstack((position - half, position + half))
+    sphere = np.column_stack((x, z, y, display_size))
+    return position, angles, aabb, sphere
+
+
+def xplane_to_blender(position, angles):
+    "Converts (n, 3) VEH_XYZ positions and PHI/THETA/PSI degrees to Blender locations and rotations."
+    x, y, z = position[:, 0], position[:, 1], position[:, 2]
+    location = np.column_stack((x, -z, y))
+
+    # VEH_THETA -> X, VEH_PHI -> Y, VEH_PSI -> Z
+    rotation = np.radians(angles[:, [1, 0, 2]])
+    return location, rotation
+
+
+class TransformTable:
+    "Transforms of every object of a bpy collection, each attribute is a list with one row per object."
+    __slots__ = ('location', 'rotation', 'scale', 'display_size', 'position', 'angles', 'aabb', 'sphere')
+
+    def __init__(self, objects):
+        location = read_vectors(objects, "location")
+        rotation = read_vectors(objects, "rotation_euler")
+        scale = read_vectors(objects, "scale")
+        display_size = read_vectors(objects, "empty_display_size", 1)[:, 0]
+        position, angles, aabb, sphere = blender_to_xplane(location, rotation, scale, display_size)
+
+        # Plain lists, indexing them per object is much cheaper than indexing arrays
+        self.location = location.tolist()
+        self.rotation = rotation.tolist()
+        self.scale = scale.tolist()
+        self.display_size = display_size.tolist()
+        self.position = position.tolist()
+        self.angles = angles.tolist()
+        self.aabb = aabb.tolist()
+        self.sphere = sphere.tolist()
+
+    def fingerprint(self, row):
+        "Raw transform values of an object, part of the export cache fingerprint."
+        return (self.location[row], self.rotation[row], self.scale[row], self.display_size[row])
@@ -1,11 +1,131 @@
 import bpy
-import os
+import time
+from .xpsound_status import get_file_status, get_guids_file_path, get_snd_file_path, cached_dataref_index
+from .xpsound_stats import last_stats
+from .xpsound_helper import containing_spaces
+from .xpsound_query import ListIndex
+
+def draw_events(layout, event_list, remove_operator, datarefs=None):
+    "Draws a table of events with a remove button calling remove_operator, unknown datarefs are shown in red."
+    if len(event_list) == 0:
+        return
+    events = layout.box()
+    row = events.row()
+    row.label(text="Type") 
+    row = row.split(factor=0.5)
+    row.label(text="Dataref") 
+    row = row.split(factor=0.3)
+    row.label(text="Condition") 
+    row = row.split(factor=0.8)
+    row.label(text="Value") 
+    # Draw Events
+    for index, event in enumerate(event_list):
+        row = events.row()
+        row.prop(event, "event_type", text="")    
+        row = row.split(factor=0.5)
+        dataref_col = row.column()
+        dataref_col.alert = datarefs is not None and event.dataref_name != "" and not datarefs.is_valid(event.dataref_name)
+        dataref_col.prop(event, "dataref_name", text="")      
+        row = row.split(factor=0.3)
+        row.prop(event, "comparison_operator", text="")  
+        row = row.split(factor=0.8)
+        row.prop(event, "comparison_value", text="")
+        remove_button = row.operator(remove_operator, text="", icon="TRASH")
+        remove_button.index = index
+
+def draw_guid(row, context, item, catalog_property, kind):
+    "Draws the GUID field of a sound or snapshot with the FMOD folder browser."
+    if bpy.app.version >= (3, 3, 0):
+        # Ranked search of the GUID index, see xpsound_props
+        row.prop(item, "guid", text="Event GUID", icon="COLLAPSEMENU")
+    else:
+        row.prop_search(item, "guid", context.window_manager.xp_sound_catalog, catalog_property, text="Event GUID", icon="COLLAPSEMENU")
+    row.operator("xpsound.browse_guids", text="", icon="FILEBROWSER").kind = kind
+
+def draw_template(layout, context, item):
+    "Draws the condition template field of a sound or snapshot and the template's events."
+    xp_global = context.scene.xp_sound_global
+    row = layout.row()
+    row.prop_search(item, "template", xp_global, "templates", text="Template", icon="LINKED")
+    if item.template:
+        template = xp_global.templates.get(item.template)
+        if template is None:
+            row.label(text="Not found", icon='ERROR')
+        else:
+            row.label(text=f"{len(template.event_list)} shared events")
+
+def draw_containing_spaces(layout, context, obj):
+    "Draws the sound spaces containing an emitter with their blend weight, updated live as it moves."
+    hits = containing_spaces(context.scene, obj.location)
+    col = layout.column(align=True)
+    if not hits:
+        col.label(text="Outside every space", icon="WORLD")
+        return
+    for volume, weight in hits:
+        col.label(text=f"Space {volume.space_index}: {volume.name} ({weight * 100:.0f}%)", icon="MESH_CUBE" if volume.shape == 'AABB' else "MESH_UVSPHERE")
+
+# ListIndex of every drawn sound and snapshot list keyed by object pointer and list property,
+# dropped when the object is updated
+list_indices = {}
+
+# Bit of the filter flags set on sounds and snapshots without a GUID, UIList only uses bit 30
+FLAG_MISSING_GUID = 1 << 0
+
+def list_index(data, propname):
+    "Returns the cached ListIndex of a sound or snapshot list, rebuilt after its object changed."
+    items = getattr(data, propname)
+    indices = list_indices.setdefault(data.id_data.as_pointer(), {})
+    index = indices.get(propname)
+    if index is None or len(index) != len(items):
+        index = ListIndex([item.name for item in items], [item.guid for item in items],
+                          [len(item.event_list) for item in items])
+        indices[propname] = index
+    return index
+
+@bpy.app.handlers.persistent
+def invalidate_list_indices(scene, depsgraph=None):
+    if depsgraph is None:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Object):
+            list_indices.pop(update.id.original.as_pointer(), None)
+
+@bpy.app.handlers.persistent
+def clear_list_indices(*args):
+    list_indices.clear()
+
+# Search, sort and missing GUID filter of the sound and snapshot lists
+class FilteredItemList:
+    sort_by: bpy.props.EnumProperty(name="Sort By", items=[
+        ('NONE', "List Order", "Order of the list, which is also the export order"),
+        ('NAME', "Name", "Sort by name"),
+        ('GUID', "GUID", "Sort by event GUID"),
+        ('EVENTS', "Events", "Sort by number of events"),
+    ])
+    sort_reverse: bpy.props.BoolProperty(name="Reverse", description="Reverse the sort order")
+    missing_guid_only: bpy.props.BoolProperty(name="Missing GUID", description="Only show items without an event GUID")
+
+    def draw_filter(self, context, layout):
+        row = layout.row(align=True)
+        row.prop(self, "filter_name", text="", icon="VIEWZOOM")
+        row.prop(self, "missing_guid_only", text="", icon="ERROR")
+        row = layout.row(align=True)
+        row.prop(self, "sort_by", text="")
+        row.prop(self, "sort_reverse", text="", icon="SORT_DESC" if self.sort_reverse else "SORT_ASC")
+
+    def filter_items(self, context, data, propname):
+        index = list_index(data, propname)
+        matches = index.matches(self.filter_name, self.missing_guid_only)
+        visible = self.bitflag_filter_item
+        flags = [(visible if match else 0) | (FLAG_MISSING_GUID if missing else 0)
+                 for match, missing in zip(matches, index.missing_guids)]
+        return flags, index.order(self.sort_by, self.sort_reverse)
 
 # Sound List
-class XP_SOUND_UL_SOUND_LIST(bpy.types.UIList):
-    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+class XP_SOUND_UL_SOUND_LIST(FilteredItemList, bpy.types.UIList):
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index, flt_flag=0):
         row = layout.row()
-        row.prop(item, "name", text="", emboss=False, icon="SPEAKER")
+        row.prop(item, "name", text="", emboss=False, icon="ERROR" if flt_flag & FLAG_MISSING_GUID else "SPEAKER")
         
         # Button to duplicate the sound
         button_duplicate = row.operator("object.xp_sound_duplicate", text="", icon="DUPLICATE")
@@ -16,15 +136,26 @@ class XP_SOUND_UL_SOUND_LIST(bpy.types.UIList):
         button_remove.index = index
 
 # Snapshot List
-class XP_SOUND_UL_SNAPSHOT_LIST(bpy.types.UIList):
-    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+class XP_SOUND_UL_SNAPSHOT_LIST(FilteredItemList, bpy.types.UIList):
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index, flt_flag=0):
         row = layout.row()
-        row.prop(item, "name", text="", emboss=False, icon="SPEAKER")
+        row.prop(item, "name", text="", emboss=False, icon="ERROR" if flt_flag & FLAG_MISSING_GUID else "SPEAKER")
 
         # Button to remove the sound
         button_remove = row.operator("object.xp_snapshot_remove", text="", icon="TRASH")
         button_remove.index = index        
 
+# Condition Template List
+class XP_SOUND_UL_TEMPLATE_LIST(bpy.types.UIList):
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        row = layout.row()
+        row.prop(item, "name", text="", emboss=False, icon="LINKED")
+        row.label(text=str(len(item.event_list)))
+
+        # Button to remove the template
+        button_remove = row.operator("xpsound.remove_template", text="", icon="TRASH")
+        button_remove.index = index
+
 # Panel on Tools
 class XP_SOUND_PT_TOOLS_PANEL(bpy.types.Panel):
     bl_label = "Global Settings"
@@ -41,13 +172,18 @@ class XP_SOUND_PT_TOOLS_PANEL(bpy.types.Panel):
         col = layout.column()
         col.operator("xpsound.export_snd", text="Export to .snd", icon="EXPORT")
         col.operator("xpsound.import_snd", text="Import from .snd", icon="IMPORT")
+        col.operator("xpsound.merge_sounds", icon="AUTOMERGE_ON")
+        col.operator("xpsound.batch_edit", icon="MODIFIER")
         col.label(text="General:")
         col.prop(scene.xp_sound_global, "snd_filename", text="SND Filename")
         
+        # File status is cached and kept up to date by the status poll timer
+        snd_status = get_file_status(get_snd_file_path(context))
+        if snd_status.exists:
+            col.label(text=f"Last written: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(snd_status.mtime_ns / 1e9))}", icon='FILE')
+        
         # Custom drawing for FMOD path
-        guids_file_path = bpy.path.abspath(os.path.join("//", context.scene.xp_sound_global.fmod_path, "GUIDS.txt"))
-        guids_file_path = os.path.normpath(guids_file_path)
-        guid_file_exists = os.path.isfile(guids_file_path)
+        guid_file_exists = get_file_status(get_guids_file_path(context)).exists
         
         # Check if GUIDS.txt exists
         row = col.row()
@@ -67,8 +203,64 @@ class XP_SOUND_PT_TOOLS_PANEL(bpy.types.Panel):
         
         col.prop(scene.xp_sound_global, "ref_point_y")
         col.prop(scene.xp_sound_global, "ref_point_z")
+        col.prop(scene.xp_sound_global, "guid_cache_file")
+        col.prop(scene.xp_sound_global, "datarefs_file")
+        col.prop(scene.xp_sound_global, "custom_datarefs_file")
+        col.prop(scene.xp_sound_global, "validate_datarefs")
+        col.prop(scene.xp_sound_global, "validate_export")
         col.prop(scene.xp_sound_global, "disable_legacy_alerts")
+        col.prop(scene.xp_sound_global, "incremental_export")
         col.prop(scene.xp_sound_global, "draw_helper")
+        if scene.xp_sound_global.draw_helper:
+            col.prop(scene.xp_sound_global, "draw_all_emitters")
+            col.prop(scene.xp_sound_global, "draw_spaces")
+        
+        col.prop(scene.xp_sound_global, "enable_profiling")
+        if scene.xp_sound_global.enable_profiling:
+            col.prop(scene.xp_sound_global, "profile_dump")
+            self.draw_stats(layout)
+    
+    def draw_stats(self, layout):
+        # Statistics of the last profiled import and export
+        for operation in ("import", "export"):
+            stats = last_stats.get(operation)
+            if stats is None:
+                continue
+            box = layout.box()
+            box.label(text=f"Last {operation}: {stats.total * 1000:.1f} ms", icon='TIME')
+            col = box.column(align=True)
+            for name, seconds in stats.phases.items():
+                row = col.row()
+                row.label(text=name.capitalize())
+                row.label(text=f"{seconds * 1000:.1f} ms")
+            for name, value in stats.counters.items():
+                row = col.row()
+                row.label(text=name.capitalize())
+                row.label(text=str(value))
+            if stats.profile_path:
+                col.label(text=stats.profile_path, icon='FILE')
+        
+# Condition templates shared by sounds and snapshots
+class XP_SOUND_PT_TEMPLATES_PANEL(bpy.types.Panel):
+    bl_label = "Condition Templates"
+    bl_idname = "VIEW3D_PT_xp_sound_templates_panel"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "XPSound"
+    bl_options = {'DEFAULT_CLOSED'}
+    
+    def draw(self, context):
+        layout = self.layout
+        xp_global = context.scene.xp_sound_global
+        
+        layout.template_list("XP_SOUND_UL_TEMPLATE_LIST", "", xp_global, "templates", xp_global, "template_index")
+        layout.operator("xpsound.add_template", text="Add Template")
+        
+        if 0 <= xp_global.template_index < len(xp_global.templates):
+            template = xp_global.templates[xp_global.template_index]
+            box = layout.box()
+            draw_events(box, template.event_list, "xpsound.remove_template_event", cached_dataref_index(context))
+            box.operator("xpsound.add_template_event", text="Add Event")
         
 # Empty panel
 class XP_SOUND_PT_PANEL(bpy.types.Panel):
@@ -90,6 +282,12 @@ class XP_SOUND_PT_PANEL(bpy.types.Panel):
         # Object-specific properties
         layout.prop(xp_data, "event_type")
         
+        # Whole setup copy, pasted to every selected empty
+        row = layout.row(align=True)
+        row.operator("xpsound.copy_setup", text="Copy Setup", icon="COPYDOWN")
+        row.operator("xpsound.paste_setup", text="Paste Setup", icon="PASTEDOWN")
+        row.operator("xpsound.copy_setup_to_selected", text="To Selected", icon="LINKED")
+        
         if xp_data.event_type == 'SOUND':
             self.draw_sound_properties(context, layout, obj)
         elif xp_data.event_type == 'SNAPSHOT':
@@ -117,6 +315,8 @@ class XP_SOUND_PT_PANEL(bpy.types.Panel):
         row.operator("object.xp_sound_copy", text="Copy")
         row.operator("object.xp_sound_paste", text="Paste")
 
+        draw_containing_spaces(layout, context, obj)
+
         # Display the event_name property for the selected X-Plane sound object
         if (obj.xp_sound_data.xp_sound_index >= 0 and len(obj.xp_sound_data.xp_sound_list) > 0):
             xp_sound = obj.xp_sound_data.xp_sound_list[obj.xp_sound_data.xp_sound_index]
@@ -124,7 +324,7 @@ class XP_SOUND_PT_PANEL(bpy.types.Panel):
 
             #layout.prop(xp_sound, "guid")
             row = layout.row()
-            row.prop_search(xp_sound, "guid", context.scene.xp_sound_global, "parsed_events", text="Event GUID", icon="COLLAPSEMENU")    
+            draw_guid(row, context, xp_sound, "parsed_events", 'SOUND')
             row.operator("object.xp_sound_refresh_parsed_events", text="", icon="FILE_REFRESH")        
             
             col = layout.column()
@@ -133,32 +333,13 @@ class XP_SOUND_PT_PANEL(bpy.types.Panel):
             col.prop(xp_sound, "event_allowed_for_ai")
             col.prop(xp_sound, "event_param_idx")            
             
-            # Create tabs for each sound event
-            if len(xp_sound.event_list) > 0:
-                events = layout.box()
-                row = events.row()
-                row.label(text="Type") 
-                row = row.split(factor=0.5)
-                row.label(text="Dataref") 
-                row = row.split(factor=0.3)
-                row.label(text="Condition") 
-                row = row.split(factor=0.8)
-                row.label(text="Value") 
-            # Draw Events
-                for index, event in enumerate(xp_sound.event_list):
-                    row = events.row()
-                    row.prop(event, "event_type", text="")    
-                    row = row.split(factor=0.5)
-                    row.prop(event, "dataref_name", text="")      
-                    row = row.split(factor=0.3)
-                    row.prop(event, "comparison_operator", text="")  
-                    row = row.split(factor=0.8)
-                    row.prop(event, "comparison_value", text="")
-                    remove_button = row.operator("xpsound.remove_sound_event", text="", icon="TRASH")
-                    remove_button.index = index
+            # Shared conditions, then the sound's own events
+            draw_template(layout, context, xp_sound)
+            draw_events(layout, xp_sound.event_list, "xpsound.remove_sound_event", cached_dataref_index(context))
                     
             row = layout.row()
-            row.operator("xpsound.add_sound_event", text="Add Event")  
+            row.operator("xpsound.add_sound_event", text="Add Event")
+            row.operator("xpsound.template_from_events", text="Make Template")  
             
     def draw_snapshot_properties(self, context, layout, obj):
         # Create a list with each X-Plane sound object
@@ -173,52 +354,46 @@ class XP_SOUND_PT_PANEL(bpy.types.Panel):
 
             layout = layout.box()
             row = layout.row()
-            row.prop_search(xp_snapshot, "guid", context.scene.xp_sound_global, "parsed_snapshots", text="Event GUID", icon="COLLAPSEMENU")    
+            draw_guid(row, context, xp_snapshot, "parsed_snapshots", 'SNAPSHOT')
             row.operator("object.xp_sound_refresh_parsed_events", text="", icon="FILE_REFRESH")              
             
             col = layout.column()
             col.prop(xp_snapshot, "event_auto_end_from_start_cond")
             col.prop(xp_snapshot, "event_param_idx")            
             
-            # Create tabs for each sound event
-            if len(xp_snapshot.event_list) > 0:
-                events = layout.box()
-                row = events.row()
-                row.label(text="Type") 
-                row = row.split(factor=0.5)
-                row.label(text="Dataref") 
-                row = row.split(factor=0.3)
-                row.label(text="Condition") 
-                row = row.split(factor=0.8)
-                row.label(text="Value") 
-                # Draw Events
-                for index, event in enumerate(xp_snapshot.event_list):
-                    row = events.row()
-                    row.prop(event, "event_type", text="")    
-                    row = row.split(factor=0.5)
-                    row.prop(event, "dataref_name", text="")      
-                    row = row.split(factor=0.3)
-                    row.prop(event, "comparison_operator", text="")  
-                    row = row.split(factor=0.8)
-                    row.prop(event, "comparison_value", text="")
-                    remove_button = row.operator("xpsound.remove_snapshot_event", text="", icon="TRASH")
-                    remove_button.index = index
+            # Shared conditions, then the snapshot's own events
+            draw_template(layout, context, xp_snapshot)
+            draw_events(layout, xp_snapshot.event_list, "xpsound.remove_snapshot_event", cached_dataref_index(context))
 
             row = layout.row()
-            row.operator("xpsound.add_snapshot_event", text="Add Event")  
+            row.operator("xpsound.add_snapshot_event", text="Add Event")
+            row.operator("xpsound.template_from_events", text="Make Template")  
 
             
 def register():
     bpy.utils.register_class(XP_SOUND_PT_TOOLS_PANEL)
+    bpy.utils.register_class(XP_SOUND_PT_TEMPLATES_PANEL)
     bpy.utils.register_class(XP_SOUND_PT_PANEL)
     bpy.utils.register_class(XP_SOUND_UL_SOUND_LIST)
     bpy.utils.register_class(XP_SOUND_UL_SNAPSHOT_LIST)
+    bpy.utils.register_class(XP_SOUND_UL_TEMPLATE_LIST)
+    bpy.app.handlers.depsgraph_update_post.append(invalidate_list_indices)
+    bpy.app.handlers.load_post.append(clear_list_indices)
+    bpy.app.handlers.undo_post.append(clear_list_indices)
+    bpy.app.handlers.redo_post.append(clear_list_indices)
 
 def unregister():
     bpy.utils.unregister_class(XP_SOUND_PT_TOOLS_PANEL)
+    bpy.utils.unregister_class(XP_SOUND_PT_TEMPLATES_PANEL)
     bpy.utils.unregister_class(XP_SOUND_PT_PANEL)
     bpy.utils.unregister_class(XP_SOUND_UL_SOUND_LIST)    
     bpy.utils.unregister_class(XP_SOUND_UL_SNAPSHOT_LIST)
+    bpy.utils.unregister_class(XP_SOUND_UL_TEMPLATE_LIST)
+    bpy.app.handlers.depsgraph_update_post.remove(invalidate_list_indices)
+    bpy.app.handlers.load_post.remove(clear_list_indices)
+    bpy.app.handlers.undo_post.remove(clear_list_indices)
+    bpy.app.handlers.redo_post.remove(clear_list_indices)
+    list_indices.clear()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,137 @@
+# Checks of the exported sound setup.
+#
+# This module does not depend on bpy. The exporter builds one record per
+# exported object while serializing it, caches it with the object's blocks
+# so unchanged objects cost nothing, and runs validate() once the traversal
+# is done. Spaces and emitters are sorted once and swept along X, the checks
+# are O(n log n) plus the number of reported overlaps.
+
+import heapq
+
+
+class Issue:
+    "A problem found by the validation, severity is 'ERROR', 'WARNING' or 'INFO'."
+    __slots__ = ('severity', 'message', 'objects')
+
+    def __init__(self, severity, message, objects=()):
+        self.severity = severity
+        self.message = message
+        self.objects = objects
+
+    def __repr__(self):
+        return f"Issue({self.severity!r}, {self.message!r})"
+
+
+class EmitterRecord:
+    "Attachments of an exported SOUND or SNAPSHOT object, location is None for snapshots."
+    __slots__ = ('name', 'event_type', 'location', 'attachments')
+
+    def __init__(self, name, event_type, location, attachments):
+        self.name = name
+        self.event_type = event_type
+        self.location = location
+        # (name, guid, conditions) of every sound or snapshot
+        self.attachments = attachments
+
+
+def attachment_conditions(item):
+    "Hashable conditions of a sound or snapshot, its template and its own events."
+    return (item.template, tuple(event.key() for event in item.event_list))
+
+
+def emitter_record(name, event_type, location, items):
+    "Builds the EmitterRecord of an object from its SoundModel or SnapshotModel items."
+    attachments = [(item.name, item.guid, attachment_conditions(item)) for item in items]
+    return EmitterRecord(name, event_type, tuple(location) if event_type == 'SOUND' else None, attachments)
+
+
+def sorted_bounds(spaces):
+    "Returns (min, max, space) of every space sorted by min X."
+    bounds = [space.bounds() + (space,) for space in spaces]
+    bounds.sort(key=lambda entry: entry[0][0])
+    return bounds
+
+
+def overlapping_spaces(spaces):
+    "Yields the pairs of overlapping spaces with a sweep and prune along X."
+    bounds = sorted_bounds(spaces)
+    active = []
+    for i, (low, high, space) in enumerate(bounds):
+        # Spaces ending before this one starts can't overlap anything that follows
+        while active and active[0][0] <= low[0]:
+            heapq.heappop(active)
+        for _, j in active:
+            other_low, other_high, other = bounds[j]
+            # Y and Z intervals are compared before the exact test
+            if (other_low[1] < high[1] and low[1] < other_high[1] and other_low[2] < high[2] and low[2] < other_high[2]
+                    and other.overlaps(space)):
+                yield other, space
+        heapq.heappush(active, (high[0], i))
+
+
+def emitters_outside_spaces(emitters, spaces):
+    "Yields the emitters contained in no space, both lists are swept along X."
+    bounds = sorted_bounds(spaces)
+    emitters = sorted(emitters, key=lambda emitter: emitter.location[0])
+    active = []
+    next_space = 0
+    for emitter in emitters:
+        x, y, z = emitter.location
+        while next_space < len(bounds) and bounds[next_space][0][0] <= x:
+            heapq.heappush(active, (bounds[next_space][1][0], next_space))
+            next_space += 1
+        while active and active[0][0] < x:
+            heapq.heappop(active)
+        for _, j in active:
+            low, high, space = bounds[j]
+            if low[1] <= y <= high[1] and low[2] <= z <= high[2] and space.contains(emitter.location):
+                break
+        else:
+            yield emitter
+
+
+def quantize(values, tolerance=0.001):
+    return tuple(round(value / tolerance) for value in values)
+
+
+def validate(spaces, emitters, events=None, snapshots=None, templates=None):
+    "Returns the Issue list of SpaceVolume spaces and EmitterRecord emitters, other arguments are name sets or None."
+    issues = []
+
+    # Spaces sharing an index are blended as one, overlapping ones are most likely a mistake
+    for first, second in overlapping_spaces(spaces):
+        if first.space_index == second.space_index:
+            issues.append(Issue('WARNING', f"Spaces '{first.name}' and '{second.name}' with index {first.space_index} overlap",
+                                (first.name, second.name)))
+
+    # Sounds outside every space are only reported when spaces are used at all
+    sounds = [emitter for emitter in emitters if emitter.location is not None and emitter.attachments]
+    if spaces:
+        outside = [emitter.name for emitter in emitters_outside_spaces(sounds, spaces)]
+        if outside:
+            issues.append(Issue('INFO', f"{len(outside)} sound emitters are outside every space: {', '.join(outside[:5])}"
+                                + (", ..." if len(outside) > 5 else ""), tuple(outside)))
+
+    seen = {}
+    for emitter in emitters:
+        catalog = events if emitter.event_type == 'SOUND' else snapshots
+        position = quantize(emitter.location) if emitter.location is not None else None
+        for name, guid, conditions in emitter.attachments:
+            if not guid:
+                issues.append(Issue('ERROR', f"'{emitter.name} -> {name}' has no GUID", (emitter.name,)))
+                continue
+            if catalog is not None and guid not in catalog:
+                issues.append(Issue('ERROR', f"'{emitter.name} -> {name}' uses {guid}, not found in GUIDS.txt", (emitter.name,)))
+            template = conditions[0]
+            if template and templates is not None and template not in templates:
+                issues.append(Issue('WARNING', f"'{emitter.name} -> {name}' uses the missing template '{template}'", (emitter.name,)))
+
+            # Same GUID at the same place with the same conditions plays twice
+            key = (guid, position, conditions)
+            first = seen.get(key)
+            if first is None:
+                seen[key] = emitter.name
+            else:
+                issues.append(Issue('WARNING', f"'{emitter.name} -> {name}' duplicates an attachment of '{first}'",
+                                    (first, emitter.name)))
+    return issues